@@ -231,81 +231,348 @@ $(function() {
 	}
 
 
-	function submitForm(e) {
-		e.preventDefault()
-		let form = this
-		let formData = $(this).serialize();
+	// Log viewer, the log is read in windows of whole lines and
+	// the windows around the scroll position are requested on
+	// demand. Only LOG_WINDOWS windows are kept in the page, the
+	// farthest one is dropped when another is loaded.
+	const LOG_WINDOW_LENGTH = 64 * 1024
+	const LOG_WINDOWS = 5
+	const LOG_SCROLL_MARGIN = 100
+
+	function showLogErrors(form, jqXHR){
+		if (jqXHR.status == 403){
+			window.location.reload()
+		}
 
-		let thisURL = this.action
+		createAlert('Error occured while trying to get logs.', 'danger')
+
+		let errors = (jqXHR['responseJSON'] || {})['errors'] || {}
+		for (const [key, value] of Object.entries(errors)) {
+			let input = form.querySelector(".ajax-input[name='" + key + "']")
+			if (input){
+				let new_el = document.createElement('small')
+				new_el.classList.add('text-danger')
+				new_el.innerText = value
+				form.querySelector(`div[for='${input.id}']`).appendChild(new_el)
+			}
+		}
+	}
+
+	function createLogWindow(data){
+		let block = document.createElement('div')
+		block.append(...data['lines'].map(function (text){
+			let line = document.createElement('p')
+			line.innerText = text
+			return line
+		}))
+		return {
+			start: data['start_offset'],
+			end: data['end_offset'],
+			has_before: data['has_before'],
+			paged: data['start_offset'] !== undefined,
+			block: block,
+		}
+	}
+
+	function openLogViewer(form){
+		let sheet = $(form.dataset.sheet)
+		let lines = sheet.find('.lines, .entries').first()
+		// Date ranges are read forward from their start
+		let ranged = Boolean(form.querySelector("[name='from_date']").value)
+		let windows = []
+		let loading = false
+
+		function request(params, done){
+			loading = true
+			$.ajax({
+				method: "POST",
+				url: form.action,
+				data: $(form).serialize() + '&' + $.param(params),
+				success: function (data){
+					loading = false
+					done(data)
+				},
+				error: function (jqXHR){
+					loading = false
+					stopLoader()
+					showLogErrors(form, jqXHR)
+				},
+			})
+		}
+
+		function append(data){
+			let log_window = createLogWindow(data)
+			if (!data['lines'].length){
+				return
+			}
+			lines.append(log_window.block)
+			windows.push(log_window)
+			if (windows.length > LOG_WINDOWS){
+				let first = windows.shift()
+				let height = first.block.offsetHeight
+				first.block.remove()
+				sheet.scrollTop(sheet.scrollTop() - height)
+			}
+		}
+
+		function prepend(data){
+			let log_window = createLogWindow(data)
+			if (!data['lines'].length){
+				// A line longer than the window, stop paging back
+				windows[0].has_before = false
+				return
+			}
+			lines.prepend(log_window.block)
+			windows.unshift(log_window)
+			sheet.scrollTop(sheet.scrollTop() + log_window.block.offsetHeight)
+			if (windows.length > LOG_WINDOWS){
+				windows.pop().block.remove()
+			}
+		}
+
+		sheet.off('scroll.logs').on('scroll.logs', function (){
+			if (loading || !windows.length || !windows[0].paged){
+				return
+			}
+			let first = windows[0]
+			let last = windows[windows.length - 1]
+			if (this.scrollTop < LOG_SCROLL_MARGIN && !ranged && first.has_before){
+				let offset = Math.max(0, first.start - LOG_WINDOW_LENGTH)
+				request({offset: offset, length: first.start - offset}, prepend)
+			} else if (this.scrollHeight - this.scrollTop - this.clientHeight < LOG_SCROLL_MARGIN){
+				request({offset: last.end, length: LOG_WINDOW_LENGTH}, append)
+			}
+		})
 
-		// Play loader
 		playLoader()
+		clearAlerts()
+		$(form).find('.form-errors').html('')
+
+		// The last lines, or the first lines of the date range
+		request({}, function (data){
+			stopLoader()
+			lines.html('')
+			append(data)
+			if (!windows.length){
+				lines.text('No Logs')
+			}
+			sheet.scrollTop(ranged ? 0 : sheet.prop('scrollHeight'))
+			createAlert('Logs were pulled successfully')
+		})
+	}
 
-        // Clear alerts
-        clearAlerts()
+	if($('#log_form').length){
+		$('#log_form').submit(function (e){
+			e.preventDefault()
+			openLogViewer(this)
+		});
+	}
+
+	// Log search, only the matching lines come back from the server
+	function submitLogSearch(e){
+		e.preventDefault()
+		let form = this
+		let results = $(form).find('.search_results')
+
+		playLoader()
+		clearAlerts()
+		$(form).find('.form-errors').html('')
 
-		$('.form-errors').html('');
-	
 		$.ajax({
-			method: "POST",
-			url: thisURL,
-			data: formData,
+			method: "GET",
+			url: form.action,
+			data: $(form).serialize(),
 			success: function (data){
-				// Pause loader
 				stopLoader()
-				
-				// NOTE: Remove this in production
-				console.log(data)
+				results.html('')
+				results.append(data['matches'].map(function (match){
+					let line = document.createElement('p')
+					line.innerText = '{}: {}'.format(match['line_number'], match['line'])
+					if (match['path']){
+						// Match in a rotated file
+						line.innerText = '{}:{}'.format(match['path'].split('/').pop(), line.innerText)
+					}
+					if (!match['match']){
+						line.classList.add('text-muted')
+					}
+					return line
+				}))
+				if (data['truncated']){
+					createAlert('Search stopped at the match limit', 'warning')
+				}
+			},
+			error: function (jqXHR){
+				stopLoader()
+				let errors = (jqXHR['responseJSON'] || {})['errors'] || {}
+				for (const [key, value] of Object.entries(errors)) {
+					let input = form.querySelector(".ajax-input[name='" + key + "']")
+					if (input){
+						let new_el = document.createElement('small')
+						new_el.classList.add('text-danger')
+						new_el.innerText = value
+						form.querySelector(`div[for='${input.id}']`).appendChild(new_el)
+					}
+				}
+				createAlert('Error occured while searching logs.', 'danger')
+			},
+		})
+	}
+
+	$('.log_search').submit(submitLogSearch);
 
-				// Get the log message
-                let message = data['log']
+	// Timeline of website logs and service journals, merged on the server
+	function loadTimeline(form, append){
+		let results = $(form).find('.timeline_results')
+		let more = $(form).find('.timeline_more')
+		if (!append){
+			form.querySelector("input[name='cursor']").value = ''
+		}
 
-                // Load to dom
-                $('.log_sheet p').html(message);
+		playLoader()
+		clearAlerts()
+		$(form).find('.form-errors').html('')
 
-                // Create alert
-                createAlert('Logs were pulled successfully')
+		$.ajax({
+			method: "GET",
+			url: form.action,
+			data: $(form).serialize(),
+			success: function (data){
+				stopLoader()
+				if (!append){
+					results.html('')
+				}
+				results.append(data['lines'].map(function (entry){
+					let line = document.createElement('p')
+					line.innerText = '{} {}: {}'.format(entry['time'] || '', entry['source'].split('/').pop(), entry['line'])
+					return line
+				}))
+				form.querySelector("input[name='cursor']").value = data['cursor']
+				more.prop('disabled', !data['has_more'])
 			},
-			error: function (jqXHR) {
-				// Pause loader
+			error: function (jqXHR){
 				stopLoader()
-
-				if (jqXHR.status == 403){
-					window.location.reload()
+				let errors = (jqXHR['responseJSON'] || {})['errors'] || {}
+				for (const [key, value] of Object.entries(errors)) {
+					let input = form.querySelector(".ajax-input[name='" + key + "']")
+					if (input){
+						let new_el = document.createElement('small')
+						new_el.classList.add('text-danger')
+						new_el.innerText = value
+						form.querySelector(`div[for='${input.id}']`).appendChild(new_el)
+					}
 				}
+				createAlert('Error occured while loading the timeline.', 'danger')
+			}
+		})
+	}
 
-                // Create error alert
-                createAlert('Error occured while trying to get logs.', 'danger')
+	$('#timeline_form').submit(function (e){
+		e.preventDefault()
+		loadTimeline(this, false)
+	});
+	$('#timeline_form .timeline_more').click(function (){
+		loadTimeline(this.form, true)
+	});
 
-				let data = jqXHR['responseJSON'];
+	// Access log analytics, aggregated on the server
+	function fillTable(table, rows){
+		let body = $(table).find('tbody')
+		body.html('')
+		body.append(rows.map(function (row){
+			let tr = document.createElement('tr')
+			for (const value of row){
+				let td = document.createElement('td')
+				td.innerText = value
+				tr.appendChild(td)
+			}
+			return tr
+		}))
+	}
 
-				// Remove this in production
-                console.log(data)
+	function submitAccessStats(e){
+		e.preventDefault()
+		let form = this
+		let results = $(form).find('.stats_results')
 
-                // Check if there are errors
-                let errors = data['errors']
+		playLoader()
+		clearAlerts()
 
-                if (errors){
-                    for (const [key, value] of Object.entries(errors)) {
-                        if (key != '__all__'){
-                            let input = form.querySelector(".ajax-input[name='" + key + "']")
-                            let new_el = document.createElement('small')
-                            new_el.classList.add('text-danger')
-                            new_el.innerText = value
-                            
-                            // Get the form error div
-                            let form_error_div = document.querySelector(`div[for='${input.id}']`)
-                            form_error_div.appendChild(new_el)
-                        }
-                    }
-                }
+		$.ajax({
+			method: "GET",
+			url: form.action,
+			data: $(form).serialize(),
+			success: function (data){
+				stopLoader()
+				results.find('.requests').text('{} requests'.format(data['requests']))
+				fillTable(results.find('.per_minute'), Object.entries(data['per_minute']))
+				fillTable(results.find('.status_codes'), Object.entries(data['status_codes']))
+				fillTable(results.find('.top_paths'), data['top_paths'])
+				fillTable(results.find('.top_ips'), data['top_ips'])
+			},
+			error: function (){
+				stopLoader()
+				createAlert('Error occured while getting analytics.', 'danger')
 			},
 		})
 	}
 
-	if($('#log_form').length){
-		$('.log_sheet p').html('')
-		$('#log_form').submit(submitForm);
+	$('#access_stats').submit(submitAccessStats);
+
+	// Service journal, the last entries are loaded first, older
+	// entries are paged with the first cursor and new entries are
+	// polled with the last cursor
+	function journalEntry(entry){
+		let line = document.createElement('p')
+		let time = new Date(entry['time']).toLocaleString()
+		let name = entry['identifier'] || ''
+		line.innerText = '{} {}[{}]: {}'.format(
+			time, name, entry['pid'] || '', entry['message'])
+		return line
+	}
+
+	function loadJournal(journal, query, done){
+		$.ajax({
+			method: "GET",
+			url: journal.data('url'),
+			data: query,
+			success: done,
+			error: function (){
+				createAlert('Error occured while trying to get logs.', 'danger')
+			},
+		})
+	}
+
+	if($('#journal').length){
+		let journal = $('#journal')
+		let entries = journal.find('.entries')
+		let older = $('#journal_older')
+		let first_cursor = null
+		let last_cursor = null
+
+		loadJournal(journal, {}, function (data){
+			entries.append(data['entries'].map(journalEntry))
+			first_cursor = data['first_cursor']
+			last_cursor = data['last_cursor']
+			older.toggleClass('d-none', !data['has_more'])
+		})
+
+		older.click(function (){
+			loadJournal(journal, {before: first_cursor}, function (data){
+				entries.prepend(data['entries'].map(journalEntry))
+				first_cursor = data['first_cursor'] || first_cursor
+				older.toggleClass('d-none', !data['has_more'])
+			})
+		})
+
+		setInterval(function (){
+			if (!last_cursor){
+				return
+			}
+			loadJournal(journal, {after: last_cursor}, function (data){
+				entries.append(data['entries'].map(journalEntry))
+				last_cursor = data['last_cursor'] || last_cursor
+			})
+		}, 10000)
 	}
 
 	function submitAddSubdomainForm(e) {
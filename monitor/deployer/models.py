@@ -134,7 +134,8 @@ class BaseApp(ModelChangeFunc):
             host=self.server.ip_address,
             username=self.server.username,
             password=self.server.password,
-            web_server=self.server.web_server
+            web_server=self.server.web_server,
+            pool_key=self.server.get_pool_key()
         )
 
     def get_app_process(self) -> AppProcess:
@@ -189,7 +190,8 @@ class ReactApp(BaseApp):
             host=self.server.ip_address,
             username=self.server.username,
             password=self.server.password,
-            web_server=self.server.web_server
+            web_server=self.server.web_server,
+            pool_key=self.server.get_pool_key()
         )
 
     def run_pull(self):
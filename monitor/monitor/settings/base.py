@@ -128,6 +128,12 @@ STATICFILES_DIRS = [
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = '/media/'
 
+# Parsed access log records of every website
+LOG_STORE_ROOT = os.path.join(BASE_DIR, "log_store")
+
+# Local copies of website logs
+LOG_MIRROR_ROOT = os.path.join(BASE_DIR, "log_mirror")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
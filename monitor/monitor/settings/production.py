@@ -72,6 +72,13 @@ LOGGING = {
 }
 
 # Register cron jobs
+# Jobs run every minute and only check what is due
 CRONJOBS = [
-    ('*/10 * * * *', 'panel.cron.recheck_websites')
-]
\ No newline at end of file
+    ('* * * * *', 'panel.cron.recheck_websites'),
+    ('* * * * *', 'panel.cron.recheck_services'),
+    ('*/5 * * * *', 'panel.cron.sync_website_logs'),
+    ('0 * * * *', 'panel.cron.prune_check_history'),
+]
+
+# Skip a run while the previous run of the same job is still going
+CRONTAB_LOCK_JOBS = True
@@ -0,0 +1,23 @@
+from .base import *
+
+# Tests keep the loggers but write no log files
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'basic': {
+            'handlers': ['null'],
+            'level': 'DEBUG',
+        },
+        'basic.error': {
+            'handlers': ['null'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+    'handlers': {
+        'null': {
+            'class': 'logging.NullHandler',
+        },
+    },
+}
@@ -1,16 +1,36 @@
 
 
 from utils.logger import *
-from services.models import Website
+from services.models import LogMirror, Service, UrlCheck, WebsiteUrl
 
 
 def recheck_websites():
-    websites = Website.objects.all()
+    # Recheck the website urls whose next check is due,
+    # checks are spread over time by the adaptive schedule
+    WebsiteUrl.recheck_due()
 
-    # Loop through all websites
-    for website in websites:
-        # Recheck status
-        website.recheck()
-    
     # Log
-    logger.debug(f'Completed running of cron job for reloading websites status.')
+    logger.debug(
+        'Completed running of cron job for reloading websites status.')
+
+
+def recheck_services():
+    # Recheck the services whose next check is due
+    Service.recheck_due()
+
+    logger.debug(
+        'Completed running of cron job for reloading services status.')
+
+
+def sync_website_logs():
+    # Copy the bytes appended to website logs since the last sync
+    copied = LogMirror.sync_all()
+
+    logger.debug(f'Completed syncing website logs, {copied} bytes copied.')
+
+
+def prune_check_history():
+    # Drop the url check samples past their retention
+    deleted = UrlCheck.prune()
+
+    logger.debug(f'Completed pruning check history, {deleted} rows deleted.')
@@ -1,7 +1,13 @@
+from datetime import date, datetime, time, timedelta
 from typing import Type
+
 from django import forms
 from utils.general import cryptor
 from utils.github import GithubClient
+from utils.journal import JournalQuery
+from utils.log_store import AccessLogStore
+from utils.logs import AccessLogAggregation, LogSearch, RemoteLog
+from utils.timeline import InvalidTimelineCursor, decode_cursor
 from utils.validators import validate_special_char
 from utils.logger import err_logger, logger  # noqa
 
@@ -82,6 +88,34 @@ class ServerCreateForm(forms.ModelForm):
         return password
 
 
+def get_time_range(from_date: date, to_date: date) -> dict:
+    """
+    Get since and until times from the start of from_date
+    to the end of to_date, for the dates that are set
+    """
+    time_range = {}
+    if from_date:
+        time_range['since'] = datetime.combine(from_date, time.min)
+    if to_date:
+        time_range['until'] = datetime.combine(
+            to_date + timedelta(days=1), time.min)
+    return time_range
+
+
+class ServiceLogForm(forms.Form):
+    service_name = forms.CharField(max_length=255)
+    from_date = forms.DateField(required=False)
+    to_date = forms.DateField(required=False)
+
+    def get_time_range(self) -> dict:
+        """
+        Get the since and until times of the dates that were set
+        """
+        return get_time_range(
+            self.cleaned_data.get('from_date'),
+            self.cleaned_data.get('to_date'))
+
+
 class GetLogForm(forms.Form):
     LOG_TYPE = (
         ('access', "Access"),
@@ -93,12 +127,38 @@ class GetLogForm(forms.Form):
     to_date = forms.DateField(required=False)
     access = forms.CharField(max_length=255, required=False)
     error = forms.CharField(max_length=255, required=False)
+    offset = forms.IntegerField(min_value=0, required=False)
+    length = forms.IntegerField(
+        min_value=1, max_value=RemoteLog.MAX_LENGTH, required=False)
+    lines = forms.IntegerField(
+        min_value=1, max_value=RemoteLog.MAX_LINES, required=False)
+
+    def get_window(self) -> dict:
+        """
+        Get the log window arguments that were set, the
+        dates are a range from the start of from_date to
+        the end of to_date
+        """
+        window = {
+            key: self.cleaned_data[key]
+            for key in ('offset', 'length', 'lines')
+            if self.cleaned_data.get(key) is not None}
+
+        window.update(get_time_range(
+            self.cleaned_data.get('from_date'),
+            self.cleaned_data.get('to_date')))
+        return window
 
     def clean(self):
         cleaned_data = super().clean()
         access = cleaned_data['access']
         error = cleaned_data['error']
         log_type = cleaned_data['log_type']
+        from_date = cleaned_data.get('from_date')
+        to_date = cleaned_data.get('to_date')
+        if from_date and to_date and from_date > to_date:
+            raise forms.ValidationError(
+                {'to_date': 'To date is before from date'})
         if log_type == 'access':
             if not access:
                 raise forms.ValidationError(
@@ -111,6 +171,135 @@ class GetLogForm(forms.Form):
         return cleaned_data
 
 
+class AccessStatsForm(forms.Form):
+    from_date = forms.DateField(required=False)
+    to_date = forms.DateField(required=False)
+    top = forms.IntegerField(
+        min_value=1, max_value=AccessLogAggregation.MAX_TOP, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_date = cleaned_data.get('from_date')
+        to_date = cleaned_data.get('to_date')
+        if from_date and to_date and from_date > to_date:
+            raise forms.ValidationError(
+                {'to_date': 'To date is before from date'})
+        return cleaned_data
+
+    def get_stats_range(self) -> dict:
+        stats_range = get_time_range(
+            self.cleaned_data.get('from_date'),
+            self.cleaned_data.get('to_date'))
+        stats_range['top'] = self.cleaned_data.get('top')
+        return stats_range
+
+
+class LogStoreQueryForm(AccessStatsForm):
+    QUERIES = (
+        ('status_by_hour', 'Status codes by hour'),
+        ('bytes_by_path', 'Bytes by path'),
+        ('response_time', 'Response time percentiles'),
+    )
+    query = forms.ChoiceField(choices=QUERIES)
+
+    def run(self, log_store: AccessLogStore):
+        """
+        Run the query on the store
+        """
+        stats_range = self.get_stats_range()
+        top = stats_range.pop('top')
+        query = self.cleaned_data['query']
+        if query == 'status_by_hour':
+            return log_store.status_by_hour(**stats_range)
+        if query == 'bytes_by_path':
+            return log_store.bytes_by_path(top=top, **stats_range)
+        return log_store.response_time_percentiles(
+            [50, 95, 99], **stats_range)
+
+
+class LogSearchForm(forms.Form):
+    pattern = forms.CharField(max_length=1024)
+    regex = forms.BooleanField(required=False)
+    ignore_case = forms.BooleanField(required=False)
+    context = forms.IntegerField(
+        min_value=0, max_value=LogSearch.MAX_CONTEXT, required=False)
+    max_matches = forms.IntegerField(
+        min_value=1, max_value=LogSearch.MAX_MATCHES, required=False)
+    log_type = forms.ChoiceField(
+        choices=GetLogForm.LOG_TYPE[:2], required=False)
+
+    def clean_pattern(self):
+        pattern = self.cleaned_data['pattern']
+        if '\n' in pattern or '\0' in pattern:
+            raise forms.ValidationError('Pattern must be one line')
+        return pattern
+
+    def get_search(self) -> LogSearch:
+        return LogSearch(
+            self.cleaned_data['pattern'],
+            regex=self.cleaned_data['regex'],
+            ignore_case=self.cleaned_data['ignore_case'],
+            context=self.cleaned_data['context'],
+            max_matches=self.cleaned_data['max_matches'])
+
+
+class JournalForm(forms.Form):
+    lines = forms.IntegerField(
+        min_value=1, max_value=JournalQuery.MAX_LINES, required=False)
+    since = forms.DateTimeField(required=False)
+    until = forms.DateTimeField(required=False)
+    before = forms.RegexField(
+        JournalQuery.CURSOR, max_length=255, required=False)
+    after = forms.RegexField(
+        JournalQuery.CURSOR, max_length=255, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('before') and cleaned_data.get('after'):
+            raise forms.ValidationError(
+                'Page before or after a cursor, not both')
+        return cleaned_data
+
+    def get_query(self) -> dict:
+        """
+        Get the journal query arguments that were set
+        """
+        return {
+            key: value for key, value in self.cleaned_data.items()
+            if value}
+
+
+class TimelineForm(forms.Form):
+    lines = forms.IntegerField(
+        min_value=1, max_value=RemoteLog.MAX_LINES, required=False)
+    since = forms.DateTimeField(required=False)
+    until = forms.DateTimeField(required=False)
+    cursor = forms.CharField(max_length=8192, required=False)
+    services = forms.CharField(max_length=1024, required=False)
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+        try:
+            return decode_cursor(cursor)
+        except InvalidTimelineCursor:
+            raise forms.ValidationError('Invalid cursor')
+
+    def clean_services(self):
+        services = self.cleaned_data['services']
+        return [name for name in services.split(',') if name]
+
+    def get_query(self) -> dict:
+        """
+        Get the timeline arguments that were set,
+        services are resolved by the view
+        """
+        return {
+            key: value for key, value in self.cleaned_data.items()
+            if value and key != 'services'}
+
+
 class GithubCreateForm(forms.ModelForm):
     class Meta:
         model = GithubAccount
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from panel.cron import recheck_services, recheck_websites
+from utils.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run website and service checks as they become due, ' \
+        'use instead of the cron jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tick', type=float, default=Scheduler.TICK_SECONDS,
+            help='Seconds between looking for due checks')
+
+    def tick(self):
+        recheck_websites()
+        recheck_services()
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(self.tick, options['tick'])
+        self.stdout.write(self.style.SUCCESS('Running checks'))
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            self.stdout.write(self.style.SUCCESS('Stopped'))
@@ -0,0 +1,36 @@
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from panel.models import Server
+
+
+class Command(BaseCommand):
+    help = 'Follow the systemd journal of every server with services ' \
+        'and update service states as they change'
+
+    def handle(self, *args, **options):
+        servers = Server.objects.filter(service__isnull=False).distinct()
+        watchers = []
+        for server in servers:
+            watcher = server.create_service_watcher()
+            on_event = watcher.on_event
+
+            def save_event(event, on_event=on_event):
+                # Watchers run for days, stale connections are dropped
+                close_old_connections()
+                on_event(event)
+
+            watcher.on_event = save_event
+            watcher.start()
+            watchers.append(watcher)
+            self.stdout.write(
+                self.style.SUCCESS(f'Watching services of {server.name}'))
+
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            for watcher in watchers:
+                watcher.stop(5)
+            self.stdout.write(self.style.SUCCESS('Stopped'))
@@ -4,13 +4,17 @@ from django.conf import settings
 from django.db import models
 from django.db.models import QuerySet
 from django.utils.text import slugify
+from services.models import Service, UrlUptime
 from utils.general import merge_querysets
 from utils.general import printt as print  # noqa
 from utils.github import GithubClient
 from utils.linode import linodeClient
 from utils.logger import err_logger, logger  # noqa
+from utils.connection_pool import connection_pool
 from utils.model_mixins import ModelChangeFunc
 from utils.process import ServerProcess
+from utils.service_watcher import ServiceWatcher, UnitEvent
+from utils.webservers import get_conf_fingerprint
 from utils.typing import DnsType
 
 # NOTE: Create custom model field for comma separated fields
@@ -52,9 +56,18 @@ class Server(ModelChangeFunc):
             host=self.ip_address,
             username=self.username,
             password=self.password,
-            web_server=self.web_server
+            web_server=self.web_server,
+            pool_key=self.get_pool_key()
         )
 
+    def get_pool_key(self):
+        """
+        Key for sharing this server connections in the
+        connection pool, unsaved servers are not pooled
+        """
+
+        return self.pk
+
     def get_process(self) -> Type[ServerProcess]:
         """
         Get a server process
@@ -76,6 +89,18 @@ class Server(ModelChangeFunc):
     def update_slug(obj):
         obj.slug_name = slugify(obj.name)
 
+    def reset_connections(obj):
+        """
+        Drop pooled connections made with old login details
+        """
+
+        if obj.get_pool_key() is not None:
+            connection_pool.discard(obj.get_pool_key())
+
+    def update_host(obj):
+        obj.update_slug()
+        obj.reset_connections()
+
     def update_server_details(self):
         self.server_os_name = self.get_connected_process().get_server_name()
         self.server_os_version = self.get_connected_process()\
@@ -85,7 +110,9 @@ class Server(ModelChangeFunc):
 
     monitor_change = {
         'name': update_slug,
-        'ip_address': update_slug,
+        'ip_address': update_host,
+        'username': reset_connections,
+        'password': reset_connections,
     }
 
     def __str__(self) -> str:
@@ -97,9 +124,55 @@ class Server(ModelChangeFunc):
         under this server
         """
 
-        websites = self.website_set.all()
-        for website in websites:
-            website.recheck()
+        self.website_set.model.recheck_websites(self.website_set.all())
+
+    def recheck_services(self):
+        """
+        Recheck the status of the services
+        under this server
+        """
+
+        self.service_set.model.recheck_services(self.service_set.all())
+
+    def create_service_watcher(self) -> ServiceWatcher:
+        """
+        Create a watcher updating the services of this
+        server as their systemd state changes
+        """
+
+        processes: List[ServerProcess] = []
+
+        def connect():
+            # Reconnects start from a new connection
+            while processes:
+                processes.pop().destroy()
+            process = self.create_process()
+            process.create_client()
+            processes.append(process)
+            return process.get_client()
+
+        def on_event(event: UnitEvent):
+            Service.apply_unit_event(self.service_set.all(), event)
+
+        return ServiceWatcher(
+            self.slug_name, connect, self.recheck_services, on_event)
+
+    def get_uptime(self, days: int = 30) -> float:
+        """
+        Get the uptime percentage of all website urls
+        under this server, None if they were never checked
+        """
+
+        return UrlUptime.get_uptime(days, url__website__server=self)
+
+    def get_latency_percentiles(self, days: int = 30) -> Dict[str, int]:
+        """
+        Get the p50, p95 and p99 latency of all website
+        urls under this server in milliseconds
+        """
+
+        return UrlUptime.get_latency_percentiles(
+            days, url__website__server=self)
 
     def get_home_directory(self):
         """
@@ -129,8 +202,103 @@ class Server(ModelChangeFunc):
         :rtype: dict
         """
 
-        client = self.get_connected_process()
-        return client.parse_website_data(data)
+        # Parsing needs no connection
+        return self.get_process().parse_website_data(data)
+
+    def save_website(self, data: Dict[str, str]):
+        """
+        Create or update a website from parsed configuration
+        data and reconcile its urls
+        """
+
+        clean_data = self.parse_website_data(data)
+        current_urls = clean_data.pop('urls')
+
+        website, _ = self.website_set.update_or_create(
+            conf_filename=clean_data['conf_filename'],
+            defaults=clean_data)
+
+        website_urls = website.websiteurl_set.all()
+
+        for site in website_urls:
+            if site.url not in current_urls:
+                site.delete()
+            else:
+                current_urls.remove(site.url)
+
+        for url in current_urls:
+            website.websiteurl_set.create(url=url)
+
+    def update_websites(self) -> Dict[str, int]:
+        """
+        Sync websites with the enabled web server configurations.
+
+        The stat listing with checksums is fetched first, with the
+        stats of the files included by the known websites. Only new
+        files and files that changed or whose included files changed
+        are downloaded and parsed, websites of removed files are
+        deleted and unchanged ones are not written
+
+        :return: Count of created or updated, removed and unchanged
+        :rtype: Dict[str, int]
+        """
+
+        process = self.get_connected_process()
+        web_server = process.web_server
+
+        listing = {
+            conf_file.name: conf_file
+            for conf_file in process.iter_enabled_files(
+                content=False, checksum=True)
+            if web_server.clean_conf_filenames([conf_file.name])}
+
+        websites = {
+            website.conf_filename: website
+            for website in self.website_set.all()}
+
+        patterns = sorted({
+            pattern for website in websites.values()
+            for pattern in website.get_conf_includes()})
+        includes = process.fetch_includes(
+            patterns, content=False) if patterns else {}
+
+        changed = []
+        touched = []
+        for name, conf_file in listing.items():
+            website = websites.get(name)
+            fingerprint = website and get_conf_fingerprint(
+                conf_file.checksum, {
+                    pattern: includes.get(pattern, [])
+                    for pattern in website.get_conf_includes()})
+            if website is None or website.conf_hash != fingerprint:
+                changed.append(conf_file.path)
+            elif website.conf_mtime != conf_file.mtime:
+                website.conf_mtime = conf_file.mtime
+                touched.append(website)
+
+        removed = [
+            website.pk for name, website in websites.items()
+            if name not in listing]
+
+        if changed:
+            files = process.iter_files(changed, checksum=True)
+            site_details = web_server.iter_site_details(
+                files, process.fetch_includes)
+            for data in site_details:
+                self.save_website(data)
+
+        if touched:
+            self.website_set.model.objects.bulk_update(
+                touched, ['conf_mtime'])
+
+        if removed:
+            self.website_set.filter(pk__in=removed).delete()
+
+        return {
+            'changed': len(changed),
+            'removed': len(removed),
+            'unchanged': len(listing) - len(changed),
+        }
 
     def save(self, *args, **kwargs):
         if not self.server_os_name:
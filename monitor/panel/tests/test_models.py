@@ -0,0 +1,454 @@
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from panel.forms import TimelineForm
+from panel.models import Server
+from services.models import (LogMirror, Service, UrlCheck, UrlUptime,
+                             WebsiteUrl)
+from utils.general import cryptor
+from utils.health import CheckResult
+from utils.journal import JournalEntry, JournalPage
+from utils.log_store import np
+from utils.logs import LogBytes
+from utils.process import ServerProcess, UnitState
+from utils.remote_script import RemoteFile
+from utils.service_watcher import UnitEvent
+
+
+CONF = """
+server {
+    listen 80;
+    server_name example.com www.example.com;
+    access_log /var/log/nginx/example.log;
+    error_log /var/log/nginx/example.error.log;
+}
+"""
+
+
+def make_server() -> Server:
+    return Server.objects.create(
+        ip_address='127.0.0.1', web_server='nginx', name='Main',
+        server_os_name='Ubuntu', username='main',
+        password=cryptor.encrypt('test1234'))
+
+
+def make_process(listing: list, contents: dict) -> ServerProcess:
+    process = ServerProcess(
+        host='127.0.0.1', username='main',
+        password=cryptor.encrypt('test1234'), web_server='nginx')
+    process.iter_enabled_files = mock.Mock(return_value=iter(listing))
+    process.iter_files = mock.Mock(side_effect=lambda paths, **kwargs: iter([
+        remote_file for path in paths for remote_file in contents.values()
+        if fnmatchcase(remote_file.path, path)]))
+    return process
+
+
+@pytest.mark.django_db
+def test_update_websites_only_fetches_changes():
+    server = make_server()
+    path = '/etc/nginx/sites-enabled/example.conf'
+    stat = RemoteFile(path, 100, 1, 10, checksum='abc')
+    contents = {path: stat._replace(content=CONF)}
+
+    process = make_process([stat], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        computed = server.update_websites()
+
+    assert computed == {'changed': 1, 'removed': 0, 'unchanged': 0}
+    website = server.website_set.get()
+    assert website.conf_hash == 'abc'
+    assert website.conf_mtime == 100
+    assert website.access_log == '/var/log/nginx/example.log'
+    assert sorted(website.websiteurl_set.values_list('url', flat=True)) == [
+        'example.com', 'www.example.com']
+
+    # Same checksum with a new mtime only updates the mtime
+    process = make_process([stat._replace(mtime=200)], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        computed = server.update_websites()
+
+    assert computed == {'changed': 0, 'removed': 0, 'unchanged': 1}
+    process.iter_files.assert_not_called()
+    assert server.website_set.get().conf_mtime == 200
+
+    # Removed configuration files delete their websites
+    process = make_process([], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        computed = server.update_websites()
+
+    assert computed == {'changed': 0, 'removed': 1, 'unchanged': 0}
+    assert not server.website_set.exists()
+
+
+@pytest.mark.django_db
+def test_update_websites_notices_changed_includes():
+    server = make_server()
+    path = '/etc/nginx/sites-enabled/example.conf'
+    snippet = '/etc/nginx/snippets/logs.conf'
+    stat = RemoteFile(path, 100, 1, 10, checksum='abc')
+    conf = CONF.replace(
+        'listen 80;', 'listen 80;\n    include snippets/*.conf;')
+    contents = {
+        path: stat._replace(content=conf),
+        snippet: RemoteFile(
+            snippet, 100, 2, 10, 'access_log /var/log/nginx/one.log;'),
+    }
+
+    process = make_process([stat], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        server.update_websites()
+    website = server.website_set.get()
+    assert website.get_conf_includes() == ['/etc/nginx/snippets/*.conf']
+    assert website.conf_hash != 'abc'
+
+    # Unchanged includes keep the website
+    process = make_process([stat], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        computed = server.update_websites()
+    assert computed['unchanged'] == 1
+
+    # An edited include parses the configuration again
+    contents[snippet] = contents[snippet]._replace(
+        mtime=200, content='access_log /var/log/nginx/two.log;')
+    process = make_process([stat], contents)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        computed = server.update_websites()
+    assert computed['changed'] == 1
+    website = server.website_set.get()
+    assert '/var/log/nginx/two.log' in (
+        website.access_log + website.other_logs)
+
+
+def make_website(server: Server, name: str, urls: list):
+    website = server.website_set.create(
+        name=name, conf_filename=f'{name}.conf',
+        conf_filepath=f'/etc/nginx/sites-enabled/{name}.conf')
+    for url in urls:
+        website.websiteurl_set.create(url=url)
+    return website
+
+
+@pytest.mark.django_db
+def test_recheck_checks_all_urls_in_one_batch():
+    server = make_server()
+    make_website(server, 'one', ['one.com', 'www.one.com'])
+    make_website(server, 'two', ['two.com'])
+    states = {
+        'http://one.com': False,
+        'http://www.one.com': True,
+        'http://two.com': False,
+    }
+
+    with mock.patch(
+        'services.models.check_websites',
+        side_effect=lambda targets: [
+            CheckResult(target.url, states[target.url], 200, 0.1)
+            for target in targets]
+    ) as get_states:
+        server.recheck()
+
+    get_states.assert_called_once()
+    computed = {
+        website.name: website.active for website in server.website_set.all()}
+    assert computed == {'one': True, 'two': False}
+    assert not server.website_set.get(name='one').websiteurl_set.get(
+        url='one.com').active
+
+
+@pytest.mark.django_db
+def test_recheck_writes_only_changes():
+    server = make_server()
+    make_website(server, 'one', ['one.com', 'www.one.com'])
+
+    def recheck_queries() -> list:
+        server.recheck()
+        with CaptureQueriesContext(connection) as context:
+            server.recheck()
+        return [query['sql'] for query in context.captured_queries]
+
+    with mock.patch(
+        'services.models.check_websites',
+        side_effect=lambda targets: [
+            CheckResult(target.url, True, 200, 0.1) for target in targets]
+    ):
+        first = recheck_queries()
+        make_website(server, 'two', ['two.com', 'www.two.com'])
+        second = recheck_queries()
+
+    # Unchanged states are not written and the query count
+    # does not grow with the number of urls
+    assert not any('SET "active"' in query for query in first + second)
+    assert len(first) == len(second)
+    assert all(
+        url.last_checked is not None
+        for url in server.website_set.get(name='two').websiteurl_set.all())
+
+
+@pytest.mark.django_db
+def test_recheck_records_history():
+    server = make_server()
+    website = make_website(server, 'one', ['one.com'])
+    # Elapsed times include the HEAD probes servers rejected
+    results = iter([
+        CheckResult('http://one.com', True, 200, 0.5, ttfb=0.1),
+        CheckResult('http://one.com', True, 200, 0.9, ttfb=0.3),
+        CheckResult('http://one.com', False, 500, 0.2, ttfb=0.2),
+        CheckResult('http://one.com', False, error='timeout'),
+    ])
+
+    with mock.patch(
+        'services.models.check_websites',
+        side_effect=lambda targets: [next(results)]
+    ):
+        for _ in range(4):
+            website.recheck()
+
+    assert UrlCheck.objects.count() == 4
+    assert list(UrlCheck.objects.order_by('pk').values_list(
+        'latency', 'ttfb')) == [
+            (500, 100), (900, 300), (200, 200), (None, None)]
+    hour = UrlUptime.objects.get(period='hour')
+    assert (hour.checks, hour.up) == (4, 2)
+    # Upper bounds of the log scale buckets of 200 and 300 ms
+    assert (hour.latency_p50, hour.latency_p95) == (215, 304)
+    assert UrlUptime.objects.get(period='day').checks == 4
+    assert website.get_uptime() == 50
+    assert server.get_uptime() == 50
+    assert server.get_latency_percentiles() == {
+        'p50': 215, 'p95': 304, 'p99': 304}
+
+
+@pytest.mark.django_db
+def test_prune_drops_expired_checks():
+    server = make_server()
+    url = make_website(server, 'one', ['one.com']).websiteurl_set.get()
+    now = datetime.now(timezone.utc)
+    result = CheckResult('http://one.com', True, 200, 0.1)
+    for age in (UrlCheck.RETENTION + timedelta(hours=1), timedelta(hours=1)):
+        UrlCheck.record([url], [result], now - age)
+
+    # Recording keeps the expired samples until the prune job runs
+    assert UrlCheck.objects.count() == 2
+    assert UrlCheck.prune() == 1
+    assert UrlCheck.objects.get().checked_at == now - timedelta(hours=1)
+
+
+@pytest.mark.django_db
+def test_recheck_due_only_checks_due_urls():
+    server = make_server()
+    website = make_website(server, 'one', ['one.com', 'www.one.com'])
+    checked = []
+
+    def check_websites(targets):
+        checked.extend(target.url for target in targets)
+        return [CheckResult(target.url, False) for target in targets]
+
+    with mock.patch(
+        'services.models.check_websites', side_effect=check_websites
+    ):
+        WebsiteUrl.recheck_due()
+        WebsiteUrl.recheck_due()
+
+    # Second run finds nothing due, failing urls retry soon
+    assert sorted(checked) == ['http://one.com', 'http://www.one.com']
+    for url in website.websiteurl_set.all():
+        assert url.current_interval == 60
+        assert url.next_check > url.last_checked
+    website.refresh_from_db()
+    assert website.active is False
+
+    website.check_interval = 7200
+    website.save()
+    url = website.websiteurl_set.first()
+    with mock.patch(
+        'services.models.check_websites', side_effect=check_websites
+    ):
+        url.recheck()
+    url.refresh_from_db()
+    assert url.current_interval == 7200
+
+
+@pytest.mark.django_db
+def test_apply_unit_event():
+    server = make_server()
+    nginx = server.service_set.create(name='Nginx', service_name='nginx')
+    server.service_set.create(name='Redis', service_name='redis')
+
+    event = UnitEvent('nginx.service', False, None)
+    Service.apply_unit_event(server.service_set.all(), event)
+
+    nginx.refresh_from_db()
+    assert nginx.active is False
+    assert nginx.last_checked is not None
+    assert server.service_set.get(service_name='redis').active is True
+
+
+@pytest.mark.django_db
+def test_recheck_services_missing_unit_is_inactive():
+    server = make_server()
+    server.service_set.create(name='Nginx', service_name='nginx')
+    server.service_set.create(name='Redis', service_name='redis')
+    process = mock.Mock()
+    process.get_units_state.return_value = {
+        'nginx': UnitState('nginx.service', 'loaded', 'active', 'running', 1)}
+
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        Service.recheck_services(server.service_set.all())
+
+    assert server.service_set.get(service_name='nginx').active is True
+    assert server.service_set.get(service_name='redis').active is False
+
+
+@pytest.mark.django_db
+def test_log_mirror_syncs_appended_bytes(settings, tmp_path):
+    settings.LOG_MIRROR_ROOT = str(tmp_path)
+    server = make_server()
+    website = make_website(server, 'example', ['http://example.com'])
+    website.access_log = ''
+    website.error_log = '/var/log/nginx/example.error.log'
+    website.other_logs = '[{"name": "debug", "location": "/tmp/debug.log"}]'
+    website.save()
+
+    logs = {
+        '/var/log/nginx/example.error.log': b'error 1\n',
+        '/tmp/debug.log': b'debug 1\n',
+    }
+    reads = []
+
+    def get_log_bytes(path, offset, length):
+        reads.append((path, offset))
+        data = logs[path]
+        return LogBytes(1, len(data), offset, data[offset:offset + length])
+
+    server_process = mock.Mock(get_log_bytes=get_log_bytes)
+    assert LogMirror.sync_website(website, server_process) == 16
+
+    logs['/tmp/debug.log'] += b'debug 2\n'
+    assert LogMirror.sync_website(website, server_process) == 8
+    assert reads[-2:] == [
+        ('/var/log/nginx/example.error.log', 8), ('/tmp/debug.log', 8)]
+
+    mirror = website.get_log_mirror('/tmp/debug.log')
+    assert mirror.offset == 16
+    assert mirror.get_store().tail(10) == ['debug 1', 'debug 2']
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+@pytest.mark.django_db
+def test_rebuild_log_store_stops_at_mirror_offset(settings, tmp_path):
+    settings.LOG_MIRROR_ROOT = str(tmp_path / 'mirror')
+    settings.LOG_STORE_ROOT = str(tmp_path / 'store')
+    server = make_server()
+    website = make_website(server, 'example', ['http://example.com'])
+    website.access_log = '/var/log/nginx/example.log'
+    website.save()
+
+    line = (
+        '1.1.1.1 - - [01/May/2022:12:00:05 +0000] '
+        '"GET /{} HTTP/1.1" 200 1\n')
+    log = {'data': line.format('a') + line.format('b')}
+
+    def get_log_bytes(path, offset, length):
+        data = log['data'].encode()
+        return LogBytes(1, len(data), offset, data[offset:offset + length])
+
+    def iter_log_lines(path, since, until, end=None):
+        return log['data'].encode()[:end].decode().splitlines()
+
+    server_process = mock.Mock(
+        get_log_bytes=get_log_bytes, iter_log_lines=iter_log_lines)
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=server_process
+    ):
+        assert website.rebuild_log_store() == 2
+
+    log['data'] += line.format('c')
+    website.get_log_mirror(website.access_log).sync(server_process)
+    assert website.get_log_store().paths.values == ['/a', '/b', '/c']
+    assert len(website.get_log_store()) == 3
+
+
+@pytest.mark.django_db
+def test_log_chunk_from_caught_up_mirror(settings, tmp_path):
+    settings.LOG_MIRROR_ROOT = str(tmp_path)
+    server = make_server()
+    website = make_website(server, 'example', ['http://example.com'])
+    website.access_log = ''
+    website.error_log = '/var/log/nginx/example.error.log'
+    website.save()
+
+    data = b'error 1\nerror 2\nerror 3\n'
+    server_process = mock.Mock(get_log_bytes=lambda path, offset, length: (
+        LogBytes(1, len(data), offset, data[offset:offset + length])))
+    LogMirror.sync_website(website, server_process)
+
+    with mock.patch.object(
+        Server, 'get_connected_process', side_effect=AssertionError
+    ):
+        chunk = website.get_log_chunk('error', lines=2)
+
+    assert chunk.lines == ['error 2', 'error 3']
+    assert (chunk.inode, chunk.start, chunk.end) == (1, 8, 24)
+    assert chunk.has_before() and not chunk.has_after()
+
+    # A mirror behind the remote log is not used
+    website.log_mirrors.update(size=100)
+    assert website.get_log_mirror(website.error_log) is None
+
+
+@pytest.mark.django_db
+def test_timeline_compares_times_in_utc(settings, tmp_path):
+    settings.LOG_MIRROR_ROOT = str(tmp_path)
+    server = make_server()
+    nginx = server.service_set.create(name='Nginx', service_name='nginx')
+    website = make_website(server, 'example', ['http://example.com'])
+    website.access_log = ''
+    website.error_log = '/var/log/nginx/example.error.log'
+    website.save()
+
+    # Server local time is UTC+2
+    data = (
+        b'2022/05/01 13:30:00 [error] before\n'
+        b'2022/05/01 14:30:00 [error] after\n')
+    process = make_process([], {})
+    process.get_timezone = mock.Mock(
+        return_value=timezone(timedelta(hours=2)))
+    process.get_log_bytes = lambda path, offset, length: LogBytes(
+        1, len(data), offset, data[offset:offset + length])
+    process.get_journal_page = mock.Mock(return_value=JournalPage([
+        JournalEntry('c1', datetime(2022, 5, 1, 12, tzinfo=timezone.utc),
+                     'started')], False))
+    LogMirror.sync_website(website, process)
+
+    form = TimelineForm({
+        'since': '2022-05-01 12:00', 'until': '2022-05-01 13:00',
+        'services': 'nginx'})
+    assert form.is_valid()
+    with mock.patch.object(
+        Server, 'get_connected_process', return_value=process
+    ):
+        page = website.get_timeline([nginx], **form.get_query())
+
+    assert [line.line for line in page.lines] == [
+        'started', '2022/05/01 14:30:00 [error] after']
+    assert page.lines[1].time == datetime(
+        2022, 5, 1, 12, 30, tzinfo=timezone.utc)
@@ -1,6 +1,10 @@
+from datetime import datetime
+from unittest import mock
+
 import pytest
 
 from django.urls import reverse
+from services.models import Service
 
 
 @pytest.mark.django_db
@@ -8,3 +12,25 @@ def test_view(client):
     url = reverse('account:login')
     response = client.get(url)
     assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_service_logs_date_range(client, django_user_model):
+    user = django_user_model.objects.create_user('main', password='pass')
+    client.force_login(user)
+    Service.objects.create(name='Nginx', service_name='nginx')
+
+    with mock.patch.object(
+        Service, 'get_logs', return_value=['line']
+    ) as get_logs:
+        response = client.post(reverse('panel:get_logs'), {
+            'service_name': 'nginx', 'from_date': '2022-05-01',
+            'to_date': '2022-05-02'})
+
+    assert response.json() == {'lines': ['line']}
+    get_logs.assert_called_once_with(
+        since=datetime(2022, 5, 1), until=datetime(2022, 5, 3))
+
+    response = client.post(
+        reverse('panel:get_logs'), {'service_name': 'nginx', 'to_date': 'x'})
+    assert response.status_code == 400
@@ -22,6 +22,9 @@ urlpatterns = [
     path(
         'server/websites/recheck/<str:slug_name>/',
         views.recheck_server_websites, name='websites_recheck'),
+    path(
+        'server/services/recheck/<str:slug_name>/',
+        views.recheck_server_services, name='services_recheck'),
 
     path(
         'services/<str:service_name>/',
@@ -30,6 +33,12 @@ urlpatterns = [
         'service/stat/<str:service_name>/',
         views.recheck_service_status, name='recheck_service'),
     path('service/logs/', views.get_logs_view, name='get_logs'),
+    path(
+        'service/journal/<str:service_name>/',
+        views.get_service_journal, name='service_journal'),
+    path(
+        'service/logs/search/<str:service_name>/',
+        views.search_service_logs, name='search_service_logs'),
 
     path(
         'server/<str:server_name>/websites/<str:conf_filename>/',
@@ -40,6 +49,24 @@ urlpatterns = [
     path(
         'website/logs/<str:conf_filename>/',
         views.get_websites_logs_view, name='get_log_website'),
+    path(
+        'website/logs/search/<str:conf_filename>/',
+        views.search_website_logs, name='search_website_logs'),
+    path(
+        'website/logs/stats/<str:conf_filename>/',
+        views.get_website_access_stats, name='website_access_stats'),
+    path(
+        'website/logs/store/<str:conf_filename>/',
+        views.query_website_log_store, name='website_log_store'),
+    path(
+        'website/logs/store/rebuild/<str:conf_filename>/',
+        views.rebuild_website_log_store, name='rebuild_website_log_store'),
+    path(
+        'website/logs/sync/<str:conf_filename>/',
+        views.sync_website_logs, name='sync_website_logs'),
+    path(
+        'website/logs/timeline/<str:conf_filename>/',
+        views.get_website_timeline, name='website_timeline'),
 
     path('domain/', views.DomainList.as_view(), name='domain-list'),
     path(
@@ -1,4 +1,5 @@
 import json
+import re
 import threading
 import time  # noqa
 from typing import Dict, List, Type, Union  # noqa
@@ -10,15 +11,19 @@ from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views import generic
 from django.views.decorators.csrf import csrf_exempt
-from services.models import Service, Website, WebsiteUrl
+from services.models import Service, Website
 from utils.general import get_required_data, is_ajax, refactor_errors
 from utils.github import GithubClient
+from utils.log_store import LogStoreUnavailable
 from utils.logger import err_logger, logger  # noqa
 from utils.mixins import GetServer, DnsUtilityMixin
+from utils.paramiko_wrapper import ExcecuteError
 from utils.typing import DnsType
 
-from .forms import (GetLogForm, GithubAccountUserUpdateForm, GithubCreateForm,
-                    GithubUpdateForm, SubdomainForm, DeleteSubdomainForm)
+from .forms import (AccessStatsForm, GetLogForm, GithubAccountUserUpdateForm,
+                    GithubCreateForm, GithubUpdateForm, JournalForm,
+                    LogSearchForm, LogStoreQueryForm, ServiceLogForm,
+                    SubdomainForm, DeleteSubdomainForm, TimelineForm)
 from .models import (Domain, GithubAccount, Repository, RepositoryUser, Server,
                      Subdomain)
 
@@ -164,36 +169,32 @@ def recheck_server_websites(request, slug_name: str):
         'panel:server_page', kwargs={'slug_name': slug_name}))
 
 
-def update_server_websites(request, slug_name):
+def recheck_server_services(request, slug_name: str):
     """
-    Create, delete or updates enabled websites
+    Recheck services on server
 
+    :param slug_name: Server instance slug name
+    :type slug_name: str
     :return: redirect to server dashboard page
     """
 
     server = get_object_or_404(Server, slug_name=slug_name)
-    websites = server.get_enabled_sites()
-
-    for data in websites:
-        clean_data = server.parse_website_data(data)
+    server.recheck_services()
 
-        current_urls = clean_data.pop('urls')
+    messages.success(request, 'Services are all rechecked')
+    return redirect(reverse(
+        'panel:server_page', kwargs={'slug_name': slug_name}))
 
-        website, _ = Website.objects.update_or_create(
-            server=server,
-            conf_filename=clean_data['conf_filename'],
-            defaults=clean_data)
 
-        website_urls = website.websiteurl_set.all()
+def update_server_websites(request, slug_name):
+    """
+    Create, delete or updates enabled websites
 
-        for site in website_urls:
-            if site.url not in current_urls:
-                site.delete()
-            else:
-                current_urls.remove(site.url)
+    :return: redirect to server dashboard page
+    """
 
-        for url in current_urls:
-            WebsiteUrl.objects.create(url=url, website=website)
+    server = get_object_or_404(Server, slug_name=slug_name)
+    server.update_websites()
 
     messages.success(request, 'Website list successfully updated')
     return redirect(
@@ -251,19 +252,59 @@ def recheck_service_status(request, service_name):
     return redirect(obj.get_absolute_url())
 
 
+def get_service_journal(request, service_name):
+    """
+    Get one page of a service journal as json, the last
+    entries by default, older entries with before and
+    new entries with after
+    """
+
+    obj = get_object_or_404(Service, service_name=service_name)
+    form = JournalForm(request.GET)
+
+    if form.is_valid():
+        page = obj.get_journal_page(**form.get_query())
+        return JsonResponse(data=page.to_dict(), status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
+def search_service_logs(request, service_name):
+    """
+    Search the journal of a service on its server,
+    only the matching lines are returned
+    """
+
+    obj = get_object_or_404(Service, service_name=service_name)
+    form = LogSearchForm(request.GET)
+
+    if form.is_valid():
+        try:
+            result = obj.search_logs(form.get_search())
+        except ExcecuteError:
+            return JsonResponse(
+                data={'errors': {'pattern': ['Search failed']}}, status=400)
+        return JsonResponse(data=result.to_dict(), status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
 def get_logs_view(request):
 
     if request.POST:
-        service_name = request.POST.get('service_name')
+        form = ServiceLogForm(request.POST)
 
-        obj = get_object_or_404(Service, service_name=service_name)
+        if form.is_valid():
+            obj = get_object_or_404(
+                Service, service_name=form.cleaned_data['service_name'])
 
-        # Get the service logs
-        data = {
-            'log': obj.get_logs()
-        }
+            # Get the last service log lines of the date range
+            data = {
+                'lines': obj.get_logs(**form.get_time_range())
+            }
+            return JsonResponse(data=data, status=200)
 
-        return JsonResponse(data=data, status=200)
+        return JsonResponse(data={'errors': form.errors}, status=400)
 
     messages.warning(request, 'Page does not exist')
     return redirect('panel:dashboard')
@@ -292,9 +333,13 @@ def get_websites_logs_view(request, conf_filename):
         if form.is_valid():
             # Get log_type
             log_type = form.cleaned_data.get('log_type')
-            data = {
-                'log': obj.get_logs(log_type)
-            }
+            try:
+                chunk = obj.get_log_chunk(log_type, **form.get_window())
+            except (ExcecuteError, ValueError):
+                return JsonResponse(
+                    data={'errors': {'log_type': ['Log is not available']}},
+                    status=400)
+            data = chunk.to_window() if chunk else {'lines': []}
             return JsonResponse(data=data, status=200)
 
         errors = form.errors
@@ -308,6 +353,121 @@ def get_websites_logs_view(request, conf_filename):
         'panel:server_page', kwargs={'slug_name': obj.server.slug_name}))
 
 
+def get_website_access_stats(request, conf_filename):
+    """
+    Get requests per minute, status codes and the top paths
+    and ips of a website access log, aggregated on its server
+    """
+
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+    form = AccessStatsForm(request.GET)
+
+    if form.is_valid():
+        stats = obj.get_access_stats(**form.get_stats_range())
+        if stats is None:
+            return JsonResponse(
+                data={'errors': {'__all__': ['Access log is not available']}},
+                status=400)
+        return JsonResponse(data=stats.to_dict(), status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
+def query_website_log_store(request, conf_filename):
+    """
+    Query the local store of parsed access log records
+    of a website, see Website.rebuild_log_store
+    """
+
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+    form = LogStoreQueryForm(request.GET)
+
+    if form.is_valid():
+        try:
+            log_store = obj.get_log_store()
+        except LogStoreUnavailable:
+            return JsonResponse(
+                data={'errors': {'__all__': ['numpy is not installed']}},
+                status=400)
+        return JsonResponse(
+            data={'result': form.run(log_store), 'records': len(log_store)},
+            status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
+def sync_website_logs(request, conf_filename):
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+
+    copied = obj.sync_logs()
+    messages.success(
+        request, f"{obj.name} logs are synced, {copied} bytes copied")
+    return redirect(obj.get_absolute_url())
+
+
+def rebuild_website_log_store(request, conf_filename):
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+
+    try:
+        records = obj.rebuild_log_store()
+    except LogStoreUnavailable:
+        messages.warning(request, 'Install numpy to store access logs')
+    else:
+        messages.success(
+            request, f"{records} access log records of {obj.name} are stored")
+    return redirect(obj.get_absolute_url())
+
+
+def search_website_logs(request, conf_filename):
+    """
+    Search the access or error log of a website on
+    its server, only the matching lines are returned
+    """
+
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+    form = LogSearchForm(request.GET)
+
+    if form.is_valid():
+        log_type = form.cleaned_data['log_type'] or 'access'
+        try:
+            result = obj.search_logs(log_type, form.get_search())
+        except (ExcecuteError, re.error):
+            return JsonResponse(
+                data={'errors': {'pattern': ['Search failed']}}, status=400)
+        if result is None:
+            return JsonResponse(
+                data={'errors': {'log_type': ['Log is not available']}},
+                status=400)
+        return JsonResponse(data=result.to_dict(), status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
+def get_website_timeline(request, conf_filename):
+    """
+    Get one page of the website logs and the journal of the
+    given services merged in time order, the next page is
+    read with the returned cursor
+    """
+
+    obj = get_object_or_404(Website, conf_filename=conf_filename)
+    form = TimelineForm(request.GET)
+
+    if form.is_valid():
+        services = Service.objects.filter(
+            server=obj.server,
+            service_name__in=form.cleaned_data['services'])
+        try:
+            page = obj.get_timeline(services, **form.get_query())
+        except (ExcecuteError, ValueError):
+            return JsonResponse(
+                data={'errors': {'cursor': ['Logs could not be read']}},
+                status=400)
+        return JsonResponse(data=page.to_dict(), status=200)
+
+    return JsonResponse(data={'errors': form.errors}, status=400)
+
+
 class DomainList(LoginRequiredMixin, GetServer, generic.ListView):
     select_server_redirect = False
     template_name = 'panel/domains.html'
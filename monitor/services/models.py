@@ -3,15 +3,36 @@ Models for services and websites
 """
 
 
-from typing import Type
-from django.db import models
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Tuple, Type
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.urls import reverse
 from django.utils import timezone
-from utils.general import get_website_state
+from utils.general import check_websites
+from utils.health import CheckResult, CheckTarget
+from utils.histogram import LatencyHistogram
+from utils.journal import JournalPage
+from utils.log_mirror import SegmentStore, SyncResult, sync_log
+from utils.log_store import AccessLogStore, LogStoreUnavailable
+from utils.logger import err_logger
+from utils.logs import (AccessStats, LogBytes, LogChunk, LogSearch,
+                        LogSearchResult, RemoteLog)
 from utils.process import ServerProcess
+from utils.service_watcher import UnitEvent, get_unit_name
+from utils.timeline import (LogSource, MirrorLogSource, TimelinePage,
+                            merge_timeline)
+from utils.model_mixins import CheckStateMixin, ScheduledCheck
+from utils.validators import validate_status_codes
 
 
-class Service(models.Model):
+class Service(CheckStateMixin, ScheduledCheck):
     """
     Service model for services on server
 
@@ -50,17 +71,90 @@ class Service(models.Model):
         """
         Check the status of this service
         """
+        Service.recheck_services([self])
+
+    @classmethod
+    def recheck_services(cls, services: Iterable['Service']):
+        """
+        Check many services, the state of all services of
+        a server is read with one command and the results
+        are written in bulk
+
+        :param services: Services to check
+        :type services: Iterable[Service]
+        """
+        by_server: Dict[int, List[Service]] = {}
+        for service in services:
+            by_server.setdefault(service.server_id, []).append(service)
+
+        checked, states = [], []
+        for server_services in by_server.values():
+            server_process = server_services[0].connected_server_process()
+            units = server_process.get_units_state(
+                [service.service_name for service in server_services])
+            for service in server_services:
+                # A unit missing from the output is taken as inactive
+                unit = units.get(service.service_name)
+                checked.append(service)
+                states.append(unit is not None and unit.is_active)
+
+        checked_at = timezone.now()
+        with transaction.atomic():
+            changed = Service.save_states(checked, states)
+            Service.schedule_checks(checked, changed, checked_at)
+
+    @classmethod
+    def apply_unit_event(
+        cls, services: Iterable['Service'], event: UnitEvent
+    ):
+        """
+        Save a unit state change read from the journal
+        for the services of that unit
+        """
+        matched = [
+            service for service in services
+            if get_unit_name(service.service_name) == event.unit]
+        if matched:
+            cls.save_states(matched, [event.active] * len(matched))
+
+    @classmethod
+    def recheck_due(cls):
+        """
+        Check the services whose next check is due
+        """
+        services = cls.get_due().filter(server__isnull=False)\
+            .select_related('server')
+        cls.recheck_services(services)
+
+    def get_logs(self, since: datetime = None, until: datetime = None):
+        """
+        Get the last logs for this service, from since to until
+        when they are set
+        """
         server_process = self.connected_server_process()
-        self.active = server_process.get_active_state(self.service_name)
-        self.last_checked = timezone.now()
-        self.save()
+        return server_process.get_service_logs(
+            self.service_name, since, until)
+
+    def search_logs(self, search: LogSearch) -> LogSearchResult:
+        """
+        Search the journal of this service on its server
 
-    def get_logs(self):
+        :param search: Search to run
+        :type search: LogSearch
+        :rtype: LogSearchResult
         """
-        Get the logs for this service
+        server_process = self.connected_server_process()
+        return server_process.search_service_logs(self.service_name, search)
+
+    def get_journal_page(self, **query) -> JournalPage:
+        """
+        Get one page of journal entries for this service
+
+        :param query: lines, since, until, before or after cursor
+        :rtype: JournalPage
         """
         server_process = self.connected_server_process()
-        return server_process.get_service_logs(self.service_name)
+        return server_process.get_journal_page(self.service_name, **query)
 
     def get_version(self):
         """
@@ -92,7 +186,7 @@ class Service(models.Model):
         return reverse('panel:service', args=[self.service_name])
 
 
-class Website(models.Model):
+class Website(CheckStateMixin, models.Model):
     """
     Website model to store website configurations gotten from
     servers
@@ -115,6 +209,15 @@ class Website(models.Model):
     :type active: bool
     :param last_checked: last time website was checked for activeness
     :type last_checked: datetime
+    :param conf_hash: sha1 of the configuration file when it was parsed
+    :type conf_hash: str
+    :param conf_mtime: mtime of the configuration file when it was parsed
+    :type conf_mtime: int
+    :param conf_includes: Include patterns the configuration used, in json
+    :type conf_includes: str
+    :param check_interval: Seconds between checks of the website urls,
+    empty to adapt it to the url health
+    :type check_interval: int
     """
 
     server = models.ForeignKey(
@@ -135,6 +238,16 @@ class Website(models.Model):
     active = models.BooleanField(default=False)
     last_checked = models.DateTimeField(null=True, blank=True, editable=False)
 
+    # Configuration file sha1 and mtime when it was last parsed,
+    # unchanged files are skipped on refresh
+    conf_hash = models.CharField(max_length=40, blank=True, editable=False)
+    conf_mtime = models.IntegerField(null=True, blank=True, editable=False)
+    conf_includes = models.TextField(blank=True, editable=False)
+
+    check_interval = models.PositiveIntegerField(null=True, blank=True)
+
+    TIMELINE_PERIOD = timedelta(hours=1)
+
     def __str__(self) -> str:
         return self.name
 
@@ -160,33 +273,139 @@ class Website(models.Model):
         """
         return self.error_log
 
+    def get_other_logs(self) -> List[str]:
+        """
+        Get the other log paths of the website configuration
+        """
+        try:
+            other_logs = json.loads(self.other_logs or '[]')
+        except ValueError:
+            return []
+        return [log['location'] for log in other_logs if log.get('location')]
+
+    def get_log_files(self) -> List[str]:
+        """
+        Get every log path of the website, without duplicates
+        """
+        paths = [self.get_access_log(), self.get_error_log()]
+        paths += self.get_other_logs()
+        return list(dict.fromkeys(path for path in paths if path))
+
+    def get_log_mirror(self, log_path: str) -> 'LogMirror':
+        """
+        Get the local copy of a log, None until a sync
+        copied the log up to its end
+        """
+        return self.log_mirrors.filter(
+            path=log_path, synced_at__isnull=False,
+            offset__gte=F('size')).first()
+
+    def sync_logs(self) -> int:
+        """
+        Copy the bytes appended to the website logs since
+        the last sync
+
+        :return: Bytes copied
+        :rtype: int
+        """
+        server_process: Type[ServerProcess]\
+            = self.server.get_connected_process()
+        try:
+            return LogMirror.sync_website(self, server_process)
+        finally:
+            server_process.destroy()
+
     def recheck(self):
         """
         Recheck the status of the website and urls
         associated with it
         """
-        urls = self.websiteurl_set.all()
-        self.active = False
-        for url in urls:
-            if url.recheck() is True:
-                self.active = True
-        self.last_checked = timezone.now()
-        self.save()
+        Website.recheck_websites([self])
+
+    @classmethod
+    def recheck_websites(cls, websites: Iterable['Website']):
+        """
+        Recheck many websites together, all their urls
+        are checked concurrently in one batch and the results
+        are written in one transaction
+
+        :param websites: Websites to recheck
+        :type websites: Iterable[Website]
+        """
+        if isinstance(websites, models.QuerySet):
+            websites = websites.prefetch_related('websiteurl_set')
+        websites = list(websites)
+
+        urls = [
+            url for website in websites
+            for url in website.websiteurl_set.all()]
+        results = WebsiteUrl.check_urls(urls)
+        url_states = {
+            url.pk: result.active for url, result in zip(urls, results)}
+
+        website_states = [
+            any(url_states[url.pk] for url in website.websiteurl_set.all())
+            for website in websites]
+
+        with transaction.atomic():
+            WebsiteUrl.save_results(urls, results)
+            Website.save_states(websites, website_states)
+
+    @classmethod
+    def update_states(cls, website_ids: Iterable[int]):
+        """
+        Set websites active from the current state of their urls
+        """
+        websites = list(cls.objects.filter(pk__in=website_ids)
+                        .prefetch_related('websiteurl_set'))
+        cls.save_states(websites, [
+            any(url.active for url in website.websiteurl_set.all())
+            for website in websites])
+
+    def get_uptime(self, days: int = 30) -> float:
+        """
+        Get the uptime percentage of all urls of this
+        website, None if it was never checked
+
+        :param days: Number of past days, defaults to 30
+        :type days: int, optional
+        :rtype: float
+        """
+        return UrlUptime.get_uptime(days, url__website=self)
+
+    def get_latency_percentiles(self, days: int = 30) -> Dict[str, int]:
+        """
+        Get the p50, p95 and p99 latency of all urls
+        of this website in milliseconds
+        """
+        return UrlUptime.get_latency_percentiles(days, url__website=self)
+
+    def get_conf_includes(self) -> List[str]:
+        """
+        Get the include patterns of the configuration file
+        """
+        return json.loads(self.conf_includes) if self.conf_includes else []
+
+    def get_log_path(self, log_type: str) -> str:
+        if log_type == 'access':
+            return self.get_access_log()
+        return self.get_error_log()
 
-    def get_logs(self, log_type: str) -> str:
+    def get_logs(self, log_type: str) -> List[str]:
         """
-        Get the logs of the website
+        Get the last logs of the website
 
         :param log_type: Type of log to get, acces or error
         :type log_type: str
 
-        :return: Log text
-        :rtype: str
+        :return: Log lines
+        :rtype: List[str]
         """
-        if log_type == 'access':
-            log_path = self.get_access_log()
-        else:
-            log_path = self.get_error_log()
+        log_path = self.get_log_path(log_type)
+        log_mirror = self.get_log_mirror(log_path) if log_path else None
+
+        if log_mirror is not None:
+            return log_mirror.get_store().tail(RemoteLog.LINES)
 
         if log_path:
             server_process: Type[ServerProcess]\
@@ -195,6 +414,162 @@ class Website(models.Model):
             server_process.destroy()
             return content
 
+    def get_log_chunk(self, log_type: str, **window) -> LogChunk:
+        """
+        Get one window of a website log
+
+        :param log_type: Type of log to get, acces or error
+        :type log_type: str
+        :param window: offset and length, or lines, see RemoteLog
+        :return: Lines of the window, None without a log
+        :rtype: LogChunk
+        """
+        log_path = self.get_log_path(log_type)
+        log_mirror = self.get_log_mirror(log_path) if log_path else None
+
+        # Only the last lines are read from the mirror
+        if log_mirror is not None and not window.keys() & {
+                'offset', 'since', 'until'}:
+            return log_mirror.get_chunk(window.get('lines'))
+
+        if log_path:
+            server_process: Type[ServerProcess]\
+                = self.server.get_connected_process()
+            chunk = server_process.get_log_chunk(
+                log_path, rotated=True, **window)
+            server_process.destroy()
+            return chunk
+
+    def get_log_store(self) -> AccessLogStore:
+        """
+        Get the local store of parsed access log records
+
+        :rtype: AccessLogStore
+        """
+        return AccessLogStore(
+            os.path.join(settings.LOG_STORE_ROOT, str(self.pk)))
+
+    def rebuild_log_store(
+        self, since: datetime = None, until: datetime = None
+    ) -> int:
+        """
+        Parse the access log time range into a new local store.
+        The log mirror appends the lines after its offset to the
+        store, so it is synced first and the range stops at its
+        offset for no line to be stored twice.
+
+        :return: Number of stored records
+        :rtype: int
+        """
+        log_store = self.get_log_store()
+        log_path = self.get_access_log()
+        if not log_path:
+            log_store.clear()
+            return 0
+
+        server_process: Type[ServerProcess]\
+            = self.server.get_connected_process()
+        try:
+            log_mirror, _ = LogMirror.objects.get_or_create(
+                website=self, path=log_path)
+            log_mirror.sync(server_process)
+            log_store.clear()
+            return log_store.append(server_process.iter_log_lines(
+                log_path, since, until, end=log_mirror.offset))
+        finally:
+            server_process.destroy()
+
+    def get_access_stats(self, **stats_range) -> AccessStats:
+        """
+        Get request aggregates of the website access log
+
+        :param stats_range: since, until and top, see
+        ServerProcess.get_access_stats
+        :return: Aggregates, None without an access log
+        :rtype: AccessStats
+        """
+        log_path = self.get_access_log()
+
+        if log_path:
+            server_process: Type[ServerProcess]\
+                = self.server.get_connected_process()
+            stats = server_process.get_access_stats(log_path, **stats_range)
+            server_process.destroy()
+            return stats
+
+    def search_logs(
+        self, log_type: str, search: LogSearch
+    ) -> LogSearchResult:
+        """
+        Search a website log on its server
+
+        :param log_type: Type of log to search, acces or error
+        :type log_type: str
+        :param search: Search to run
+        :type search: LogSearch
+        :return: Matching lines, None without a log
+        :rtype: LogSearchResult
+        """
+        log_path = self.get_log_path(log_type)
+        log_mirror = self.get_log_mirror(log_path) if log_path else None
+
+        if log_mirror is not None:
+            return search.search_lines(log_mirror.get_store().iter_lines())
+
+        if log_path:
+            server_process: Type[ServerProcess]\
+                = self.server.get_connected_process()
+            result = server_process.search_log(
+                log_path, search, rotated=True)
+            server_process.destroy()
+            return result
+
+    def get_timeline(
+        self, services: Iterable[Service] = (), since: datetime = None,
+        until: datetime = None, cursor: Dict[str, str] = None,
+        lines: int = None
+    ) -> TimelinePage:
+        """
+        Get one page of the website logs and the journal of
+        services merged in time order. Synced logs are read
+        from their local mirror. Times are compared in UTC, log
+        times are converted from the server local time.
+
+        :param services: Services of the website server
+        :type services: Iterable[Service], optional
+        :param since: Only lines from this time, defaults to
+        TIMELINE_PERIOD ago
+        :type since: datetime, optional
+        :param until: Only lines before this time, defaults to None
+        :type until: datetime, optional
+        :param cursor: Cursor of the last page, defaults to None
+        :type cursor: Dict[str, str], optional
+        :param lines: Lines of the page, defaults to None
+        :type lines: int, optional
+        :rtype: TimelinePage
+        """
+        since = since or timezone.now() - self.TIMELINE_PERIOD
+
+        server_process: Type[ServerProcess]\
+            = self.server.get_connected_process()
+        try:
+            server_tz = server_process.get_timezone()
+            sources: List[LogSource] = []
+            for log_path in self.get_log_files():
+                log_mirror = self.get_log_mirror(log_path)
+                if log_mirror is not None:
+                    sources.append(MirrorLogSource(
+                        log_path, log_mirror.get_store(), since, server_tz))
+                else:
+                    sources.append(server_process.get_timeline_source(
+                        log_path, since, server_tz))
+            for service in services:
+                sources.append(server_process.get_journal_source(
+                    service.service_name, since))
+            return merge_timeline(sources, cursor, lines, until)
+        finally:
+            server_process.destroy()
+
     def get_last_status(self) -> str:
         """
         Get the status of the website in text
@@ -215,7 +590,7 @@ class Website(models.Model):
             'panel:website', args=[self.server.slug_name, self.conf_filename])
 
 
-class WebsiteUrl(models.Model):
+class WebsiteUrl(CheckStateMixin, ScheduledCheck):
     """
     Website url model
 
@@ -227,12 +602,27 @@ class WebsiteUrl(models.Model):
     :type active: bool
     :param last_checked: Last time website was checked
     :type last_checked: datetime
+    :param check_method: Request method used by checks
+    :type check_method: str
+    :param expected_status: Comma separated status codes
+    counted as active, empty for the defaults
+    :type expected_status: str
     """
 
+    CHECK_METHODS = (
+        ('auto', 'HEAD, GET if not allowed'),
+        ('head', 'HEAD'),
+        ('get', 'GET'),
+    )
+
     website = models.ForeignKey(Website, on_delete=models.CASCADE)
     url = models.CharField(max_length=200)
     active = models.BooleanField(default=True)
     last_checked = models.DateTimeField(null=True, blank=True, editable=False)
+    check_method = models.CharField(
+        max_length=4, choices=CHECK_METHODS, default='auto')
+    expected_status = models.CharField(
+        max_length=100, blank=True, validators=[validate_status_codes])
 
     def recheck(self) -> bool:
         """
@@ -242,11 +632,95 @@ class WebsiteUrl(models.Model):
         :return: True or False for the url active status
         :rtype: bool
         """
-        self.active = get_website_state('http://' + self.url)
-        self.last_checked = timezone.now()
-        self.save()
+        WebsiteUrl.recheck_urls([self])
         return self.active
 
+    @classmethod
+    def recheck_urls(cls, urls: List['WebsiteUrl']):
+        """
+        Recheck many urls concurrently and update
+        their active status in one transaction
+
+        :param urls: Website urls to recheck
+        :type urls: List[WebsiteUrl]
+        """
+        results = WebsiteUrl.check_urls(urls)
+        with transaction.atomic():
+            WebsiteUrl.save_results(urls, results)
+
+    @classmethod
+    def recheck_due(cls):
+        """
+        Check the urls whose next check is due and update the
+        state of their websites
+        """
+        urls = list(cls.get_due().select_related('website'))
+        results = WebsiteUrl.check_urls(urls)
+        with transaction.atomic():
+            WebsiteUrl.save_results(urls, results)
+            Website.update_states({url.website_id for url in urls})
+
+    @classmethod
+    def check_urls(cls, urls: List['WebsiteUrl']) -> List[CheckResult]:
+        """
+        Check many urls concurrently, nothing is saved
+        """
+        return check_websites([url.get_check_target() for url in urls])
+
+    @classmethod
+    def save_results(
+        cls, urls: List['WebsiteUrl'], results: List[CheckResult]
+    ):
+        """
+        Save the active status and check history of urls
+        """
+        checked_at = timezone.now()
+        changed = WebsiteUrl.save_states(
+            urls, [result.active for result in results])
+        WebsiteUrl.schedule_checks(urls, changed, checked_at)
+        UrlCheck.record(urls, results, checked_at)
+        UrlUptime.record(urls, results, checked_at)
+
+    def get_uptime(self, days: int = 30) -> float:
+        """
+        Get the uptime percentage of this url,
+        None if it was never checked
+        """
+        return UrlUptime.get_uptime(days, url=self)
+
+    def get_latency_percentiles(self, days: int = 30) -> Dict[str, int]:
+        """
+        Get the p50, p95 and p99 latency of this url in milliseconds
+        """
+        return UrlUptime.get_latency_percentiles(days, url=self)
+
+    def get_interval_override(self) -> int:
+        return self.website.check_interval
+
+    def get_check_url(self) -> str:
+        """
+        Get the full url requested by checks
+        """
+        return 'http://' + self.url
+
+    def get_expected_status(self) -> Tuple[int, ...]:
+        """
+        Get the status codes counted as active,
+        None when the defaults are used
+        """
+        codes = [
+            int(code) for code in self.expected_status.split(',')
+            if code.strip()]
+        return tuple(codes) or None
+
+    def get_check_target(self) -> CheckTarget:
+        """
+        Get the check target for this url
+        """
+        return CheckTarget(
+            self.get_check_url(), self.check_method,
+            self.get_expected_status())
+
     def get_last_status(self) -> str:
         """
         Get the status of the website in text
@@ -258,3 +732,415 @@ class WebsiteUrl(models.Model):
 
     def __str__(self) -> str:
         return self.url
+
+
+class UrlCheck(models.Model):
+    """
+    One check of a website url, samples are kept for
+    RETENTION only, long term history is in UrlUptime
+
+    :param url: Website url checked
+    :type url: WebsiteUrl
+    :param checked_at: Time of the check
+    :type checked_at: datetime
+    :param status_code: Response status, None without response
+    :type status_code: int
+    :param latency: Time of the whole check in milliseconds,
+    a rejected HEAD probe included
+    :type latency: int
+    :param ttfb: Time until the response headers of the last
+    request in milliseconds
+    :type ttfb: int
+    :param active: Check result
+    :type active: bool
+    """
+
+    RETENTION = timedelta(days=2)
+
+    url = models.ForeignKey(WebsiteUrl, on_delete=models.CASCADE)
+    checked_at = models.DateTimeField(db_index=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    latency = models.PositiveIntegerField(null=True)
+    ttfb = models.PositiveIntegerField(null=True)
+    active = models.BooleanField()
+
+    class Meta:
+        indexes = [models.Index(fields=['url', 'checked_at'])]
+
+    @classmethod
+    def record(
+        cls, urls: List[WebsiteUrl], results: List[CheckResult],
+        checked_at: datetime
+    ):
+        """
+        Store check samples, expired ones are dropped by prune
+        """
+        cls.objects.bulk_create([
+            cls(
+                url=url, checked_at=checked_at,
+                status_code=result.status_code,
+                latency=get_latency(result), ttfb=get_ttfb(result),
+                active=result.active)
+            for url, result in zip(urls, results)])
+
+    @classmethod
+    def prune(cls) -> int:
+        """
+        Delete the samples older than RETENTION
+
+        :return: Number of samples deleted
+        :rtype: int
+        """
+
+        deleted, _ = cls.objects.filter(
+            checked_at__lt=timezone.now() - cls.RETENTION).delete()
+        return deleted
+
+
+class UrlUptime(models.Model):
+    """
+    Hourly or daily rollup of the checks of a website url,
+    counters are updated with every check
+
+    :param url: Website url checked
+    :type url: WebsiteUrl
+    :param period: hour or day
+    :type period: str
+    :param start: Start of the period
+    :type start: datetime
+    :param checks: Number of checks in the period
+    :type checks: int
+    :param up: Number of active checks in the period
+    :type up: int
+    :param latency_p50: Median time to first byte in milliseconds
+    :type latency_p50: int
+    :param latency_p95: 95th percentile time to first byte
+    in milliseconds
+    :type latency_p95: int
+    :param latency_histogram: Packed LatencyHistogram of the
+    times to first byte in the period
+    :type latency_histogram: bytes
+    """
+
+    PERIODS = (
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    )
+
+    url = models.ForeignKey(WebsiteUrl, on_delete=models.CASCADE)
+    period = models.CharField(max_length=4, choices=PERIODS)
+    start = models.DateTimeField()
+    checks = models.PositiveIntegerField(default=0)
+    up = models.PositiveIntegerField(default=0)
+    latency_p50 = models.PositiveIntegerField(null=True)
+    latency_p95 = models.PositiveIntegerField(null=True)
+    latency_histogram = models.BinaryField(default=bytes, editable=False)
+
+    class Meta:
+        unique_together = ('url', 'period', 'start')
+
+    def get_histogram(self) -> LatencyHistogram:
+        return LatencyHistogram.from_bytes(self.latency_histogram)
+
+    @staticmethod
+    def get_period_start(period: str, time: datetime) -> datetime:
+        start = time.replace(minute=0, second=0, microsecond=0)
+        if period == 'day':
+            start = start.replace(hour=0)
+        return start
+
+    def get_uptime_percent(self) -> float:
+        return self.up * 100 / self.checks if self.checks else None
+
+    @classmethod
+    def record(
+        cls, urls: List[WebsiteUrl], results: List[CheckResult],
+        checked_at: datetime
+    ):
+        """
+        Add check results to the rollups of the current hour and
+        day. The rollups are locked while they are updated so the
+        counters and the histogram of concurrent checks are never
+        overwritten by one another.
+        """
+        starts = {
+            period: cls.get_period_start(period, checked_at)
+            for period, _ in cls.PERIODS}
+
+        with transaction.atomic():
+            rollups = cls.get_rollups(urls, starts)
+            for url, result in zip(urls, results):
+                latency = get_ttfb(result)
+                for period in starts:
+                    rollup = rollups[url.pk, period]
+                    rollup.checks += 1
+                    rollup.up += int(result.active)
+                    if latency is None:
+                        continue
+                    histogram = rollup.get_histogram()
+                    histogram.add(latency)
+                    rollup.latency_histogram = histogram.to_bytes()
+                    rollup.latency_p50 = histogram.percentile(50)
+                    rollup.latency_p95 = histogram.percentile(95)
+
+            cls.objects.bulk_update(
+                rollups.values(),
+                ['checks', 'up', 'latency_p50', 'latency_p95',
+                 'latency_histogram'])
+
+    @classmethod
+    def get_rollups(
+        cls, urls: List[WebsiteUrl], starts: Dict[str, datetime]
+    ) -> Dict[Tuple[int, str], 'UrlUptime']:
+        """
+        Get the rollups of urls for each period start locked for
+        update, missing ones are created. Must run in a transaction.
+        """
+        query = models.Q()
+        for period, start in starts.items():
+            query |= models.Q(period=period, start=start)
+        locked = cls.objects.select_for_update().order_by('pk')
+        existing = locked.filter(query, url__in=urls)
+        rollups = {
+            (rollup.url_id, rollup.period): rollup for rollup in existing}
+
+        missing = [
+            cls(url=url, period=period, start=start)
+            for url in urls for period, start in starts.items()
+            if (url.pk, period) not in rollups]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            created = locked.filter(query, url__in=urls).exclude(
+                pk__in=[rollup.pk for rollup in rollups.values()])
+            for rollup in created:
+                rollups[rollup.url_id, rollup.period] = rollup
+
+        return rollups
+
+    @classmethod
+    def get_uptime(cls, days: int = 30, **filters) -> float:
+        """
+        Get the uptime percentage from the daily rollups
+        matching filters, None when there were no checks
+
+        :param days: Number of past days, defaults to 30
+        :type days: int, optional
+        :rtype: float
+        """
+        since = cls.get_period_start('day', timezone.now()) \
+            - timedelta(days=days - 1)
+        totals = cls.objects.filter(
+            period='day', start__gte=since, **filters).aggregate(
+                checks=Sum('checks'), up=Sum('up'))
+        if not totals['checks']:
+            return None
+        return totals['up'] * 100 / totals['checks']
+
+    @classmethod
+    def get_latency_percentiles(
+        cls, days: int = 30, percents: List[float] = (50, 95, 99),
+        **filters
+    ) -> Dict[str, int]:
+        """
+        Get latency percentiles in milliseconds by merging the
+        histograms of the daily rollups matching filters, keyed
+        p50, p95 ... and None when there were no responses
+
+        :param days: Number of past days, defaults to 30
+        :type days: int, optional
+        :param percents: Percentiles to get, defaults to (50, 95, 99)
+        :type percents: List[float], optional
+        :rtype: Dict[str, int]
+        """
+        since = cls.get_period_start('day', timezone.now()) \
+            - timedelta(days=days - 1)
+        histograms = cls.objects.filter(
+            period='day', start__gte=since, **filters)\
+            .values_list('latency_histogram', flat=True)
+        merged = LatencyHistogram.merge_all(
+            LatencyHistogram.from_bytes(data) for data in histograms)
+        return {
+            f'p{percent}': value
+            for percent, value in merged.percentiles(percents).items()}
+
+
+class LogMirror(models.Model):
+    """
+    Local copy of one website log, synced by reading only the
+    bytes appended to the remote log since the last sync
+
+    :param website: Website the log belongs to
+    :type website: Website
+    :param path: Remote log path
+    :type path: str
+    :param inode: Remote log inode on the last sync
+    :type inode: int
+    :param offset: Bytes of the remote log already copied
+    :type offset: int
+    :param size: Remote log size on the last sync
+    :type size: int
+    :param synced_at: Time of the last sync
+    :type synced_at: datetime
+    """
+
+    website = models.ForeignKey(
+        Website, on_delete=models.CASCADE, related_name='log_mirrors')
+    path = models.CharField(max_length=255)
+    inode = models.BigIntegerField(null=True, blank=True)
+    offset = models.BigIntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('website', 'path')
+
+    def __str__(self) -> str:
+        return self.path
+
+    def get_store(self) -> SegmentStore:
+        directory = hashlib.sha1(self.path.encode()).hexdigest()[:16]
+        return SegmentStore(os.path.join(
+            settings.LOG_MIRROR_ROOT, str(self.website_id), directory))
+
+    def is_synced(self) -> bool:
+        """
+        Whether the last sync copied the log up to its end
+        """
+        return self.synced_at is not None and self.offset >= self.size
+
+    def get_chunk(self, lines: int = None) -> LogChunk:
+        """
+        Get the last lines of the log like RemoteLog does, the
+        last offset bytes of the store are the live file and
+        the lines before them come from its rotated files
+
+        :param lines: Lines to get, defaults to RemoteLog.LINES
+        :type lines: int, optional
+        :rtype: LogChunk
+        """
+        remote_log = RemoteLog(self.path, lines=lines)
+        data = self.get_store().read_tail(RemoteLog.WINDOW)
+        live = data[max(len(data) - self.offset, 0):]
+        header = f'{self.inode} {self.size} {self.offset - len(live)}\n'
+        chunk = remote_log.parse(header.encode() + live)
+
+        missing = remote_log.lines - len(chunk.lines)
+        if missing > 0 and not chunk.has_before():
+            older = data[:len(data) - len(live)].splitlines()
+            chunk = chunk._replace(lines=[
+                line.decode(errors='replace') for line in older[-missing:]
+            ] + chunk.lines)
+        return chunk
+
+    def read_rotated(
+        self, server_process: ServerProcess, inode: int
+    ) -> Callable[[int, int], LogBytes]:
+        """
+        Get a callable reading the rotated file the log with
+        inode was renamed to, None when it is gone or was
+        compressed
+        """
+        for log_file in server_process.get_log_files(self.path):
+            if log_file.inode == inode and log_file.path != self.path \
+                    and not log_file.is_compressed():
+                return lambda offset, length: server_process.get_log_bytes(
+                    log_file.path, offset, length)
+
+    def sync(self, server_process: ServerProcess) -> SyncResult:
+        """
+        Copy the bytes appended to the remote log, access log
+        lines are also parsed into the website log store
+        """
+        log_store = None
+        if self.path == self.website.get_access_log():
+            try:
+                log_store = self.website.get_log_store()
+            except LogStoreUnavailable:
+                pass
+
+        def on_data(data: bytes):
+            log_store.append(data.decode(errors='replace').splitlines())
+
+        result = sync_log(
+            lambda offset, length: server_process.get_log_bytes(
+                self.path, offset, length),
+            self.get_store(), self.inode, self.offset,
+            on_data=on_data if log_store is not None else None,
+            read_rotated=lambda inode: self.read_rotated(
+                server_process, inode))
+
+        self.inode = result.inode
+        self.offset = result.offset
+        self.size = result.size
+        self.synced_at = timezone.now()
+        self.save(update_fields=['inode', 'offset', 'size', 'synced_at'])
+        return result
+
+    @classmethod
+    def sync_website(
+        cls, website: Website, server_process: ServerProcess
+    ) -> int:
+        """
+        Sync every log of a website, mirrors of logs
+        no longer in its configuration are removed
+
+        :return: Bytes copied
+        :rtype: int
+        """
+        paths = website.get_log_files()
+        for mirror in cls.objects.filter(website=website)\
+                .exclude(path__in=paths):
+            mirror.get_store().clear()
+            mirror.delete()
+
+        copied = 0
+        for path in paths:
+            mirror, _ = cls.objects.get_or_create(website=website, path=path)
+            try:
+                copied += mirror.sync(server_process).appended
+            except Exception as e:
+                err_logger.exception(e)
+        return copied
+
+    @classmethod
+    def sync_all(cls) -> int:
+        """
+        Sync the logs of every website, with one
+        connection per server
+
+        :return: Bytes copied
+        :rtype: int
+        """
+        copied = 0
+        websites = Website.objects.select_related('server')\
+            .exclude(server=None).order_by('server_id')
+        for server, server_websites in groupby(
+                websites, key=lambda website: website.server):
+            server_process = server.get_connected_process()
+            try:
+                for website in server_websites:
+                    copied += cls.sync_website(website, server_process)
+            finally:
+                server_process.destroy()
+        return copied
+
+
+def get_latency(result: CheckResult) -> int:
+    """
+    Response time of a check in milliseconds,
+    None when there was no response
+    """
+    if result.status_code is None or result.elapsed is None:
+        return None
+    return round(result.elapsed * 1000)
+
+
+def get_ttfb(result: CheckResult) -> int:
+    """
+    Time until the response headers of a check in milliseconds,
+    a rejected HEAD probe is not counted. None when there was
+    no response.
+    """
+    if result.status_code is None or result.ttfb is None:
+        return None
+    return round(result.ttfb * 1000)
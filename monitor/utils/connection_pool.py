@@ -0,0 +1,253 @@
+"""
+Module for sharing long lived ssh connections
+across requests
+"""
+
+
+import threading
+import time
+from typing import Callable, Dict, Hashable, List
+
+from utils.paramiko_wrapper import SshClient
+
+
+class PooledConnection:
+    """
+    Ssh client kept in the pool with its usage details
+    """
+
+    def __init__(self, key: Hashable, client: SshClient) -> None:
+        self.key = key
+        self.client = client
+        self.users = 0
+        self.last_used = time.monotonic()
+
+    def is_alive(self) -> bool:
+        return self.client.is_active()
+
+    def is_idle(self) -> bool:
+        return self.users == 0
+
+    def idle_time(self) -> float:
+        return time.monotonic() - self.last_used
+
+
+class ConnectionPool:
+    """
+    Process wide registry of authenticated ssh clients.
+
+    Clients are keyed by server, shared between callers (paramiko
+    transports can run many channels at once), reconnected when the
+    keepalive fails, evicted after they stay idle for too long and
+    evicted least recently used first when the pool is full.
+    """
+    IDLE_TIMEOUT = 300
+    MAX_CONNECTIONS = 32
+    MAX_PER_HOST = 1
+    KEEPALIVE = 30
+
+    def __init__(
+        self, idle_timeout: int = None, max_connections: int = None,
+        max_per_host: int = None, keepalive: int = None
+    ) -> None:
+        self.idle_timeout = idle_timeout or self.IDLE_TIMEOUT
+        self.max_connections = max_connections or self.MAX_CONNECTIONS
+        self.max_per_host = max_per_host or self.MAX_PER_HOST
+        self.keepalive = keepalive or self.KEEPALIVE
+
+        self.__lock = threading.Lock()
+        self.__connections: Dict[Hashable, List[PooledConnection]] = {}
+        self.__pending: Dict[Hashable, int] = {}
+
+    def __all_connections(self) -> List[PooledConnection]:
+        return [
+            conn for conns in self.__connections.values() for conn in conns]
+
+    def __remove(self, conn: PooledConnection):
+        conns = self.__connections.get(conn.key, [])
+        if conn in conns:
+            conns.remove(conn)
+        if not conns:
+            self.__connections.pop(conn.key, None)
+
+    def __find(self, client: SshClient) -> PooledConnection:
+        for conn in self.__all_connections():
+            if conn.client is client:
+                return conn
+
+    def __collect_stale(self, key: Hashable) -> List[PooledConnection]:
+        """
+        Remove expired idle connections and dead connections
+        for key from the pool, they are returned to be closed
+        outside the lock
+        """
+
+        stale = []
+        for conn in self.__all_connections():
+            if not conn.is_idle():
+                continue
+            if conn.idle_time() > self.idle_timeout or (
+                conn.key == key and not conn.is_alive()
+            ):
+                self.__remove(conn)
+                stale.append(conn)
+        return stale
+
+    def __collect_overflow(self) -> List[PooledConnection]:
+        """
+        Remove least recently used idle connections
+        while the pool is over its size
+        """
+
+        overflow = []
+        idle = sorted(
+            filter(PooledConnection.is_idle, self.__all_connections()),
+            key=lambda conn: conn.last_used)
+        total = len(self.__all_connections()) + sum(self.__pending.values())
+        while total > self.max_connections and idle:
+            conn = idle.pop(0)
+            self.__remove(conn)
+            overflow.append(conn)
+            total -= 1
+        return overflow
+
+    def __checkout(self, key: Hashable) -> PooledConnection:
+        """
+        Get a live connection for key that can be shared,
+        None is returned if a new connection should be created
+        """
+
+        conns = [
+            conn for conn in self.__connections.get(key, [])
+            if conn.is_alive()]
+        created = len(self.__connections.get(key, [])) \
+            + self.__pending.get(key, 0)
+        if conns:
+            conn = min(conns, key=lambda conn: conn.users)
+            if conn.is_idle() or created >= self.max_per_host:
+                return conn
+        return None
+
+    def __close(self, conns: List[PooledConnection]):
+        for conn in conns:
+            conn.client.close()
+
+    def acquire(
+        self, key: Hashable, factory: Callable[[], SshClient]
+    ) -> SshClient:
+        """
+        Get a connected client for key, factory is called
+        to connect a new client when none can be shared
+
+        :param key: Key of the server to connect to
+        :type key: Hashable
+        :param factory: Callable returning a new connected client
+        :type factory: Callable[[], SshClient]
+        :return: Connected ssh client
+        :rtype: SshClient
+        """
+
+        with self.__lock:
+            stale = self.__collect_stale(key)
+            conn = self.__checkout(key)
+            if conn is None:
+                self.__pending[key] = self.__pending.get(key, 0) + 1
+            else:
+                conn.users += 1
+                conn.last_used = time.monotonic()
+        self.__close(stale)
+
+        if conn is not None:
+            return conn.client
+
+        try:
+            client = factory()
+            client.set_keepalive(self.keepalive)
+        finally:
+            with self.__lock:
+                self.__pending[key] -= 1
+                if not self.__pending[key]:
+                    del self.__pending[key]
+
+        with self.__lock:
+            conn = PooledConnection(key, client)
+            conn.users += 1
+            self.__connections.setdefault(key, []).append(conn)
+            overflow = self.__collect_overflow()
+        self.__close(overflow)
+
+        return client
+
+    def release(self, client: SshClient):
+        """
+        Give a client back to the pool, dead clients
+        are closed and dropped from the pool
+        """
+
+        with self.__lock:
+            conn = self.__find(client)
+            if conn is None:
+                dead = True
+            else:
+                conn.users = max(conn.users - 1, 0)
+                conn.last_used = time.monotonic()
+                dead = not conn.is_alive()
+                if dead and conn.is_idle():
+                    self.__remove(conn)
+                else:
+                    dead = False
+            overflow = self.__collect_overflow()
+
+        if dead:
+            client.close()
+        self.__close(overflow)
+
+    def discard(self, key: Hashable):
+        """
+        Forget every connection for key, used when the
+        server login details change
+        """
+
+        with self.__lock:
+            conns = list(self.__connections.get(key, []))
+            for conn in conns:
+                # Busy connections are closed when they are released
+                self.__remove(conn)
+            conns = list(filter(PooledConnection.is_idle, conns))
+        self.__close(conns)
+
+    def evict_idle(self):
+        """
+        Close connections that stayed idle for longer
+        than the idle timeout
+        """
+
+        with self.__lock:
+            stale = self.__collect_stale(None)
+        self.__close(stale)
+
+    def close_all(self):
+        """
+        Close every idle connection in the pool
+        """
+
+        with self.__lock:
+            conns = list(filter(
+                PooledConnection.is_idle, self.__all_connections()))
+            for conn in conns:
+                self.__remove(conn)
+        self.__close(conns)
+
+    def count(self, key: Hashable = None) -> int:
+        """
+        Count connections in the pool, for
+        key only if it is provided
+        """
+
+        with self.__lock:
+            if key is None:
+                return len(self.__all_connections())
+            return len(self.__connections.get(key, []))
+
+
+connection_pool = ConnectionPool()
@@ -4,9 +4,8 @@ import re
 import shlex
 import socket
 import subprocess
-from typing import Dict
+from typing import Dict, List, Union
 
-import requests
 from cryptography.fernet import Fernet, InvalidToken
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
@@ -14,6 +13,7 @@ from django.core.mail import send_mail
 from django.utils.safestring import mark_safe
 from django.db.models import QuerySet
 
+from .health import CheckResult, CheckTarget, health_checker
 from .logger import err_logger, logger  # noqa
 
 
@@ -198,23 +198,43 @@ def get_website_state(website):
     this is make a request to the url provided to see
     if it is working
 
-    :param website: a url to check
-    :type website: url
+    :param website: a url or check target to check
+    :type website: Union[str, CheckTarget]
     :return: True or False depending on website response on request
     :rtype: bool
     """
 
-    try:
-        # Get the status of the website
-        resp = requests.get(website)
+    return health_checker.check(website).active
 
-        # True is response status is 200 or redirected
-        return True if resp.status_code in [200, 302, 301] else False
 
-    except Exception as e:
-        err_logger.exception(e)
+def get_websites_state(websites: List[Union[str, CheckTarget]]) -> List[bool]:
+    """
+    Get the request status of many websites, the
+    requests are made concurrently
 
-    return False
+    :param websites: urls or check targets to check
+    :type websites: List[Union[str, CheckTarget]]
+    :return: True or False for each url, in the same order
+    :rtype: List[bool]
+    """
+
+    return [result.active for result in check_websites(websites)]
+
+
+def check_websites(
+    websites: List[Union[str, CheckTarget]]
+) -> List[CheckResult]:
+    """
+    Check many websites concurrently, with
+    status codes and response times
+
+    :param websites: urls or check targets to check
+    :type websites: List[Union[str, CheckTarget]]
+    :return: Check result of each url, in the same order
+    :rtype: List[CheckResult]
+    """
+
+    return health_checker.check_all(websites)
 
 
 def get_in_dict_format(text: str):
@@ -0,0 +1,245 @@
+"""
+Module for checking website health concurrently
+"""
+
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from typing import Deque, Dict, Iterable, List, NamedTuple, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logger import err_logger
+
+
+class CheckTarget(NamedTuple):
+    """
+    Url to check with its probe method and the status
+    codes counted as active (None for the defaults)
+    """
+    url: str
+    method: str = 'auto'
+    expected_status: Tuple[int, ...] = None
+
+
+class CheckResult(NamedTuple):
+    """
+    Result of one url check, status_code is None
+    when no response was received. ttfb is the time
+    until the response headers arrived.
+    """
+    url: str
+    active: bool
+    status_code: int = None
+    elapsed: float = None
+    error: str = None
+    method: str = None
+    ttfb: float = None
+
+
+class HealthChecker:
+    """
+    Checks many urls at once on a thread pool.
+
+    Every worker thread keeps its own requests session so keep
+    alive connections are reused between checks, each check has
+    connect and read timeouts and checks running against the same
+    host are capped so one server is not flooded. The cap is kept
+    when checks are dispatched, a host waiting for a free slot
+    never holds a worker.
+
+    Urls are probed with HEAD first and with a streamed GET when
+    HEAD is not allowed. Bodies up to DRAIN_BYTES are read so the
+    connection goes back to the pool, larger ones are not
+    downloaded and their connection is closed.
+    """
+    METHOD_AUTO = 'auto'
+    METHOD_HEAD = 'head'
+    METHOD_GET = 'get'
+    # HEAD answers meaning the server does not support it
+    HEAD_REJECTED = (405, 501)
+
+    MAX_WORKERS = 32
+    MAX_PER_HOST = 4
+    CONNECT_TIMEOUT = 3.05
+    READ_TIMEOUT = 10
+    DRAIN_BYTES = 64 * 1024
+    ACTIVE_STATUS = (200, 301, 302)
+
+    def __init__(
+        self, max_workers: int = None, max_per_host: int = None,
+        connect_timeout: float = None, read_timeout: float = None
+    ) -> None:
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.max_per_host = max_per_host or self.MAX_PER_HOST
+        self.connect_timeout = connect_timeout or self.CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or self.READ_TIMEOUT
+
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__executor: ThreadPoolExecutor = None
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='health')
+            return self.__executor
+
+    def get_session(self) -> requests.Session:
+        """
+        Get the requests session of the current thread
+        """
+
+        session = getattr(self.__local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.max_per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.__local.session = session
+        return session
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def release(self, response: requests.Response):
+        """
+        Hand the response connection back to the session pool,
+        it is only reusable once the body was read so bodies
+        longer than DRAIN_BYTES close it instead
+        """
+
+        length = response.headers.get('Content-Length', '')
+        if not length.isdigit() or int(length) <= self.DRAIN_BYTES:
+            try:
+                response.raw.read(self.DRAIN_BYTES, decode_content=False)
+            except (requests.RequestException, OSError, ValueError):
+                pass
+        response.close()
+
+    def request(self, url: str, method: str) -> requests.Response:
+        """
+        Send one request, the body of the response is
+        drained or dropped and the connection released
+        """
+
+        response = self.get_session().request(
+            method.upper(), url, stream=True, allow_redirects=True,
+            timeout=(self.connect_timeout, self.read_timeout))
+        self.release(response)
+        return response
+
+    def probe(self, url: str, method: str) -> requests.Response:
+        if method != self.METHOD_AUTO:
+            return self.request(url, method)
+
+        response = self.request(url, self.METHOD_HEAD)
+        if response.status_code in self.HEAD_REJECTED:
+            response = self.request(url, self.METHOD_GET)
+        return response
+
+    def check(
+        self, url: Union[str, CheckTarget], method: str = None,
+        expected_status: Tuple[int, ...] = None
+    ) -> CheckResult:
+        """
+        Check one url, errors and timeouts make it inactive
+
+        :param url: Full url to request or a check target
+        :type url: Union[str, CheckTarget]
+        :param method: auto, head or get, defaults to auto
+        :type method: str, optional
+        :param expected_status: Status codes counted as
+        active, defaults to ACTIVE_STATUS
+        :type expected_status: Tuple[int, ...], optional
+        :rtype: CheckResult
+        """
+
+        target = url if isinstance(url, CheckTarget) else CheckTarget(url)
+        method = method or target.method or self.METHOD_AUTO
+        expected_status = expected_status or target.expected_status \
+            or self.ACTIVE_STATUS
+        url = target.url
+
+        start = time.monotonic()
+        try:
+            response = self.probe(url, method)
+        except Exception as e:
+            # Any error fails only this url, never the whole batch
+            err_logger.warning(f'Health check of {url} failed: {e}')
+            return CheckResult(
+                url, False, elapsed=time.monotonic() - start,
+                error=str(e))
+
+        return CheckResult(
+            url=url,
+            active=response.status_code in expected_status,
+            status_code=response.status_code,
+            elapsed=time.monotonic() - start,
+            method=response.request.method,
+            ttfb=response.elapsed.total_seconds())
+
+    def check_all(
+        self, urls: Iterable[Union[str, CheckTarget]]
+    ) -> List[CheckResult]:
+        """
+        Check every url concurrently, at most max_per_host checks
+        of one host run at once and the next url of a host is
+        submitted when one of its checks is done
+
+        :param urls: Full urls or check targets
+        :type urls: Iterable[Union[str, CheckTarget]]
+        :return: Results in the same order as urls
+        :rtype: List[CheckResult]
+        """
+
+        urls = list(urls)
+        results: List[CheckResult] = [None] * len(urls)
+        queues: Dict[str, Deque[int]] = {}
+        for index, url in enumerate(urls):
+            target = url.url if isinstance(url, CheckTarget) else url
+            queues.setdefault(self.get_host(target), deque()).append(index)
+
+        executor = self.get_executor()
+        running: Dict[Future, str] = {}
+        indexes: Dict[Future, int] = {}
+        counts = {host: 0 for host in queues}
+
+        def submit():
+            for host, queue in queues.items():
+                while queue and counts[host] < self.max_per_host:
+                    index = queue.popleft()
+                    future = executor.submit(self.check, urls[index])
+                    running[future] = host
+                    indexes[future] = index
+                    counts[host] += 1
+
+        submit()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                counts[running.pop(future)] -= 1
+                results[indexes.pop(future)] = future.result()
+            submit()
+        return results
+
+    def close(self):
+        """
+        Stop the worker threads, they are started
+        again by the next check
+        """
+
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+health_checker = HealthChecker()
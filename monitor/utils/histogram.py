@@ -0,0 +1,96 @@
+"""
+Module for latency histograms with fixed log scale buckets
+"""
+
+
+import math
+from array import array
+from typing import Dict, Iterable, List
+
+
+class LatencyHistogram:
+    """
+    Counts of values in fixed log scale buckets.
+
+    Bucket i holds values up to 2 ** ((i + 1) / STEPS), every
+    histogram has the same buckets so histograms of any windows
+    or urls are merged by summing their counts. Percentiles are
+    within one bucket (about 19% with 4 steps) of the real value.
+    Histograms are stored as a packed array of 32 bit counts.
+    """
+    STEPS = 4
+    BUCKETS = 72
+    TYPECODE = 'I'
+
+    def __init__(self, counts: Iterable[int] = None) -> None:
+        self.counts = array(self.TYPECODE, [0] * self.BUCKETS)
+        if counts is not None:
+            for index, count in enumerate(counts):
+                self.counts[index] = count
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'LatencyHistogram':
+        """
+        Load a histogram saved with to_bytes,
+        empty data gives an empty histogram
+        """
+
+        histogram = cls()
+        if data:
+            counts = array(cls.TYPECODE)
+            counts.frombytes(bytes(data))
+            histogram.counts[:len(counts)] = counts
+        return histogram
+
+    def to_bytes(self) -> bytes:
+        return self.counts.tobytes()
+
+    @classmethod
+    def get_bucket(cls, value: float) -> int:
+        if value <= 1:
+            return 0
+        index = math.ceil(math.log2(value) * cls.STEPS) - 1
+        return min(max(index, 0), cls.BUCKETS - 1)
+
+    @classmethod
+    def get_upper_bound(cls, bucket: int) -> int:
+        return round(2 ** ((bucket + 1) / cls.STEPS))
+
+    def add(self, value: float, count: int = 1):
+        self.counts[self.get_bucket(value)] += count
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+
+    @classmethod
+    def merge_all(
+        cls, histograms: Iterable['LatencyHistogram']
+    ) -> 'LatencyHistogram':
+        merged = cls()
+        for histogram in histograms:
+            merged.merge(histogram)
+        return merged
+
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, percent: float) -> int:
+        """
+        Get the upper bound of the bucket holding the
+        percentile, None for an empty histogram
+        """
+
+        total = self.total()
+        if not total:
+            return None
+
+        rank = max(math.ceil(total * percent / 100), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.get_upper_bound(index)
+
+    def percentiles(self, percents: List[float]) -> Dict[float, int]:
+        return {percent: self.percentile(percent) for percent in percents}
@@ -0,0 +1,173 @@
+"""
+Module for reading systemd journal entries page by page
+"""
+
+
+import json
+import re
+import shlex
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple
+
+
+class InvalidCursor(Exception):
+    """
+    Journal cursor has unexpected characters
+    """
+
+
+class JournalEntry(NamedTuple):
+    """
+    One journal entry, cursor points at this entry
+    """
+    cursor: str
+    time: datetime
+    message: str
+    priority: int = None
+    identifier: str = None
+    pid: int = None
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        data['time'] = self.time.isoformat()
+        return data
+
+
+class JournalPage(NamedTuple):
+    """
+    Journal entries in time order, has_more tells if
+    more entries were left in the paged direction
+    """
+    entries: List[JournalEntry]
+    has_more: bool
+
+    def get_first_cursor(self) -> str:
+        return self.entries[0].cursor if self.entries else None
+
+    def get_last_cursor(self) -> str:
+        return self.entries[-1].cursor if self.entries else None
+
+    def to_dict(self) -> dict:
+        return {
+            'entries': [entry.to_dict() for entry in self.entries],
+            'first_cursor': self.get_first_cursor(),
+            'last_cursor': self.get_last_cursor(),
+            'has_more': self.has_more,
+        }
+
+
+class JournalQuery:
+    """
+    Builds a journalctl command for one page of a unit entries
+    and parses its json output.
+
+    Without cursors the last lines entries are read, before pages
+    backwards from an entry with --cursor and --reverse and after
+    reads the entries written since an entry with --after-cursor.
+    One extra entry is requested to know if more are left.
+    """
+    LINES = 200
+    MAX_LINES = 5000
+    FIELDS = ('MESSAGE', 'PRIORITY', 'SYSLOG_IDENTIFIER', '_PID')
+    CURSOR = re.compile(r'^[\w=;-]+$')
+
+    def __init__(
+        self, unit: str, lines: int = None, since: datetime = None,
+        until: datetime = None, before: str = None, after: str = None
+    ) -> None:
+        for cursor in (before, after):
+            if cursor and not self.CURSOR.match(cursor):
+                raise InvalidCursor
+
+        self.unit = unit
+        self.lines = min(lines or self.LINES, self.MAX_LINES)
+        self.since = since
+        self.until = until
+        self.before = before
+        self.after = after
+
+    def is_reversed(self) -> bool:
+        return bool(self.before)
+
+    def get_command(self) -> str:
+        """
+        Get the journalctl command, the output is cut by head
+        so only the requested entries are sent
+        """
+
+        options = [
+            '-u', self.unit, '-o', 'json', '--no-pager',
+            '--output-fields=' + ','.join(self.FIELDS)]
+        if self.since:
+            options.append('--since=' + self.format_time(self.since))
+        if self.until:
+            options.append('--until=' + self.format_time(self.until))
+
+        count = self.lines + 1
+        if self.before:
+            # The cursor entry is printed first and dropped
+            options += ['--reverse', '--cursor=' + self.before]
+            count += 1
+        elif self.after:
+            options.append('--after-cursor=' + self.after)
+        else:
+            options += ['-n', str(count)]
+
+        command = 'journalctl ' + ' '.join(
+            shlex.quote(option) for option in options)
+        return f"{command} | head -n {count}"
+
+    def format_time(self, time: datetime) -> str:
+        if time.tzinfo is not None:
+            time = time.astimezone(timezone.utc)
+            return time.strftime('%Y-%m-%d %H:%M:%S UTC')
+        return time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def parse_entry(self, line: str) -> JournalEntry:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if '__CURSOR' not in data:
+            return None
+
+        message = data.get('MESSAGE', '')
+        # Messages that are not valid text come as byte lists
+        if isinstance(message, list):
+            message = bytes(message).decode(errors='replace')
+        elif message is None:
+            message = ''
+
+        microseconds = int(data.get('__REALTIME_TIMESTAMP', 0))
+        priority = data.get('PRIORITY')
+        pid = data.get('_PID')
+        return JournalEntry(
+            cursor=data['__CURSOR'],
+            time=datetime.fromtimestamp(microseconds / 1e6, tz=timezone.utc),
+            message=message,
+            priority=int(priority) if priority else None,
+            identifier=data.get('SYSLOG_IDENTIFIER'),
+            pid=int(pid) if pid else None)
+
+    def parse(self, lines: Iterable[str]) -> JournalPage:
+        """
+        Parse journalctl output lines into a page
+        """
+
+        entries = [
+            entry for entry in map(self.parse_entry, lines)
+            if entry is not None]
+
+        if self.before:
+            entries = [
+                entry for entry in entries if entry.cursor != self.before]
+            has_more = len(entries) > self.lines
+            entries = entries[:self.lines][::-1]
+        elif self.after:
+            has_more = len(entries) > self.lines
+            entries = entries[:self.lines]
+        else:
+            has_more = len(entries) > self.lines
+            entries = entries[-self.lines:]
+
+        return JournalPage(entries, has_more)
@@ -0,0 +1,225 @@
+"""
+Module for mirroring remote logs locally, only the bytes
+appended since the last sync are read from the server
+"""
+
+
+import gzip
+import os
+import re
+import shutil
+from typing import Callable, Iterator, List, NamedTuple, Tuple
+
+from .logs import LogBytes, RemoteLog
+
+
+class SyncResult(NamedTuple):
+    """
+    Position in the remote log after a sync, rotated
+    is set when the log was replaced or truncated and
+    size is the remote log size on the last read
+    """
+    inode: int
+    offset: int
+    appended: int
+    rotated: bool
+    size: int
+
+
+class SegmentStore:
+    """
+    Local copy of one log as numbered gzip segments.
+
+    Every sync appends a gzip member to the newest segment, a
+    new segment is started once it is SEGMENT_SIZE bytes and
+    only the newest MAX_SEGMENTS are kept. Segments only hold
+    whole lines.
+    """
+    SEGMENT_SIZE = 8 * 1024 * 1024
+    MAX_SEGMENTS = 32
+    SEGMENT = re.compile(r'^(\d{6})\.gz$')
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def get_segments(self) -> List[str]:
+        """
+        Segment paths, oldest first
+        """
+
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if self.SEGMENT.match(name))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def get_segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f'{index:06d}.gz')
+
+    def append(self, data: bytes):
+        if not data:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.get_segments()
+        if not segments:
+            path = self.get_segment_path(0)
+        elif os.path.getsize(segments[-1]) >= self.SEGMENT_SIZE:
+            name = os.path.basename(segments[-1])
+            path = self.get_segment_path(
+                int(self.SEGMENT.match(name).group(1)) + 1)
+        else:
+            path = segments[-1]
+
+        with open(path, 'ab') as file:
+            file.write(gzip.compress(data))
+
+        for old_path in self.get_segments()[:-self.MAX_SEGMENTS]:
+            os.remove(old_path)
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """
+        Iterate over the stored lines, oldest first
+        """
+
+        for path in self.get_segments():
+            with gzip.open(path, 'rb') as file:
+                yield from file
+
+    def tail(self, lines: int) -> List[str]:
+        """
+        Get the last stored lines, segments
+        are read from the newest
+        """
+
+        found: List[bytes] = []
+        for path in reversed(self.get_segments()):
+            with gzip.open(path, 'rb') as file:
+                found = file.read().splitlines() + found
+            if len(found) >= lines:
+                break
+        return [line.decode(errors='replace') for line in found[-lines:]]
+
+    def read_tail(self, length: int) -> bytes:
+        """
+        Get the whole lines in the last length stored
+        bytes, segments are read from the newest
+        """
+
+        data = b''
+        for path in reversed(self.get_segments()):
+            with gzip.open(path, 'rb') as file:
+                data = file.read() + data
+            if len(data) > length:
+                # Start after the line cut by length
+                newline = data.find(b'\n', len(data) - length - 1)
+                return data[newline + 1:] if newline != -1 else b''
+        return data
+
+    def is_empty(self) -> bool:
+        return not self.get_segments()
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+
+def copy_lines(
+    read: Callable[[int, int], LogBytes], store: SegmentStore,
+    offset: int, max_bytes: int, max_reads: int,
+    on_data: Callable[[bytes], None] = None, part: LogBytes = None
+) -> Tuple[int, int, LogBytes]:
+    """
+    Append the whole lines of a remote log from offset to
+    store, until a short read reaches the end of the log or
+    max_reads were made. part is the first read when given.
+
+    :return: Offset after the copied lines, bytes copied
+    and the last read
+    :rtype: Tuple[int, int, LogBytes]
+    """
+
+    appended = 0
+    for count in range(max_reads):
+        if count or part is None:
+            part = read(offset, max_bytes)
+        data = part.data
+        newline = data.rfind(b'\n')
+        if newline != -1:
+            data = data[:newline + 1]
+        elif len(data) < max_bytes:
+            # A line still being written
+            data = b''
+
+        store.append(data)
+        if data and on_data is not None:
+            on_data(data)
+        offset += len(data)
+        appended += len(data)
+        # A short read reached the end of the log
+        if not data or len(part.data) < max_bytes:
+            break
+
+    return offset, appended, part
+
+
+def sync_log(
+    read: Callable[[int, int], LogBytes], store: SegmentStore,
+    inode: int = None, offset: int = 0, max_bytes: int = None,
+    max_reads: int = 8, on_data: Callable[[bytes], None] = None,
+    read_rotated: Callable[[int], Callable[[int, int], LogBytes]] = None
+) -> SyncResult:
+    """
+    Append the bytes written to a remote log since offset to
+    store. A log with another inode or smaller than offset was
+    rotated or truncated and is read again from its start, the
+    lines written to a rotated file after offset are copied
+    first when read_rotated still finds it. Only whole lines
+    are stored, the rest is read on the next sync.
+
+    :param read: Callable reading up to length bytes of the
+    remote log from an offset
+    :type read: Callable[[int, int], LogBytes]
+    :param store: Local copy of the log
+    :type store: SegmentStore
+    :param inode: Log inode on the last sync, defaults to None
+    :type inode: int, optional
+    :param offset: Bytes read on the last sync, defaults to 0
+    :type offset: int, optional
+    :param max_bytes: Bytes read at once, defaults to None
+    :type max_bytes: int, optional
+    :param max_reads: Reads before the rest is left for the
+    next sync, defaults to 8
+    :type max_reads: int, optional
+    :param on_data: Callable getting the stored bytes,
+    defaults to None
+    :type on_data: Callable[[bytes], None], optional
+    :param read_rotated: Callable giving the read callable of
+    the rotated file with an inode, None when it is gone,
+    defaults to None
+    :type read_rotated: Callable[[int], Callable], optional
+    :rtype: SyncResult
+    """
+
+    max_bytes = min(max_bytes or RemoteLog.MAX_LENGTH, RemoteLog.MAX_LENGTH)
+
+    part = read(offset, max_bytes)
+    rotated = inode is not None and (
+        part.inode != inode or part.size < offset)
+
+    drained = 0
+    if rotated:
+        read_old = None
+        if read_rotated is not None and part.inode != inode:
+            read_old = read_rotated(inode)
+        if read_old is not None:
+            _, drained, _ = copy_lines(
+                read_old, store, offset, max_bytes, max_reads, on_data)
+        offset = 0
+        part = None
+
+    offset, appended, part = copy_lines(
+        read, store, offset, max_bytes, max_reads, on_data, part)
+    return SyncResult(
+        part.inode, offset, drained + appended, rotated, part.size)
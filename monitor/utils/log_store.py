@@ -0,0 +1,376 @@
+"""
+Module for a local columnar store of parsed access log
+fields, queried with vectorized scans over memory mapped
+numpy arrays
+"""
+
+
+import fcntl
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+MONTHS = {
+    month: index for index, month in enumerate((
+        'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+        'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+ACCESS_LINE = re.compile(
+    r'^(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>[^" ]+)[^"]*" '
+    r'(?P<status>\d{3}) (?P<bytes>\d+|-)'
+    r'(?:.*\s(?P<response_time>\d+\.\d+))?\s*$')
+
+
+class LogStoreUnavailable(Exception):
+    """
+    Exception raised when numpy is not installed
+    """
+
+
+class AccessRecord(NamedTuple):
+    """
+    Fields of one access log line, time is in epoch seconds
+    and response_time in seconds, None when not logged
+    """
+    time: int
+    status: int
+    method: str
+    bytes: int
+    path: str
+    ip: str
+    response_time: float = None
+
+
+def parse_access_time(text: str) -> int:
+    """
+    Get epoch seconds of an access log time
+    like 01/May/2022:12:00:05 +0200
+
+    :rtype: int
+    """
+
+    day, month, rest = text[:2], text[3:6], text[7:]
+    year, hour, minute, second = rest[:4], rest[5:7], rest[8:10], rest[11:13]
+    time = datetime(
+        int(year), MONTHS[month], int(day), int(hour), int(minute),
+        int(second), tzinfo=timezone.utc)
+
+    offset = rest[14:]
+    if offset:
+        sign = -1 if offset[0] == '-' else 1
+        time -= sign * timedelta(
+            hours=int(offset[1:3]), minutes=int(offset[3:5]))
+    return int(time.timestamp())
+
+
+def parse_access_line(line: str) -> AccessRecord:
+    """
+    Parse an access log line in the common or combined format,
+    a response time logged as the last field is kept. None is
+    returned for lines in other formats.
+
+    :param line: Access log line
+    :type line: str
+    :rtype: AccessRecord
+    """
+
+    match = ACCESS_LINE.match(line)
+    if match is None:
+        return None
+
+    try:
+        time = parse_access_time(match['time'])
+    except (KeyError, ValueError):
+        return None
+
+    size = match['bytes']
+    response_time = match['response_time']
+    return AccessRecord(
+        time=time,
+        status=int(match['status']),
+        method=match['method'],
+        bytes=0 if size == '-' else int(size),
+        path=match['path'].split('?', 1)[0],
+        ip=match['ip'],
+        response_time=float(response_time) if response_time else None)
+
+
+class StringTable:
+    """
+    Dictionary encoding of the strings of one column, values
+    get ids in the order they are first seen and are kept in
+    an append only file with one value per line. The file is
+    loaded again by refresh once another writer changed it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.__pending: List[str] = []
+        self.__stat: Tuple[int, int, int] = None
+        self.load()
+
+    def get_stat(self) -> Tuple[int, int, int]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        self.values = []
+        self.ids = {}
+        self.__pending = []
+        self.__stat = self.get_stat()
+        if self.__stat is not None:
+            with open(self.path, encoding='utf-8') as file:
+                for line in file:
+                    self.add(line.rstrip('\n'))
+
+    def refresh(self):
+        if self.get_stat() != self.__stat:
+            self.load()
+
+    def add(self, value: str) -> int:
+        self.ids[value] = len(self.values)
+        self.values.append(value)
+        return self.ids[value]
+
+    def get_id(self, value: str) -> int:
+        # Values are written one per line
+        value = value.replace('\n', ' ')
+        index = self.ids.get(value)
+        if index is None:
+            index = self.add(value)
+            self.__pending.append(value)
+        return index
+
+    def get_value(self, index: int) -> str:
+        return self.values[index]
+
+    def flush(self):
+        if self.__pending:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.writelines(value + '\n' for value in self.__pending)
+            self.__pending = []
+
+
+class AccessLogStore:
+    """
+    Parsed access log records of one website in a directory.
+
+    Records are fixed size rows of a numpy structured array
+    appended to one file and read back with a memory map, so
+    queries scan only the needed columns without parsing text.
+    Methods, paths and ips are dictionary encoded in string
+    tables. Missing response times are stored as NaN. Writers
+    hold a lock on the directory, so the string tables of
+    another writer are loaded before new ids are given.
+    """
+    FIELDS = [
+        ('time', '<i8'),
+        ('status', '<u2'),
+        ('method', '<u2'),
+        ('bytes', '<i8'),
+        ('path', '<u4'),
+        ('ip', '<u4'),
+        ('response_time', '<f4'),
+    ]
+    RECORDS = 'records.bin'
+    LOCK = '.lock'
+    TOP = 10
+
+    def __init__(self, directory: str) -> None:
+        if np is None:
+            raise LogStoreUnavailable
+
+        self.directory = directory
+        self.dtype = np.dtype(self.FIELDS)
+        os.makedirs(directory, exist_ok=True)
+        self.methods = StringTable(os.path.join(directory, 'methods.txt'))
+        self.paths = StringTable(os.path.join(directory, 'paths.txt'))
+        self.ips = StringTable(os.path.join(directory, 'ips.txt'))
+
+    def get_records_path(self) -> str:
+        return os.path.join(self.directory, self.RECORDS)
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold the write lock of the store directory
+        """
+
+        with open(os.path.join(self.directory, self.LOCK), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def get_records(self) -> 'np.ndarray':
+        """
+        Memory map of every record, empty
+        when nothing was stored yet
+        """
+
+        path = self.get_records_path()
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=self.dtype)
+        # A partly written last record is left out
+        count = os.path.getsize(path) // self.dtype.itemsize
+        if not count:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode='r', shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self.get_records())
+
+    def append_records(self, records: Iterable[AccessRecord]) -> int:
+        """
+        Encode and append records, string tables are written
+        before the rows referencing them
+
+        :return: Number of stored records
+        :rtype: int
+        """
+
+        # Records may be read from a server, not while locked
+        records = list(records)
+        if not records:
+            return 0
+
+        tables = (self.methods, self.paths, self.ips)
+        with self.lock():
+            for table in tables:
+                table.refresh()
+            rows = [
+                (record.time, record.status,
+                 self.methods.get_id(record.method), record.bytes,
+                 self.paths.get_id(record.path), self.ips.get_id(record.ip),
+                 np.nan if record.response_time is None
+                 else record.response_time)
+                for record in records]
+
+            for table in tables:
+                table.flush()
+            with open(self.get_records_path(), 'ab') as file:
+                file.write(np.array(rows, dtype=self.dtype).tobytes())
+        return len(rows)
+
+    def append(self, lines: Iterable[str]) -> int:
+        """
+        Parse access log lines and append them,
+        lines in other formats are skipped
+
+        :return: Number of stored records
+        :rtype: int
+        """
+
+        records = (parse_access_line(line) for line in lines)
+        return self.append_records(
+            record for record in records if record is not None)
+
+    def clear(self):
+        names = (self.RECORDS, 'methods.txt', 'paths.txt', 'ips.txt')
+        with self.lock():
+            for name in names:
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            for table in (self.methods, self.paths, self.ips):
+                table.load()
+
+    def select(
+        self, since: datetime = None, until: datetime = None
+    ) -> 'np.ndarray':
+        """
+        Records from since to until, naive
+        times are taken as UTC
+        """
+
+        records = self.get_records()
+        # Rows appended by a writer since the tables were loaded
+        # reference values past them
+        for table in (self.methods, self.paths, self.ips):
+            table.refresh()
+        mask = np.ones(len(records), dtype=bool)
+        if since is not None:
+            mask &= records['time'] >= self.get_timestamp(since)
+        if until is not None:
+            mask &= records['time'] < self.get_timestamp(until)
+        return records[mask]
+
+    def get_timestamp(self, time: datetime) -> int:
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=timezone.utc)
+        return int(time.timestamp())
+
+    def status_by_hour(
+        self, since: datetime = None, until: datetime = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Count requests of every status code by hour
+
+        :return: Counts by status code by ISO hour
+        :rtype: Dict[str, Dict[str, int]]
+        """
+
+        records = self.select(since, until)
+        keys = (records['time'] // 3600) * 1000 + records['status']
+        keys, counts = np.unique(keys, return_counts=True)
+
+        by_hour = {}
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            hour, status = divmod(key, 1000)
+            time = datetime.fromtimestamp(hour * 3600, tz=timezone.utc)
+            by_hour.setdefault(time.isoformat(), {})[str(status)] = count
+        return by_hour
+
+    def bytes_by_path(
+        self, since: datetime = None, until: datetime = None,
+        top: int = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Get the paths that sent the most bytes
+
+        :return: (path, bytes) pairs, largest first
+        :rtype: List[Tuple[str, int]]
+        """
+
+        records = self.select(since, until)
+        if not len(records):
+            return []
+
+        totals = np.bincount(records['path'], weights=records['bytes'])
+        order = np.argsort(totals)[::-1][:top or self.TOP]
+        return [
+            (self.paths.get_value(index), int(totals[index]))
+            for index in order.tolist() if totals[index] > 0]
+
+    def response_time_percentiles(
+        self, percents: List[float], since: datetime = None,
+        until: datetime = None
+    ) -> Dict[float, float]:
+        """
+        Get response time percentiles in seconds, None
+        when no response time was logged
+        """
+
+        times = self.select(since, until)['response_time']
+        times = times[~np.isnan(times)]
+        if not len(times):
+            return {percent: None for percent in percents}
+        values = np.percentile(times, percents)
+        return {
+            percent: round(float(value), 4)
+            for percent, value in zip(percents, values)}
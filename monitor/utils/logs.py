@@ -0,0 +1,839 @@
+"""
+Module for reading windows of remote log files
+without loading the whole file
+"""
+
+
+import re
+import shlex
+from collections import deque
+from datetime import datetime, timezone, tzinfo
+from typing import (Callable, Dict, Iterable, List, NamedTuple, Pattern,
+                    Tuple)
+
+
+# Time formats of nginx and apache access logs, nginx error
+# logs and apache error logs, with the parts making the time
+LOG_TIME_FORMATS = (
+    (re.compile(r'\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2})[ \]]'),
+     '%d/%b/%Y:%H:%M:%S'),
+    (re.compile(r'^(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}) '),
+     '%Y/%m/%d %H:%M:%S'),
+    (re.compile(
+        r'^\[\w{3} (\w{3} \d{2} \d{2}:\d{2}:\d{2})(?:\.\d+)? (\d{4})\]'),
+     '%b %d %H:%M:%S %Y'),
+)
+
+
+def parse_log_time(line: str) -> datetime:
+    """
+    Get the time of a log line as written in the log, the
+    offset of access log times is ignored so every log is
+    compared in the server local time. None is returned for
+    lines without a known time, like stack traces.
+
+    :param line: Log line
+    :type line: str
+    :rtype: datetime
+    """
+
+    for pattern, time_format in LOG_TIME_FORMATS:
+        match = pattern.search(line[:256])
+        if match:
+            try:
+                return datetime.strptime(' '.join(match.groups()), time_format)
+            except ValueError:
+                return None
+
+
+class LogChunk(NamedTuple):
+    """
+    Whole lines of a log file between the start and end byte
+    offsets, inode and size are read with the lines so a
+    rotated or truncated file is noticed by the reader
+    """
+    path: str
+    inode: int
+    size: int
+    start: int
+    end: int
+    lines: List[str]
+
+    def has_before(self) -> bool:
+        return self.start > 0
+
+    def has_after(self) -> bool:
+        return self.end < self.size
+
+    def to_window(self) -> dict:
+        """
+        Window of the log viewer, the lines before start_offset
+        or after end_offset are requested as other windows
+        """
+        return {
+            'start_offset': self.start,
+            'end_offset': self.end,
+            'size': self.size,
+            'inode': self.inode,
+            'has_before': self.has_before(),
+            'has_after': self.has_after(),
+            'lines': self.lines,
+        }
+
+
+class LogBytes(NamedTuple):
+    """
+    Raw bytes of a log file from start, with the file
+    inode and size when they were read
+    """
+    inode: int
+    size: int
+    start: int
+    data: bytes
+
+
+class RemoteLog:
+    """
+    Builds the shell command reading one window of a log file
+    and parses its output into a LogChunk.
+
+    With an offset, length bytes from offset are read, else the
+    last lines of the file are read from its last WINDOW bytes.
+    The file is seeked with tail -c so only the window is read,
+    and windows are cut to whole lines on both ends.
+    """
+    LINES = 200
+    MAX_LINES = 5000
+    LENGTH = 64 * 1024
+    MAX_LENGTH = 4 * 1024 * 1024
+    WINDOW = 1024 * 1024
+
+    def __init__(
+        self, path: str, offset: int = None, length: int = None,
+        lines: int = None
+    ) -> None:
+        self.path = path
+        self.offset = offset
+        self.length = min(length or self.LENGTH, self.MAX_LENGTH)
+        self.lines = min(lines or self.LINES, self.MAX_LINES)
+
+    def get_read_start(self) -> int:
+        # One byte before offset tells if offset starts a line
+        return max(self.offset - 1, 0)
+
+    def get_read_length(self) -> int:
+        return self.length + self.offset - self.get_read_start()
+
+    def get_script(self) -> str:
+        """
+        Shell script printing the inode, size and window
+        start on one line followed by the window bytes
+        """
+
+        if self.offset is None:
+            start = f"$(( $2 > {self.WINDOW} ? $2 - {self.WINDOW} : 0 ))"
+            count = '$(( $2 - start ))'
+        else:
+            start = self.get_read_start()
+            length = self.get_read_length()
+            count = f"$(( $2 - start < {length} ? $2 - start : {length} ))"
+
+        return (
+            f'f={shlex.quote(self.path)}; '
+            's=$(stat -L -c "%i %s" -- "$f") || exit 1; set -- $s; '
+            f'start={start}; '
+            'if [ "$start" -gt "$2" ]; then start=$2; fi; '
+            'echo "$1 $2 $start"; '
+            f'tail -c +$(( start + 1 )) -- "$f" | head -c {count}')
+
+    def get_command(self) -> str:
+        return f"sh -c {shlex.quote(self.get_script())}"
+
+    def parse_header(self, output: bytes) -> Tuple[int, int, int, bytes]:
+        """
+        Split the command output into inode,
+        size, window start and window bytes
+        """
+
+        header, _, data = output.partition(b'\n')
+        inode, size, start = map(int, header.split())
+        return inode, size, start, data[:size - start]
+
+    def parse_bytes(self, output: bytes) -> LogBytes:
+        """
+        Parse the command output into the raw bytes from
+        offset, without cutting them to whole lines
+        """
+
+        inode, size, start, data = self.parse_header(output)
+        if self.offset is not None and start < self.offset:
+            # Drop the byte read before offset
+            data = data[self.offset - start:]
+            start = min(self.offset, size)
+        return LogBytes(inode, size, start, data)
+
+    def parse(self, output: bytes) -> LogChunk:
+        """
+        Parse the command output, offsets are
+        counted on the undecoded bytes
+        """
+
+        inode, size, start, data = self.parse_header(output)
+
+        if self.offset is None:
+            # Cut at the newline before the last lines
+            body = data[:-1] if data.endswith(b'\n') else data
+            cut = len(body)
+            for _ in range(self.lines):
+                cut = body.rfind(b'\n', 0, cut)
+                if cut == -1:
+                    break
+            if cut != -1:
+                cut += 1
+            elif start > 0:
+                # The first line can be cut by the window
+                cut = data.find(b'\n') + 1
+            else:
+                cut = 0
+            return self.get_chunk(inode, size, start + cut, data[cut:])
+
+        if start < self.offset and data:
+            # Drop the extra byte, or the line cut by the offset
+            cut = data.find(b'\n') + 1 or len(data)
+            data = data[cut:]
+            start += cut
+
+        last = data.rfind(b'\n')
+        if last != -1:
+            # Drop the last line if it is cut or still being written
+            data = data[:last + 1]
+        elif len(data) < self.length:
+            data = b''
+        return self.get_chunk(inode, size, start, data)
+
+    def get_chunk(
+        self, inode: int, size: int, start: int, data: bytes
+    ) -> LogChunk:
+        lines = data.split(b'\n') if data else []
+        if data.endswith(b'\n'):
+            lines.pop()
+        return LogChunk(
+            path=self.path, inode=inode, size=size, start=start,
+            end=start + len(data),
+            lines=[line.decode(errors='replace') for line in lines])
+
+
+class LogTimeRange:
+    """
+    Reads the lines of a time ordered log between since and until.
+
+    The range bounds are found with a binary search over byte
+    offsets, each step reads PROBE_LENGTH bytes at the middle
+    offset and compares the time of its first line, so a range
+    of a huge log is found with about log2(size) small reads
+    before the range itself is read.
+    """
+    PROBE_LENGTH = 4096
+
+    def __init__(
+        self, read: Callable[[int, int], LogChunk], since: datetime = None,
+        until: datetime = None
+    ) -> None:
+        """
+        :param read: Callable reading length bytes of the log
+        from an offset, see RemoteLog
+        :type read: Callable[[int, int], LogChunk]
+        :param since: First time of the range, defaults to None
+        :type since: datetime, optional
+        :param until: End time of the range, defaults to None
+        :type until: datetime, optional
+        """
+
+        self.read_window = read
+        self.since = since
+        self.until = until
+
+    def get_first_time(self, chunk: LogChunk) -> datetime:
+        for line in chunk.lines:
+            time = parse_log_time(line)
+            if time is not None:
+                return time
+
+    def find_offset(self, time: datetime, first: LogChunk) -> int:
+        """
+        Get the offset of the first line at time or after,
+        the size of the log if every line is before time
+
+        :param first: First window of the log
+        :type first: LogChunk
+        :rtype: int
+        """
+
+        first_time = self.get_first_time(first)
+        if first_time is None or first_time >= time:
+            return 0
+
+        # low is a line before time, lines from high are not
+        low, high = 0, first.size
+        offset = first.size
+        while high - low > 1:
+            middle = (low + high) // 2
+            chunk = self.read_window(middle, self.PROBE_LENGTH)
+            middle_time = self.get_first_time(chunk)
+            if middle_time is not None and middle_time < time:
+                low = max(chunk.start, middle)
+            else:
+                # No line starts between middle and the chunk
+                high = middle
+                if chunk.lines:
+                    offset = min(offset, chunk.start)
+        return offset
+
+    def is_in_range(self, time: datetime) -> bool:
+        if self.since is not None and time < self.since:
+            return False
+        return self.until is None or time < self.until
+
+    def filter_lines(self, lines: List[str]) -> List[str]:
+        """
+        Keep lines in the range, lines without a time
+        go with the line before them
+        """
+
+        in_range = False
+        kept = []
+        for line in lines:
+            time = parse_log_time(line)
+            if time is not None:
+                in_range = self.is_in_range(time)
+            if in_range:
+                kept.append(line)
+        return kept
+
+    def get_offsets(self, first: LogChunk = None) -> Tuple[int, int]:
+        """
+        Get the start and stop byte offsets of the range
+
+        :param first: First window of the log, read if not given
+        :type first: LogChunk, optional
+        :rtype: Tuple[int, int]
+        """
+
+        if first is None:
+            first = self.read_window(0, self.PROBE_LENGTH)
+
+        start = 0
+        stop = first.size
+        if self.since is not None:
+            start = self.find_offset(self.since, first)
+        if self.until is not None:
+            stop = self.find_offset(self.until, first)
+        return start, max(start, stop)
+
+    def read(self, offset: int = None, length: int = None) -> LogChunk:
+        """
+        Read the lines of the range, ranges longer than length
+        are read in parts by calling again with the chunk end
+
+        :param offset: End of the last part, defaults to None
+        :type offset: int, optional
+        :param length: Bytes to read, defaults to RemoteLog.MAX_LENGTH
+        :type length: int, optional
+        :rtype: LogChunk
+        """
+
+        first = self.read_window(0, self.PROBE_LENGTH)
+        start, stop = self.get_offsets(first)
+
+        if offset is not None:
+            start = max(start, offset)
+        length = min(length or RemoteLog.MAX_LENGTH, RemoteLog.MAX_LENGTH)
+
+        if start >= stop:
+            return first._replace(start=stop, end=stop, lines=[])
+
+        chunk = self.read_window(start, min(stop - start, length))
+        return chunk._replace(lines=self.filter_lines(chunk.lines))
+
+
+class LogMatch(NamedTuple):
+    """
+    Line found by a log search, context lines around
+    the matches have match set to False. path is set
+    when rotated logs were searched too
+    """
+    line_number: int
+    offset: int
+    line: str
+    match: bool = True
+    path: str = None
+
+
+class LogSearchResult(NamedTuple):
+    """
+    Lines found by a log search in file order, truncated
+    is set when the search stopped at the match limit
+    """
+    matches: List[LogMatch]
+    truncated: bool
+
+    def to_dict(self) -> dict:
+        return {
+            'matches': [match._asdict() for match in self.matches],
+            'truncated': self.truncated,
+        }
+
+
+class LogSearch:
+    """
+    Builds a grep command searching a log on the server, only
+    the matching lines with their line numbers and byte offsets
+    are sent back. Patterns are fixed strings unless regex is
+    set, then they are POSIX extended regular expressions.
+    """
+    MAX_MATCHES = 1000
+    MAX_CONTEXT = 10
+    LINE = re.compile(r'^(\d+)([:-])(\d+)[:-](.*)$')
+    FILE = '==> '
+
+    def __init__(
+        self, pattern: str, regex=False, ignore_case=False, context: int = 0,
+        max_matches: int = None
+    ) -> None:
+        self.pattern = pattern
+        self.regex = regex
+        self.ignore_case = ignore_case
+        self.context = min(max(context or 0, 0), self.MAX_CONTEXT)
+        self.max_matches = min(
+            max_matches or self.MAX_MATCHES, self.MAX_MATCHES)
+
+    def get_options(self) -> List[str]:
+        options = ['-a', '-n', '-b', '-E' if self.regex else '-F']
+        if self.ignore_case:
+            options.append('-i')
+        if self.context:
+            options.append(f'-C{self.context}')
+        options += [f'-m{self.max_matches}', '-e', self.pattern]
+        return options
+
+    def get_grep_command(self, *paths: str) -> str:
+        # grep exits with 1 when nothing matched
+        arguments = self.get_options() + ['--', *paths]
+        command = ' '.join(shlex.quote(argument) for argument in arguments)
+        return f"grep {command} || [ $? -eq 1 ]"
+
+    def get_file_command(self, path: str) -> str:
+        """
+        Command searching a file
+        """
+        return self.get_grep_command(path)
+
+    def get_pipe_command(self, command: str) -> str:
+        """
+        Command searching the output of command,
+        offsets are counted in that output
+        """
+        return f"{command} | {self.get_grep_command()}"
+
+    def get_regex(self) -> Pattern:
+        """
+        Python regex of the search, used on local logs, regex
+        patterns follow Python syntax rather than grep
+        """
+
+        pattern = self.pattern if self.regex else re.escape(self.pattern)
+        return re.compile(pattern, re.IGNORECASE if self.ignore_case else 0)
+
+    def search_lines(self, lines: Iterable[bytes]) -> LogSearchResult:
+        """
+        Search lines the way grep does, with line
+        numbers and byte offsets counted from 1 and 0
+        """
+
+        regex = self.get_regex()
+        before = deque(maxlen=self.context)
+        after = 0
+        found = 0
+        matches = []
+        offset = 0
+
+        for line_number, line in enumerate(lines, 1):
+            text = line.decode(errors='replace').rstrip('\n')
+            if found < self.max_matches and regex.search(text):
+                matches.extend(before)
+                before.clear()
+                matches.append(LogMatch(line_number, offset, text))
+                found += 1
+                after = self.context
+            elif after:
+                matches.append(LogMatch(line_number, offset, text, False))
+                after -= 1
+            elif found >= self.max_matches:
+                break
+            elif self.context:
+                before.append(LogMatch(line_number, offset, text, False))
+            offset += len(line)
+
+        return LogSearchResult(matches, found >= self.max_matches)
+
+    def get_files_script(self, files: List['LogFile']) -> str:
+        """
+        Shell script searching log files newest first so the limit
+        keeps the latest matches, compressed files are searched as
+        they are decompressed. The name of every file is printed
+        before its matches.
+        """
+
+        commands = []
+        for log_file in reversed(files):
+            commands.append(f"echo {shlex.quote(self.FILE + log_file.path)}")
+            if log_file.is_compressed():
+                commands.append(self.get_pipe_command(
+                    log_file.get_read_command()))
+            else:
+                commands.append(self.get_file_command(log_file.path))
+        return '; '.join(commands + ['true'])
+
+    def get_files_command(self, files: List['LogFile']) -> str:
+        return f"sh -c {shlex.quote(self.get_files_script(files))}"
+
+    def parse(self, output: str) -> LogSearchResult:
+        """
+        Parse the output of the files script, the matches of the
+        newest files are kept up to the limit and returned in file
+        order, oldest first
+        """
+
+        groups: List[List[LogMatch]] = []
+        path = None
+        for line in output.splitlines():
+            if line.startswith(self.FILE):
+                path = line[len(self.FILE):]
+                groups.append([])
+                continue
+            parts = self.LINE.match(line)
+            if parts is None:
+                # Separator between context groups
+                continue
+            if not groups:
+                groups.append([])
+            line_number, kind, offset, text = parts.groups()
+            groups[-1].append(LogMatch(
+                int(line_number), int(offset), text, kind == ':', path))
+
+        # Files are searched with the limit each
+        kept: List[List[LogMatch]] = []
+        found = 0
+        truncated = False
+        for group in groups:
+            # Matches past the limit are cut from the start of the file
+            for index in range(len(group) - 1, -1, -1):
+                found += group[index].match
+                if found > self.max_matches:
+                    group = group[index + 1:]
+                    truncated = True
+                    break
+            kept.append(group)
+            if truncated:
+                break
+
+        matches = [match for group in reversed(kept) for match in group]
+        return LogSearchResult(
+            matches, truncated or found >= self.max_matches)
+
+
+class AccessStats(NamedTuple):
+    """
+    Aggregates of an access log range, top paths
+    and ips are (value, requests) pairs
+    """
+    requests: int
+    per_minute: Dict[str, int]
+    status_codes: Dict[str, int]
+    top_paths: List[Tuple[str, int]]
+    top_ips: List[Tuple[str, int]]
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class AccessLogAggregation:
+    """
+    Builds an awk script counting the requests of a byte range
+    of an access log on the server, in the nginx and apache
+    common or combined formats. Only the counts per minute and
+    status code and the top paths and ips are sent back.
+    """
+    TOP = 10
+    MAX_TOP = 100
+    SCRIPT = r'''
+$4 ~ /^\[/ && $9 ~ /^[0-9]+$/ {
+    requests++
+    minute[substr($4, 2, 17)]++
+    status[$9]++
+    path[$7]++
+    ip[$1]++
+}
+END {
+    print "R", requests + 0
+    for (key in minute) print "M", minute[key], key
+    for (key in status) print "S", status[key], key
+    for (key in path) print "P", path[key], key | top
+    close(top)
+    for (key in ip) print "I", ip[key], key | top
+    close(top)
+}
+'''
+
+    def __init__(self, top: int = None) -> None:
+        self.top = min(top or self.TOP, self.MAX_TOP)
+
+    def get_script(self, path: str, start: int, stop: int) -> str:
+        """
+        Shell script aggregating bytes start to stop of path
+        """
+
+        top = f"sort -k2,2nr | head -n {self.top}"
+        awk = f"awk -v top={shlex.quote(top)} {shlex.quote(self.SCRIPT)}"
+        return (
+            f"tail -c +{start + 1} -- {shlex.quote(path)} | "
+            f"head -c {stop - start} | {awk}")
+
+    def get_command(self, path: str, start: int, stop: int) -> str:
+        return f"sh -c {shlex.quote(self.get_script(path, start, stop))}"
+
+    def parse_minute(self, minute: str) -> str:
+        try:
+            time = datetime.strptime(minute, '%d/%b/%Y:%H:%M')
+        except ValueError:
+            return None
+        return time.isoformat()
+
+    def parse(self, output: str) -> AccessStats:
+        requests = 0
+        per_minute = {}
+        status_codes = {}
+        top_paths = []
+        top_ips = []
+
+        for line in output.splitlines():
+            kind, _, rest = line.partition(' ')
+            if kind == 'R':
+                requests = int(rest)
+                continue
+
+            count, _, key = rest.partition(' ')
+            if not count.isdigit():
+                continue
+            count = int(count)
+            if kind == 'M':
+                minute = self.parse_minute(key)
+                if minute is not None:
+                    per_minute[minute] = count
+            elif kind == 'S':
+                status_codes[key] = count
+            elif kind == 'P':
+                top_paths.append((key, count))
+            elif kind == 'I':
+                top_ips.append((key, count))
+
+        return AccessStats(
+            requests=requests,
+            per_minute=dict(sorted(per_minute.items())),
+            status_codes=dict(sorted(status_codes.items())),
+            top_paths=top_paths,
+            top_ips=top_ips)
+
+
+class LogFile(NamedTuple):
+    """
+    A log file on the server, mtime is in epoch seconds
+    """
+    path: str
+    inode: int
+    size: int
+    mtime: int
+
+    def is_compressed(self) -> bool:
+        return self.path.endswith('.gz')
+
+    def get_read_command(self) -> str:
+        """
+        Command printing the file, decompressed
+        on the server when compressed
+        """
+        if self.is_compressed():
+            return f"gzip -dc -- {shlex.quote(self.path)}"
+        return f"cat -- {shlex.quote(self.path)}"
+
+    def get_tail_command(self, lines: int) -> str:
+        if self.is_compressed():
+            return f"{self.get_read_command()} | tail -n {lines}"
+        return f"tail -n {lines} -- {shlex.quote(self.path)}"
+
+
+class RotatedLog:
+    """
+    A live log with the files logrotate made of it, like
+    access.log.1, access.log.2.gz or access.log-20220501.gz,
+    read as one time ordered stream of files.
+
+    Rotated files are found with one listing and ordered by
+    modification time, the live file is always last.
+    """
+    SUFFIX = re.compile(r'^(?:\.(\d+)|-(\d{8,10}))(\.gz)?$')
+    # Prints a sortable yyyymmddHHMMSS key of the line time for
+    # the formats of parse_log_time, lines without a time go
+    # with the line before them
+    TIME_FILTER = r"""
+BEGIN {
+    split("Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec", names, " ")
+    for (i = 1; i <= 12; i++) months[names[i]] = sprintf("%02d", i)
+    d = "[0-9][0-9]"
+    m = "[A-Z][a-z][a-z]"
+    clock = d ":" d ":" d
+    access = "\\[" d "/" m "/" d d ":" clock
+    error = "^" d d "/" d "/" d " " clock
+    apache = "^\\[" m " " m " " d " " clock "[.0-9]* " d d "\\]"
+}
+function time_key(line,    t, parts) {
+    if (match(line, access)) {
+        t = substr(line, RSTART + 1, 20)
+        return substr(t, 8, 4) months[substr(t, 4, 3)] substr(t, 1, 2) \
+            substr(t, 13, 2) substr(t, 16, 2) substr(t, 19, 2)
+    }
+    if (match(line, error)) {
+        return substr(line, 1, 4) substr(line, 6, 2) substr(line, 9, 2) \
+            substr(line, 12, 2) substr(line, 15, 2) substr(line, 18, 2)
+    }
+    if (match(line, apache)) {
+        split(substr(line, 2, RLENGTH - 2), parts, " ")
+        t = parts[4]
+        return parts[5] months[parts[2]] parts[3] \
+            substr(t, 1, 2) substr(t, 4, 2) substr(t, 7, 2)
+    }
+    return ""
+}
+{
+    key = time_key($0)
+    if (key != "")
+        keep = (since == "" || key >= since) && (until == "" || key < until)
+    if (keep) print
+}
+"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def get_list_script(self) -> str:
+        path = shlex.quote(self.path)
+        return (
+            f'for f in {path} {path}.* {path}-*; do '
+            '[ -f "$f" ] && stat -L -c "%i %s %Y %n" -- "$f"; '
+            'done; true')
+
+    def get_list_command(self) -> str:
+        return f"sh -c {shlex.quote(self.get_list_script())}"
+
+    def get_rotation(self, path: str) -> int:
+        """
+        Age rank of a rotated file from its suffix, None
+        for files that are not rotations of the log
+        """
+
+        if path == self.path:
+            return 0
+        if not path.startswith(self.path):
+            return None
+        match = self.SUFFIX.match(path[len(self.path):])
+        if match is None:
+            return None
+        number, date, _ = match.groups()
+        # Numbered files are older as the number grows,
+        # dated files are older as the date gets smaller
+        return int(number) if number else -int(date)
+
+    def parse_files(self, output: str) -> List[LogFile]:
+        """
+        Parse the listing into files, oldest first
+        """
+
+        files = []
+        for line in output.splitlines():
+            parts = line.split(' ', 3)
+            if len(parts) != 4 or not parts[0].isdigit():
+                continue
+            inode, size, mtime, path = parts
+            rotation = self.get_rotation(path)
+            if rotation is not None:
+                files.append((
+                    rotation == 0, int(mtime), -rotation,
+                    LogFile(path, int(inode), int(size), int(mtime))))
+        return [log_file for *_, log_file in sorted(files)]
+
+    @staticmethod
+    def get_time_key(time: datetime) -> str:
+        return time.strftime('%Y%m%d%H%M%S') if time else ''
+
+    def get_range_files(
+        self, files: List[LogFile], since: datetime = None,
+        until: datetime = None, server_tz: tzinfo = timezone.utc
+    ) -> List[LogFile]:
+        """
+        Rotated files holding lines of the range, a file holds
+        the lines written after the file before it was rotated.
+        since and until are naive server local times, the file
+        times are converted to them with server_tz.
+        """
+
+        def get_local_time(log_file: LogFile) -> datetime:
+            return datetime.fromtimestamp(log_file.mtime, server_tz)\
+                .replace(tzinfo=None)
+
+        rotated = [
+            log_file for log_file in files if log_file.path != self.path]
+        selected = []
+        previous = None
+        for log_file in rotated:
+            modified = get_local_time(log_file)
+            started = get_local_time(previous) if previous else None
+            previous = log_file
+            if since is not None and modified < since:
+                continue
+            if until is not None and started is not None \
+                    and started >= until:
+                continue
+            selected.append(log_file)
+        return selected
+
+    def get_range_script(
+        self, files: List[LogFile], since: datetime = None,
+        until: datetime = None, length: int = None
+    ) -> str:
+        """
+        Shell script printing the lines of the range in files,
+        cut at length bytes
+        """
+
+        reads = '; '.join(
+            f"{log_file.get_read_command()} 2>/dev/null"
+            for log_file in files)
+        since_key = shlex.quote(self.get_time_key(since))
+        until_key = shlex.quote(self.get_time_key(until))
+        awk = (
+            f"awk -v since={since_key} -v until={until_key} "
+            f"{shlex.quote(self.TIME_FILTER)}")
+        length = length or RemoteLog.MAX_LENGTH
+        return f"{{ {reads}; }} | {awk} | head -c {length}"
+
+    def get_range_command(self, *args, **kwargs) -> str:
+        return f"sh -c {shlex.quote(self.get_range_script(*args, **kwargs))}"
+
+    @staticmethod
+    def parse_lines(output: bytes) -> List[str]:
+        """
+        Whole lines of a command output
+        """
+
+        data = output[:output.rfind(b'\n') + 1]
+        return [line.decode(errors='replace') for line in data.splitlines()]
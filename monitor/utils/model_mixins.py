@@ -1,4 +1,10 @@
+from datetime import datetime
+from typing import Iterable, List
+
 from django.db import models
+from django.utils import timezone
+
+from utils.scheduler import check_schedule
 
 
 class ModelChangeFunc(models.Model):
@@ -47,3 +53,102 @@ class ModelChangeFunc(models.Model):
             clone_field = f"__{field}"
             default_value = getattr(self, field, None)
             setattr(self, clone_field, default_value)
+
+
+class CheckStateMixin:
+    """
+    Saving of check results for models with
+    active and last_checked fields
+    """
+
+    @classmethod
+    def save_states(
+        cls, objects: List[models.Model], states: Iterable[bool]
+    ) -> List[models.Model]:
+        """
+        Save check results, active is only written for objects
+        whose state changed and last_checked is set with one query
+
+        :param objects: Checked objects of this model
+        :type objects: List[models.Model]
+        :param states: New active state of each object
+        :type states: Iterable[bool]
+        :return: Objects whose state changed
+        :rtype: List[models.Model]
+        """
+        checked_at = timezone.now()
+        changed = []
+        for obj, state in zip(objects, states):
+            if obj.active != state:
+                obj.active = state
+                changed.append(obj)
+            obj.last_checked = checked_at
+
+        if changed:
+            cls.objects.bulk_update(changed, ['active'])
+        if objects:
+            cls.objects.filter(pk__in=[obj.pk for obj in objects])\
+                .update(last_checked=checked_at)
+        return changed
+
+
+class ScheduledCheck(models.Model):
+    """
+    Adaptive check schedule fields and helpers, used with
+    CheckStateMixin. Each check sets when the next one is due.
+    """
+
+    class Meta:
+        abstract = True
+
+    next_check = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True)
+    current_interval = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    stable_checks = models.PositiveIntegerField(default=0, editable=False)
+
+    def get_schedule_key(self) -> str:
+        return f"{self._meta.label}:{self.pk}"
+
+    def get_interval_override(self) -> int:
+        """
+        Interval in seconds set by the user, None to adapt it
+        """
+        return None
+
+    @classmethod
+    def get_due(cls, now: datetime = None) -> models.QuerySet:
+        """
+        Get the objects whose next check is due
+        """
+        now = now or timezone.now()
+        return cls.objects.filter(
+            models.Q(next_check__isnull=True) | models.Q(next_check__lte=now))
+
+    @classmethod
+    def schedule_checks(
+        cls, objects: List['ScheduledCheck'],
+        changed: List['ScheduledCheck'], checked_at: datetime
+    ):
+        """
+        Set the next check of objects after a check, the
+        schedule of all objects is written with one query
+
+        :param objects: Checked objects with their new state
+        :type objects: List[ScheduledCheck]
+        :param changed: Objects whose state changed
+        :type changed: List[ScheduledCheck]
+        """
+        changed = {obj.pk for obj in changed}
+        for obj in objects:
+            obj.stable_checks = 0 if obj.pk in changed \
+                else obj.stable_checks + 1
+            obj.current_interval = check_schedule.get_interval(
+                obj.current_interval, obj.active, obj.stable_checks,
+                obj.get_interval_override())
+            obj.next_check = check_schedule.get_next_check(
+                obj.get_schedule_key(), checked_at, obj.current_interval)
+
+        if objects:
+            cls.objects.bulk_update(
+                objects, ['next_check', 'current_interval', 'stable_checks'])
@@ -1,7 +1,16 @@
+import codecs
+import select
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from io import StringIO
+from typing import List
 
 import paramiko
 
+from utils.remote_script import CommandResult, RemoteBatch
+
 
 class ExcecuteError(Exception):
     """
@@ -25,16 +34,216 @@ class ExcecuteError(Exception):
         super().__init__(message)
 
 
+class CommandTimeout(Exception):
+    """
+    Exception raised when a streamed command
+    runs for longer than its timeout
+    """
+
+
+class OutputLimitExceeded(Exception):
+    """
+    Exception raised when a streamed command
+    returns more bytes than its output cap
+    """
+
+
+class ChannelBusy(Exception):
+    """
+    Exception raised when no channel slot was
+    available before the queue timeout
+    """
+
+
+class ChannelLimiter:
+    """
+    Limit the channels open at the same time on one
+    transport, callers over the limit wait in a first
+    come first served queue
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.__active = 0
+        self.__waiters = deque()
+        self.__lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Wait for a free channel slot
+
+        :param timeout: Seconds to wait in queue, defaults to None
+        :type timeout: float, optional
+        :return: True if a slot was gotten
+        :rtype: bool
+        """
+
+        with self.__lock:
+            if self.__active < self.limit and not self.__waiters:
+                self.__active += 1
+                return True
+            waiter = threading.Event()
+            self.__waiters.append(waiter)
+
+        if waiter.wait(timeout):
+            return True
+
+        with self.__lock:
+            if waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+                return False
+
+        # Slot was handed over while timing out
+        return True
+
+    def release(self):
+        """
+        Free a slot, it is handed over to the
+        longest waiting caller if there is one
+        """
+
+        with self.__lock:
+            if self.__waiters:
+                self.__waiters.popleft().set()
+            else:
+                self.__active -= 1
+
+    def in_use(self) -> int:
+        return self.__active
+
+    def waiting(self) -> int:
+        return len(self.__waiters)
+
+
+class CommandStream:
+    """
+    Output of a running command, stdout and stderr are read
+    together in chunks as they arrive so the channel window
+    never fills up, and nothing is kept in memory by default.
+
+    Iterate over it to get (stream name, bytes) chunks, status
+    is set once the command exits.
+    """
+    CHUNK_SIZE = 32768
+    POLL_INTERVAL = 0.5
+
+    def __init__(
+        self, channel: paramiko.Channel, timeout: float = None,
+        max_bytes: int = None, truncate: bool = False, on_close=None
+    ) -> None:
+        self.channel = channel
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.truncate = truncate
+        self.on_close = on_close
+
+        self.status = None
+        self.truncated = False
+        self.received = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the channel and free its slot
+        """
+
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+            if self.on_close is not None:
+                self.on_close()
+
+    def __count(self, data: bytes) -> bytes:
+        """
+        Count bytes received and apply output cap
+        """
+
+        if self.max_bytes is not None:
+            left = self.max_bytes - self.received
+            if len(data) > left:
+                if not self.truncate:
+                    self.close()
+                    raise OutputLimitExceeded(
+                        f"Output is over {self.max_bytes} bytes")
+                self.truncated = True
+                data = data[:left]
+        self.received += len(data)
+        return data
+
+    def __finished(self) -> bool:
+        channel = self.channel
+        return channel.exit_status_ready() and not (
+            channel.recv_ready() or channel.recv_stderr_ready())
+
+    def __iter__(self):
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.monotonic() + self.timeout
+
+        try:
+            while not self.truncated and not self.__finished():
+                if deadline is not None and time.monotonic() > deadline:
+                    raise CommandTimeout(
+                        f"Command ran over {self.timeout} seconds")
+                select.select([self.channel], [], [], self.POLL_INTERVAL)
+
+                while self.channel.recv_ready() and not self.truncated:
+                    data = self.channel.recv(self.CHUNK_SIZE)
+                    yield 'stdout', self.__count(data)
+
+                while self.channel.recv_stderr_ready() \
+                        and not self.truncated:
+                    data = self.channel.recv_stderr(self.CHUNK_SIZE)
+                    yield 'stderr', self.__count(data)
+
+            if not self.truncated:
+                self.status = self.channel.recv_exit_status()
+        finally:
+            self.close()
+
+    def lines(self, stream_name: str = 'stdout'):
+        """
+        Decoded lines of one stream, the other stream is dropped
+        """
+
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        for name, data in self:
+            if name != stream_name:
+                continue
+            pending += decoder.decode(data)
+            *lines, pending = pending.split('\n')
+            yield from lines
+
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+
 class SshClient:
     """
     A wrapper of paramiko.SSHClient
     Created for reducing commands and to call
     sudo command when needed
+
+    One client can be used by many threads at once, each command
+    runs on its own channel over the same transport and the open
+    channels are kept under the server MaxSessions
     """
     TIMEOUT = 4
 
+    # Default MaxSessions of sshd
+    MAX_SESSIONS = 10
+    QUEUE_TIMEOUT = 120
+
     def __init__(
-        self, host, port, username, password, key=None, passphrase=None
+        self, host, port, username, password, key=None, passphrase=None,
+        max_sessions=None
     ):
         """
         Initializes and creates new ssh client
@@ -42,6 +251,7 @@ class SshClient:
 
         self.username = username
         self.password = password
+        self.channels = ChannelLimiter(max_sessions or self.MAX_SESSIONS)
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         if key is not None:
@@ -60,6 +270,41 @@ class SshClient:
             self.client.close()
             self.client = None
 
+    def get_transport(self) -> paramiko.Transport:
+        if self.client is not None:
+            return self.client.get_transport()
+
+    def is_active(self) -> bool:
+        """
+        Check if the client transport is still connected
+        """
+        transport = self.get_transport()
+        return transport is not None and transport.is_active()
+
+    def set_keepalive(self, interval: int):
+        """
+        Send keepalive packets every interval seconds,
+        so dead connections are found early
+        """
+        transport = self.get_transport()
+        if transport is not None:
+            transport.set_keepalive(interval)
+
+    @contextmanager
+    def session(self):
+        """
+        Hold one channel slot on the transport
+
+        :raises ChannelBusy: No slot was freed before queue timeout
+        """
+
+        if not self.channels.acquire(self.QUEUE_TIMEOUT):
+            raise ChannelBusy
+        try:
+            yield
+        finally:
+            self.channels.release()
+
     def file_exists(self, file_name: str):
         """
         Check if a file exists in server
@@ -73,7 +318,14 @@ class SshClient:
 
         return True if stdout == '1' else False
 
-    def execute(self, command, sudo=False, raise_exception=True) -> str:
+    def prepare_command(self, command: str, sudo=False):
+        """
+        Prefix command with sudo when needed
+
+        :return: command to run and whether password should be fed
+        :rtype: Tuple[str, bool]
+        """
+
         feed_password = False
 
         if sudo and self.username != "root":
@@ -81,16 +333,60 @@ class SshClient:
             feed_password = self.password is not None \
                 and len(self.password) > 0
 
-        stdin, stdout, stderr = self.client.exec_command(command)
+        return command, feed_password
 
-        if feed_password:
-            stdin.write(self.password + "\n")
-            stdin.flush()
+    def stream(
+        self, command: str, sudo=False, timeout: float = None,
+        max_bytes: int = None, truncate=False
+    ) -> CommandStream:
+        """
+        Start a command and return its output stream, the channel
+        slot is held until the stream is exhausted or closed
+
+        :param timeout: Seconds the command can run, defaults to None
+        :type timeout: float, optional
+        :param max_bytes: Output cap in bytes, defaults to None
+        :type max_bytes: int, optional
+        :param truncate: Stop reading at the cap instead of
+        raising OutputLimitExceeded, defaults to False
+        :type truncate: bool, optional
+        :rtype: CommandStream
+        """
+
+        command, feed_password = self.prepare_command(command, sudo)
+
+        if not self.channels.acquire(self.QUEUE_TIMEOUT):
+            raise ChannelBusy
+        try:
+            channel = self.get_transport().open_session()
+            channel.exec_command(command)
+            if feed_password:
+                channel.sendall((self.password + "\n").encode())
+        except Exception:
+            self.channels.release()
+            raise
+
+        return CommandStream(
+            channel, timeout=timeout, max_bytes=max_bytes,
+            truncate=truncate, on_close=self.channels.release)
+
+    def execute(
+        self, command, sudo=False, raise_exception=True,
+        timeout: float = None, max_bytes: int = None
+    ) -> str:
+        stdout, stderr = [], []
+        output = {'stdout': stdout, 'stderr': stderr}
+
+        with self.stream(
+            command, sudo=sudo, timeout=timeout, max_bytes=max_bytes
+        ) as command_stream:
+            for name, data in command_stream:
+                output[name].append(data)
+            status = command_stream.status
 
         # Get stdout, status
-        status = stdout.channel.recv_exit_status()
-        stderr = stderr.read().decode()
-        stdout = stdout.read().decode()
+        stderr = b''.join(stderr).decode(errors='replace')
+        stdout = b''.join(stdout).decode(errors='replace')
 
         if raise_exception:
             if status != 0:
@@ -101,6 +397,33 @@ class SshClient:
         # Returns stdout, stderr, status
         return stdout, stderr, status
 
+    def execute_batch(
+        self, commands: List[str], sudo=False, timeout: float = None
+    ) -> List[CommandResult]:
+        """
+        Run many commands in one round trip, sudo password
+        is only fed once for the whole batch
+
+        :param commands: Commands to run in order
+        :type commands: List[str]
+        :return: Result for each command
+        :rtype: List[CommandResult]
+        """
+
+        if not commands:
+            return []
+
+        batch = RemoteBatch(commands)
+        stdout, stderr, status = self.execute(
+            batch.get_command(), sudo=sudo, raise_exception=False,
+            timeout=timeout)
+        results = batch.parse(stdout)
+
+        if status != 0 and all(result.status is None for result in results):
+            raise ExcecuteError(stdout=stdout, stderr=stderr, status=status)
+
+        return results
+
 
 class Dir(object):
     """
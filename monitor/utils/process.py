@@ -7,18 +7,79 @@ ssh services
 import json
 import logging
 import os
-from typing import Dict, Tuple
+import shlex
+from datetime import datetime, timedelta, timezone, tzinfo
+from fnmatch import fnmatchcase
+from typing import Dict, Iterator, List, NamedTuple, Tuple
 from uuid import uuid4
 
 from django.conf import settings
-from django.utils.safestring import SafeString, mark_safe
 from django.utils.text import slugify
 
-from utils.general import cryptor, get_in_dict_format, get_name_from_text
+from utils.connection_pool import connection_pool
+from utils.general import cryptor, get_in_dict_format
+from utils.journal import JournalPage, JournalQuery
+from utils.logs import (AccessLogAggregation, AccessStats, LogBytes, LogChunk,
+                        LogFile, LogSearch, LogSearchResult, LogTimeRange,
+                        RemoteLog, RotatedLog)
 from utils.paramiko_wrapper import Dir, ExcecuteError, SshClient
+from utils.timeline import JournalSource, RemoteLogSource, to_utc
+from utils.remote_script import CommandResult, FileDump, RemoteFile
 from utils.webservers import create_web_server
 
 
+class UnitState(NamedTuple):
+    """
+    State of a systemd unit
+    """
+    PROPERTIES = ('Id', 'LoadState', 'ActiveState', 'SubState', 'MainPID')
+
+    id: str
+    load_state: str
+    active_state: str
+    sub_state: str
+    main_pid: int
+
+    @property
+    def is_active(self) -> bool:
+        return self.active_state == 'active'
+
+    @classmethod
+    def from_properties(cls, properties: Dict[str, str]) -> 'UnitState':
+        main_pid = properties.get('MainPID', '')
+        return cls(
+            id=properties.get('Id', ''),
+            load_state=properties.get('LoadState', ''),
+            active_state=properties.get('ActiveState', ''),
+            sub_state=properties.get('SubState', ''),
+            main_pid=int(main_pid) if main_pid.isdigit() else None)
+
+
+def parse_systemctl_show(text: str) -> List[Dict[str, str]]:
+    """
+    Parse systemctl show output of many units in one pass,
+    unit blocks are separated by empty lines
+
+    :param text: Output of systemctl show
+    :type text: str
+    :return: Properties of each unit in output order
+    :rtype: List[Dict[str, str]]
+    """
+
+    blocks = []
+    current = None
+    for line in text.splitlines():
+        if not line.strip():
+            current = None
+            continue
+        if current is None:
+            current = {}
+            blocks.append(current)
+        key, _, value = line.partition('=')
+        current[key] = value
+    return blocks
+
+
 class NoServerClient(Exception):
     """
     Exception for no server client
@@ -38,38 +99,62 @@ class EmptyFilePath(Exception):
 
 
 class ServerProcess:
+    # Output cap for logs shown in the panel
+    LOG_MAX_BYTES = 5 * 1024 * 1024
+    LOG_TIMEOUT = 60
+
     def __init__(
-        self, host: str, username: str, password: str, web_server: str
+        self, host: str, username: str, password: str, web_server: str,
+        pool_key=None
     ) -> None:
         self.__host = host
         self.__username = username
         self.__password = cryptor.decrypt(password)
         self.__port = 22
 
+        # Clients are shared through the connection pool when set
+        self.pool_key = pool_key
+
         self.client: SshClient = None
 
         self.web_server = create_web_server(web_server, self.get_host())
 
         self.__server_details = None
 
+    def connect(self) -> SshClient:
+        """
+        Open a new ssh connection to the server
+        """
+
+        return SshClient(
+            self.get_host(), self.__port,
+            self.get_username(), self.__password)
+
     def create_client(self):
         """
-        Connect and create new server ssh client
+        Connect and create new server ssh client, pooled
+        connections are reused when the process has a pool key
         """
 
         if self.client is None:
-            self.client = SshClient(
-                self.get_host(), self.__port,
-                self.get_username(), self.__password)
+            if self.pool_key is None:
+                self.client = self.connect()
+            else:
+                self.client = connection_pool.acquire(
+                    self.pool_key, self.connect)
 
     def destroy(self):
         """
-        Kills the client connection and delete client
+        Kills the client connection and delete client,
+        pooled connections are given back to the pool
         """
 
         client = getattr(self, 'client', None)
         if client is not None:
-            self.client.close()
+            if getattr(self, 'pool_key', None) is None:
+                client.close()
+            else:
+                connection_pool.release(client)
             self.client = None
 
     def __del__(self):
@@ -172,16 +257,65 @@ class ServerProcess:
 
         return self.get_server_details().get('HOME_URL')
 
+    def run_batch(
+        self, commands: List[str], sudo=False
+    ) -> List[CommandResult]:
+        """
+        Run many commands on the server in one round trip
+
+        :param commands: Commands to run in order
+        :type commands: List[str]
+        :return: stdout, stderr and exit status of each command
+        :rtype: List[CommandResult]
+        """
+
+        return self.get_client().execute_batch(commands, sudo=sudo)
+
+    def files_exist(self, paths: List[str]) -> Dict[str, bool]:
+        """
+        Check many paths on the server in one round trip
+        """
+
+        commands = [f"test -e {shlex.quote(path)}" for path in paths]
+        results = self.run_batch(commands, sudo=True)
+        return {
+            path: result.status == 0
+            for path, result in zip(paths, results)}
+
     def get_active_state(self, service_name: str):
         """
-        Get the status of a running service
+        Get the status of a running service, a unit systemctl
+        prints nothing for is inactive
+        """
+
+        unit = self.get_units_state([service_name]).get(service_name)
+        return unit is not None and unit.is_active
+
+    def get_units_state(
+        self, service_names: List[str]
+    ) -> Dict[str, UnitState]:
+        """
+        Get the state of many systemd units with one command
+
+        :param service_names: Unit names as given to systemctl
+        :type service_names: List[str]
+        :return: State of each unit by its given name
+        :rtype: Dict[str, UnitState]
         """
 
-        command = f"systemctl show {service_name} --no-page"
+        if not service_names:
+            return {}
+
+        units = ' '.join(shlex.quote(name) for name in service_names)
+        properties = ','.join(UnitState.PROPERTIES)
+        command = f"systemctl show --no-pager -p {properties} -- {units}"
         stdout = self.get_client().execute(command, sudo=True)
 
-        value = get_name_from_text('ActiveState', stdout)
-        return value == 'active'
+        # systemctl prints one block per unit in the order given
+        blocks = parse_systemctl_show(stdout)
+        return {
+            name: UnitState.from_properties(block)
+            for name, block in zip(service_names, blocks)}
 
     def get_base_directory(self) -> str:
         """
@@ -245,11 +379,13 @@ class ServerProcess:
         return stdout
 
     def __write_content(self, file_path: str, content: str):
-        ftp = self.get_client().client.open_sftp()
-        file = ftp.file(file_path, "w", -1)
-        file.write(content)
-        file.flush()
-        ftp.close()
+        client = self.get_client()
+        with client.session():
+            ftp = client.client.open_sftp()
+            file = ftp.file(file_path, "w", -1)
+            file.write(content)
+            file.flush()
+            ftp.close()
 
     def write_file(self, file_path: str, content: str):
         if self.need_sudo(file_path):
@@ -259,30 +395,397 @@ class ServerProcess:
         else:
             self.__write_content(file_path, content)
 
-    def get_log_content(self, log_path: str) -> SafeString:
+    def read_output_bytes(
+        self, command: str, sudo=False, max_bytes: int = None
+    ) -> bytes:
         """
-        Get read log from server
+        Stream a command output and stop reading at max_bytes,
+        so huge outputs never get fully loaded in memory
+
+        :param max_bytes: Output cap, defaults to LOG_MAX_BYTES
+        :type max_bytes: int, optional
+        :return: Stdout, cut at the cap
+        :rtype: bytes
         """
 
-        log_text = self.read_file(log_path)
+        if max_bytes is None:
+            max_bytes = self.LOG_MAX_BYTES
 
-        if log_text.strip():
-            log_text = log_text.replace('\n', '<br><br>')
-            return mark_safe(log_text)
+        with self.get_client().stream(
+            command, sudo=sudo, timeout=self.LOG_TIMEOUT,
+            max_bytes=max_bytes, truncate=True
+        ) as command_stream:
+            chunks = [
+                data for name, data in command_stream if name == 'stdout']
 
-        return 'No Logs'
+            if command_stream.status not in (0, None):
+                raise ExcecuteError(status=command_stream.status)
 
-    def get_service_logs(self, name: str) -> SafeString:
-        """Get journalctl logs for a service
+        return b''.join(chunks)
 
-        :return: Mark Safe text
-        :rtype: django.utils.safestring.marksafe
+    def read_output(
+        self, command: str, sudo=False, max_bytes: int = None
+    ) -> str:
         """
+        Same as read_output_bytes with the output decoded
+        """
+
+        output = self.read_output_bytes(command, sudo, max_bytes)
+        return output.decode(errors='replace')
+
+    def get_log_chunk(
+        self, log_path: str, since: datetime = None, until: datetime = None,
+        rotated: bool = False, **window
+    ) -> LogChunk:
+        """
+        Read one window of a log file, the server only
+        sends the bytes of the window
+
+        :param log_path: Log file path
+        :type log_path: str
+        :param since: Only lines from this time, defaults to None
+        :type since: datetime, optional
+        :param until: Only lines before this time, defaults to None
+        :type until: datetime, optional
+        :param rotated: Continue the last lines and time ranges
+        in the rotated files of the log, defaults to False
+        :type rotated: bool, optional
+        :param window: offset and length, or lines, see RemoteLog
+        :rtype: LogChunk
+        """
+
+        if not log_path:
+            raise EmptyFilePath
+
+        # Windows from an offset are continuations in the live file
+        rotated = rotated and window.get('offset') is None
+
+        if since is not None or until is not None:
+            time_range = LogTimeRange(
+                lambda offset, length: self.get_log_chunk(
+                    log_path, offset=offset, length=length),
+                since=since, until=until)
+            chunk = time_range.read(
+                window.get('offset'), window.get('length'))
+            if rotated and not chunk.has_before():
+                older = self.get_rotated_range(log_path, since, until)
+                chunk = chunk._replace(lines=older + chunk.lines)
+            return chunk
+
+        remote_log = RemoteLog(log_path, **window)
+        output = self.read_output_bytes(
+            remote_log.get_command(), sudo=self.need_sudo(log_path),
+            max_bytes=remote_log.MAX_LENGTH + 1024)
+        chunk = remote_log.parse(output)
+
+        missing = remote_log.lines - len(chunk.lines)
+        if rotated and missing > 0 and not chunk.has_before():
+            older = self.get_rotated_tail(log_path, missing)
+            chunk = chunk._replace(lines=older + chunk.lines)
+        return chunk
+
+    def get_log_files(self, log_path: str) -> List[LogFile]:
+        """
+        List a log file and its rotated files with one command
+
+        :param log_path: Live log file path
+        :type log_path: str
+        :return: Files, oldest first and the live file last
+        :rtype: List[LogFile]
+        """
+
+        rotated_log = RotatedLog(log_path)
+        output = self.read_output(
+            rotated_log.get_list_command(), sudo=self.need_sudo(log_path))
+        return rotated_log.parse_files(output)
 
-        command = f'journalctl -u {name} --no-page'
-        logs: str = self.get_client().execute(command, sudo=True)
-        logs = logs.replace('\n', '<br><br>')
-        return mark_safe(logs)
+    def get_rotated_tail(self, log_path: str, lines: int) -> List[str]:
+        """
+        Get the last lines of the rotated files of a log, files
+        are read from the newest until enough lines are found
+        """
+
+        files = [
+            log_file for log_file in self.get_log_files(log_path)
+            if log_file.path != log_path]
+
+        found: List[str] = []
+        for log_file in reversed(files):
+            output = self.read_output_bytes(
+                log_file.get_tail_command(lines - len(found)),
+                sudo=self.need_sudo(log_path),
+                max_bytes=RemoteLog.MAX_LENGTH)
+            found = RotatedLog.parse_lines(output) + found
+            if len(found) >= lines:
+                break
+        return found[-lines:]
+
+    def get_rotated_range(
+        self, log_path: str, since: datetime = None, until: datetime = None
+    ) -> List[str]:
+        """
+        Get the lines of a time range in the rotated files of a
+        log, files are filtered as one stream on the server and
+        files outside the range are not read
+        """
+
+        rotated_log = RotatedLog(log_path)
+        files = rotated_log.get_range_files(
+            self.get_log_files(log_path), since, until,
+            self.get_timezone())
+        if not files:
+            return []
+
+        output = self.read_output_bytes(
+            rotated_log.get_range_command(files, since, until),
+            sudo=self.need_sudo(log_path),
+            max_bytes=RemoteLog.MAX_LENGTH + 1024)
+        return RotatedLog.parse_lines(output)
+
+    def get_log_bytes(
+        self, log_path: str, offset: int, length: int = None
+    ) -> LogBytes:
+        """
+        Read the raw bytes of a log file from offset
+
+        :param log_path: Log file path
+        :type log_path: str
+        :param offset: First byte to read
+        :type offset: int
+        :param length: Bytes to read, defaults to RemoteLog.LENGTH
+        :type length: int, optional
+        :rtype: LogBytes
+        """
+
+        if not log_path:
+            raise EmptyFilePath
+
+        remote_log = RemoteLog(log_path, offset=offset, length=length)
+        output = self.read_output_bytes(
+            remote_log.get_command(), sudo=self.need_sudo(log_path),
+            max_bytes=remote_log.MAX_LENGTH + 1024)
+        return remote_log.parse_bytes(output)
+
+    def iter_log_lines(
+        self, log_path: str, since: datetime = None, until: datetime = None,
+        length: int = None, end: int = None
+    ) -> Iterator[str]:
+        """
+        Iterate over the lines of a log time range, the range
+        is read in parts of length bytes
+
+        :param log_path: Log file path
+        :type log_path: str
+        :param since: Only lines from this time, defaults to None
+        :type since: datetime, optional
+        :param until: Only lines before this time, defaults to None
+        :type until: datetime, optional
+        :param length: Bytes read at once, defaults to None
+        :type length: int, optional
+        :param end: Offset of a line start the range stops at,
+        defaults to None
+        :type end: int, optional
+        """
+
+        time_range = LogTimeRange(
+            lambda offset, length: self.get_log_chunk(
+                log_path, offset=offset, length=length),
+            since=since, until=until)
+        start, stop = time_range.get_offsets()
+        if end is not None:
+            stop = min(stop, end)
+
+        # The offsets are line starts, every line between is in range
+        length = min(length or RemoteLog.MAX_LENGTH, RemoteLog.MAX_LENGTH)
+        while start < stop:
+            chunk = self.get_log_chunk(
+                log_path, offset=start, length=min(stop - start, length))
+            if chunk.end <= start:
+                break
+            yield from chunk.lines
+            start = chunk.end
+
+    def get_access_stats(
+        self, log_path: str, since: datetime = None, until: datetime = None,
+        top: int = None
+    ) -> AccessStats:
+        """
+        Aggregate the requests of an access log time range on the
+        server, only the aggregates are sent back
+
+        :param log_path: Access log file path
+        :type log_path: str
+        :param since: Only requests from this time, defaults to None
+        :type since: datetime, optional
+        :param until: Only requests before this time, defaults to None
+        :type until: datetime, optional
+        :param top: Length of the top paths and ips, defaults to None
+        :type top: int, optional
+        :rtype: AccessStats
+        """
+
+        if not log_path:
+            raise EmptyFilePath
+
+        time_range = LogTimeRange(
+            lambda offset, length: self.get_log_chunk(
+                log_path, offset=offset, length=length),
+            since=since, until=until)
+        start, stop = time_range.get_offsets()
+
+        aggregation = AccessLogAggregation(top)
+        output = self.read_output(
+            aggregation.get_command(log_path, start, stop),
+            sudo=self.need_sudo(log_path))
+        return aggregation.parse(output)
+
+    def search_log(
+        self, log_path: str, search: LogSearch, rotated: bool = False
+    ) -> LogSearchResult:
+        """
+        Search a log file on the server
+
+        :param log_path: Log file path
+        :type log_path: str
+        :param search: Search to run
+        :type search: LogSearch
+        :param rotated: Search the rotated files too, oldest
+        first, defaults to False
+        :type rotated: bool, optional
+        :rtype: LogSearchResult
+        """
+
+        if not log_path:
+            raise EmptyFilePath
+
+        if rotated:
+            command = search.get_files_command(self.get_log_files(log_path))
+        else:
+            command = search.get_file_command(log_path)
+
+        output = self.read_output(command, sudo=self.need_sudo(log_path))
+        return search.parse(output)
+
+    def search_service_logs(
+        self, name: str, search: LogSearch
+    ) -> LogSearchResult:
+        """
+        Search the journal of a service on the server, line numbers
+        and offsets are counted in the journalctl output
+        """
+
+        command = f"journalctl -u {shlex.quote(name)} --no-pager -o short-iso"
+        output = self.read_output(search.get_pipe_command(command), sudo=True)
+        return search.parse(output)
+
+    def get_log_content(self, log_path: str) -> List[str]:
+        """
+        Get the last lines of a log from server
+        """
+
+        return self.get_log_chunk(log_path).lines
+
+    def get_service_logs(
+        self, name: str, since: datetime = None, until: datetime = None
+    ) -> List[str]:
+        """Get the last journalctl logs for a service
+
+        :param since: Only logs from this time, defaults to None
+        :type since: datetime, optional
+        :param until: Only logs before this time, defaults to None
+        :type until: datetime, optional
+        :return: Lines in the journalctl short format
+        :rtype: List[str]
+        """
+
+        page = self.get_journal_page(name, since=since, until=until)
+        return [
+            f"{entry.time:%b %d %H:%M:%S} {entry.identifier or name}"
+            f"[{entry.pid or ''}]: {entry.message}"
+            for entry in page.entries]
+
+    def get_journal_page(self, name: str, **query) -> JournalPage:
+        """
+        Get one page of journal entries of a service, only the
+        entries of the page are sent by the server
+
+        :param name: Service unit name
+        :type name: str
+        :param query: lines, since, until, before or after
+        cursor, see JournalQuery
+        :return: Entries in time order
+        :rtype: JournalPage
+        """
+
+        journal_query = JournalQuery(name, **query)
+        with self.get_client().stream(
+            journal_query.get_command(), sudo=True,
+            timeout=self.LOG_TIMEOUT, max_bytes=self.LOG_MAX_BYTES,
+            truncate=True
+        ) as command_stream:
+            return journal_query.parse(command_stream.lines())
+
+    def get_timezone(self) -> tzinfo:
+        """
+        Get the current UTC offset of the server local time,
+        the time log lines are written in
+
+        :raises ValueError: When the offset can not be read
+        :rtype: tzinfo
+        """
+
+        text = self.get_client().execute('date +%z').strip()
+        if len(text) != 5 or text[0] not in '+-' \
+                or not text[1:].isdigit():
+            raise ValueError(f'Invalid UTC offset {text!r}')
+        offset = timedelta(hours=int(text[1:3]), minutes=int(text[3:5]))
+        return timezone(-offset if text[0] == '-' else offset)
+
+    def get_timeline_source(
+        self, log_path: str, since: datetime = None,
+        server_tz: tzinfo = timezone.utc
+    ) -> RemoteLogSource:
+        """
+        Get a log file as a timeline source, the offset of
+        since is found when the first line is read
+
+        :param server_tz: Time zone of the log times,
+        see get_timezone, defaults to UTC
+        :type server_tz: tzinfo, optional
+        """
+
+        if not log_path:
+            raise EmptyFilePath
+
+        # Log times are compared as written, in server local time
+        local_since = None
+        if since is not None:
+            local_since = to_utc(since).astimezone(server_tz)\
+                .replace(tzinfo=None)
+
+        def locate() -> int:
+            time_range = LogTimeRange(
+                lambda offset, length: self.get_log_chunk(
+                    log_path, offset=offset, length=length),
+                since=local_since)
+            return time_range.get_offsets()[0]
+
+        return RemoteLogSource(
+            log_path,
+            lambda offset, length: self.get_log_bytes(
+                log_path, offset, length),
+            locate, since, server_tz)
+
+    def get_journal_source(
+        self, name: str, since: datetime = None
+    ) -> JournalSource:
+        """
+        Get the journal of a service as a timeline source
+        """
+
+        return JournalSource(
+            name, lambda **query: self.get_journal_page(name, **query),
+            since)
 
     def get_list_dir_command(self, path: str) -> str:
         return f"ls -la {path}"
@@ -301,22 +804,72 @@ class ServerProcess:
         stdout = self.get_client().execute(command)
         return self.get_directory_filenames(stdout)
 
+    def stream_files(
+        self, command: str, dump: FileDump, content=True
+    ) -> Iterator[RemoteFile]:
+        with self.get_client().stream(command, sudo=True) as command_stream:
+            yield from dump.parse_lines(command_stream.lines(), content)
+
+    def iter_enabled_files(
+        self, content=True, checksum=False
+    ) -> Iterator[RemoteFile]:
+        """
+        Stream every enabled web server configuration file with its
+        mtime and inode, all files come from one remote command
+
+        :param content: Fetch file contents too, defaults to True
+        :type content: bool, optional
+        :param checksum: Add the sha1 of each file, defaults to False
+        :type checksum: bool, optional
+        :rtype: Iterator[RemoteFile]
+        """
+
+        dump = FileDump()
+        command = dump.get_directory_command(
+            self.web_server.get_enabled_path(), content, checksum)
+        return self.stream_files(command, dump, content)
+
+    def iter_files(
+        self, paths: List[str], content=True, checksum=False, expand=False
+    ) -> Iterator[RemoteFile]:
+        """
+        Stream many files from the server in one remote command,
+        missing files are skipped and wildcards in paths are
+        expanded when expand is set
+        """
+
+        dump = FileDump()
+        command = dump.get_files_command(paths, content, checksum, expand)
+        return self.stream_files(command, dump, content)
+
+    def fetch_includes(
+        self, patterns: List[str], content=True
+    ) -> Dict[str, List[RemoteFile]]:
+        """
+        Fetch the files matching web server include patterns
+        in one remote command
+
+        :param patterns: Absolute include paths or wildcards
+        :type patterns: List[str]
+        :param content: Fetch file contents too, defaults to True
+        :type content: bool, optional
+        :return: Matching files of each pattern, in shell order
+        :rtype: Dict[str, List[RemoteFile]]
+        """
+
+        includes = {pattern: [] for pattern in patterns}
+        for remote_file in self.iter_files(
+            patterns, content=content, expand=True
+        ):
+            for pattern in patterns:
+                if fnmatchcase(remote_file.path, pattern):
+                    includes[pattern].append(remote_file)
+        return includes
+
     def fetch_enabled_sites(self) -> list:
-        web_enabled_path = self.web_server.get_enabled_path()
-        dir_obj = self.create_new_dir()
-        dir_obj.cd(web_enabled_path)
-        file_names = self.list_directory_files(dir_obj)
-        results_list = []
-        file_names = self.web_server.clean_conf_filenames(file_names)
-        for file_name in file_names:
-            dir_obj.cd(file_name)
-            stdout = self.read_file(dir_obj)
-            details = self.web_server.get_site_details(stdout)
-            details['file_name'] = file_name
-            results_list.append(details)
-            dir_obj.go_back()
-
-        return results_list
+        files = self.iter_enabled_files()
+        return list(self.web_server.iter_site_details(
+            files, self.fetch_includes))
 
     def get_projects_directory(self) -> str:
         """
@@ -352,6 +905,11 @@ class ServerProcess:
             'urls': data['urls']
         }
 
+        # Change tracking details, when the file was fetched with them
+        for key in ('conf_hash', 'conf_mtime', 'conf_includes'):
+            if key in data:
+                parsed_data[key] = data[key]
+
         return parsed_data
 
 
@@ -424,6 +982,23 @@ class AppProcess(ServerProcess):
             return self.logger
         raise NoAppLogger
 
+    def log_command(self, command: str, sudo=False):
+        """
+        Run a long command and log its output lines as they
+        arrive instead of holding all of it until it exits
+
+        :raises ExcecuteError: command was not successful
+        """
+
+        logger = self.get_logger()
+        command = f"{command} 2>&1"
+        with self.get_client().stream(command, sudo=sudo) as command_stream:
+            for line in command_stream.lines():
+                logger.info(line)
+
+            if command_stream.status != 0:
+                raise ExcecuteError(status=command_stream.status)
+
     def get_project_directory(self) -> str:
         """
         Get the directory to clone
@@ -539,8 +1114,8 @@ class ReactProcess(AppProcess):
         logger = self.get_logger()
         self.cd_project_directory()
         command = f"cd {self.dir};npm install"
-        stdout = self.get_client().execute(command)
-        logger.info(f"Npm install Output: {stdout}")
+        logger.info("Npm install Output:")
+        self.log_command(command)
         logger.info('Project dependencies installed successfully')
 
     def add_homepage(self, url: str):
@@ -562,6 +1137,6 @@ class ReactProcess(AppProcess):
         logger = self.get_logger()
         self.cd_project_directory()
         command = f"cd {self.dir};npm run build"
-        stdout = self.get_client().execute(command)
-        logger.info(f"Npm Build Output: {stdout}")
+        logger.info("Npm Build Output:")
+        self.log_command(command)
         logger.info('Project build is completed')
@@ -0,0 +1,232 @@
+"""
+Module for running many commands on a server
+in one ssh round trip
+"""
+
+
+import re
+import shlex
+from typing import Iterable, Iterator, List, NamedTuple
+from uuid import uuid4
+
+
+class CommandResult(NamedTuple):
+    """
+    Output of one command in a batch, status
+    is None if the command never finished
+    """
+    stdout: str
+    stderr: str
+    status: int
+
+
+class RemoteBatch:
+    """
+    Builds one shell script that runs every command in its own
+    subshell and prints its stdout, stderr and exit code in
+    sections delimited by a random marker, then parses the
+    script output back into one result per command
+    """
+
+    def __init__(self, commands: List[str]) -> None:
+        self.commands = list(commands)
+        self.marker = f"__SM_{uuid4().hex}"
+
+    def get_section(self, index: int, name: str) -> str:
+        return f"{self.marker}:{index}:{name}"
+
+    def get_script(self) -> str:
+        """
+        Get the shell script for all commands
+
+        :return: shell script
+        :rtype: str
+        """
+
+        lines = ['__sm_err=$(mktemp) || exit 1']
+        for index, command in enumerate(self.commands):
+            out = shlex.quote(self.get_section(index, 'out'))
+            err = shlex.quote(self.get_section(index, 'err'))
+            status = self.get_section(index, 'rc')
+            lines += [
+                f"printf '%s\\n' {out}",
+                f"( {command}\n) </dev/null 2>\"$__sm_err\"",
+                '__sm_rc=$?',
+                f"printf '\\n%s\\n' {err}",
+                'cat "$__sm_err"',
+                f"printf '\\n%s:%s\\n' {shlex.quote(status)} \"$__sm_rc\"",
+            ]
+        lines.append('rm -f "$__sm_err"')
+        return '\n'.join(lines)
+
+    def get_command(self) -> str:
+        """
+        Get the command that runs the script with sh
+        """
+
+        return f"sh -c {shlex.quote(self.get_script())}"
+
+    def parse(self, output: str) -> List[CommandResult]:
+        """
+        Split the script output into results, in
+        the same order as the commands
+
+        :param output: stdout of the script
+        :type output: str
+        :rtype: List[CommandResult]
+        """
+
+        results = []
+        position = 0
+        for index in range(len(self.commands)):
+            try:
+                start = output.index(
+                    self.get_section(index, 'out') + '\n', position)
+                start += len(self.get_section(index, 'out')) + 1
+
+                err = '\n' + self.get_section(index, 'err') + '\n'
+                middle = output.index(err, start)
+
+                status = '\n' + self.get_section(index, 'rc') + ':'
+                end = output.index(status, middle)
+                status_end = output.index('\n', end + len(status))
+            except ValueError:
+                results.append(CommandResult('', '', None))
+                continue
+
+            results.append(CommandResult(
+                stdout=output[start:middle],
+                stderr=output[middle + len(err):end],
+                status=int(output[end + len(status):status_end])))
+            position = status_end
+
+        return results
+
+
+def quote_glob(pattern: str) -> str:
+    """
+    Quote a path for the shell leaving its * and ? wildcards
+    unquoted, so the shell expands them
+    """
+
+    parts = re.split(r'([*?])', pattern)
+    return ''.join(
+        part if part in ('*', '?') else shlex.quote(part)
+        for part in parts if part)
+
+
+class RemoteFile(NamedTuple):
+    """
+    File read from a server with its stat details,
+    content is None when only the stat was fetched
+    """
+    path: str
+    mtime: int
+    inode: int
+    size: int
+    content: str = None
+    checksum: str = None
+
+    @property
+    def name(self) -> str:
+        return self.path.split('/')[-1]
+
+
+class FileDump:
+    """
+    Builds one command that prints the stat details and content
+    of many files, each file starts with a header line holding
+    a random marker, and parses its output lines back into files
+    as they stream in
+    """
+
+    def __init__(self) -> None:
+        self.marker = f"__SM_{uuid4().hex}"
+
+    def get_file_script(
+        self, path: str, content=True, checksum=False
+    ) -> str:
+        """
+        Script printing the header of the file at path (a
+        shell word), followed by its content
+        """
+
+        header = self.marker + '\t%Y\t%i\t%s\t${h%% *}\t%n\n'
+        script = f'[ -f {path} ] && h=-'
+        if checksum:
+            script += f' && h=$(sha1sum < {path})'
+        script += f' && stat -L --printf "{header}" {path}'
+        if content:
+            script += f" && cat {path} && printf '\\n'"
+        return script
+
+    def get_directory_command(
+        self, directory: str, content=True, checksum=False
+    ) -> str:
+        """
+        Command printing every file in directory, symlinks
+        are followed and sub directories are skipped
+        """
+
+        directory = shlex.quote(directory.rstrip('/'))
+        file_script = self.get_file_script('"$f"', content, checksum)
+        script = (
+            f'for f in {directory}/* {directory}/.[!.]*; '
+            f'do {file_script}; done; true')
+        return f"sh -c {shlex.quote(script)}"
+
+    def get_files_command(
+        self, paths: List[str], content=True, checksum=False, expand=False
+    ) -> str:
+        """
+        Command printing every file in paths, wildcards in
+        paths are expanded by the shell when expand is set
+        """
+
+        quote = quote_glob if expand else shlex.quote
+        paths = ' '.join(quote(path) for path in paths)
+        file_script = self.get_file_script('"$f"', content, checksum)
+        script = f'for f in {paths}; do {file_script}; done; true'
+        return f"sh -c {shlex.quote(script)}"
+
+    def parse_header(self, line: str) -> RemoteFile:
+        _, mtime, inode, size, checksum, path = line.split('\t', 5)
+        return RemoteFile(
+            path=path, mtime=int(mtime), inode=int(inode), size=int(size),
+            checksum=None if checksum == '-' else checksum)
+
+    def parse_lines(
+        self, lines: Iterable[str], content=True
+    ) -> Iterator[RemoteFile]:
+        """
+        Parse output lines into files, each file is given
+        as soon as the next one starts
+
+        :param lines: Output lines without line endings
+        :type lines: Iterable[str]
+        :rtype: Iterator[RemoteFile]
+        """
+
+        current = None
+        body = []
+        prefix = self.marker + '\t'
+
+        for line in lines:
+            if line.startswith(prefix):
+                if current is not None:
+                    yield self.__finish(current, body, content)
+                current = self.parse_header(line)
+                body = []
+            elif current is not None:
+                body.append(line)
+
+        if current is not None:
+            yield self.__finish(current, body, content)
+
+    def __finish(
+        self, current: RemoteFile, body: List[str], content: bool
+    ) -> RemoteFile:
+        if not content:
+            return current
+        # Each file content is followed by one added newline
+        return current._replace(content='\n'.join(body))
@@ -0,0 +1,138 @@
+"""
+Module for spreading periodic checks over time
+"""
+
+
+import hashlib
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from .logger import err_logger
+
+
+class AdaptiveSchedule:
+    """
+    Computes when each check runs next.
+
+    Every key gets a stable phase offset inside its interval so
+    checks are spread evenly instead of firing together, with a
+    small random jitter on top. Checks that keep the same healthy
+    state back off towards MAX_INTERVAL, failing checks are retried
+    at MIN_INTERVAL and an override interval always wins.
+    """
+    BASE_INTERVAL = 600
+    MIN_INTERVAL = 60
+    MAX_INTERVAL = 3600
+    BACKOFF = 1.5
+    # Healthy checks in a row before backing off
+    STABLE_AFTER = 3
+    JITTER = 0.05
+
+    def __init__(
+        self, base_interval: int = None, min_interval: int = None,
+        max_interval: int = None, jitter: float = None
+    ) -> None:
+        self.base_interval = base_interval or self.BASE_INTERVAL
+        self.min_interval = min_interval or self.MIN_INTERVAL
+        self.max_interval = max_interval or self.MAX_INTERVAL
+        self.jitter = self.JITTER if jitter is None else jitter
+
+    def get_phase(self, key: str) -> float:
+        """
+        Stable fraction in [0, 1) for key
+        """
+
+        digest = hashlib.sha1(str(key).encode()).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+    def get_interval(
+        self, interval: int, active: bool, stable_checks: int,
+        override: int = None
+    ) -> int:
+        """
+        Get the next interval in seconds
+
+        :param interval: Current interval, None before the first check
+        :type interval: int
+        :param active: Result of the last check
+        :type active: bool
+        :param stable_checks: Checks in a row with the same result
+        :type stable_checks: int
+        :param override: Interval set by the user, defaults to None
+        :type override: int, optional
+        :rtype: int
+        """
+
+        if override:
+            return override
+        if not active:
+            return self.min_interval
+        if stable_checks < self.STABLE_AFTER or not interval:
+            return self.base_interval
+        backed_off = max(interval, self.base_interval) * self.BACKOFF
+        return int(min(backed_off, self.max_interval))
+
+    def get_next_check(
+        self, key: str, now: datetime, interval: int
+    ) -> datetime:
+        """
+        Get the next time slot of key after now, slots are
+        interval seconds apart and shifted by the key phase
+        """
+
+        offset = self.get_phase(key) * interval
+        elapsed = now.timestamp() - offset
+        slot = (elapsed // interval + 1) * interval + offset
+        # Float rounding can land on the slot of now
+        if slot - now.timestamp() < 1:
+            slot += interval
+        slot += random.uniform(0, self.jitter * interval)
+        return now + timedelta(seconds=slot - now.timestamp())
+
+
+class Scheduler:
+    """
+    Runs tick every tick_seconds on a background thread until
+    stopped, errors are logged and do not stop the loop
+    """
+    TICK_SECONDS = 30
+
+    def __init__(
+        self, tick: Callable[[], None], tick_seconds: float = None
+    ) -> None:
+        self.tick = tick
+        self.tick_seconds = tick_seconds or self.TICK_SECONDS
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread = None
+
+    def run(self):
+        """
+        Run the loop on the current thread
+        """
+
+        while not self.__stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                err_logger.exception(e)
+            self.__stop.wait(self.tick_seconds)
+
+    def start(self):
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.run, name='scheduler', daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = None):
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+
+check_schedule = AdaptiveSchedule()
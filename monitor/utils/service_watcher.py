@@ -0,0 +1,169 @@
+"""
+Module for following systemd unit state changes
+on a server as they happen
+"""
+
+
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+
+from .logger import err_logger, logger
+from .paramiko_wrapper import CommandStream, SshClient
+
+
+# systemd journal message ids of unit state changes,
+# mapped to the unit active state after the change
+UNIT_MESSAGES = {
+    '39f53479d3a045ac8e11786248231fbf': True,   # started
+    '7b05ebc668384222baa8881179cfda54': True,   # reloaded
+    '9d1aaa27d60140bd96365438aad20286': False,  # stopped
+    'be02cf6855d2428ba40df7e9d022f03d': False,  # failed
+    '98e322203f7a4ed290d09fe03c09fe15': False,  # process exited
+    '7ad2d189f7e94e70a38c781354912448': False,  # deactivated
+}
+
+
+class UnitEvent(NamedTuple):
+    """
+    State change of a systemd unit read from the journal
+    """
+    unit: str
+    active: bool
+    time: datetime
+
+
+def get_unit_name(service_name: str) -> str:
+    """
+    Full unit name of a service name, .service
+    is added when there is no unit type
+    """
+
+    return service_name if '.' in service_name \
+        else f"{service_name}.service"
+
+
+def parse_journal_event(line: str) -> UnitEvent:
+    """
+    Parse one journalctl -o json line, None is returned for
+    entries that are not unit state changes
+
+    :param line: Journal entry as a json line
+    :type line: str
+    :rtype: UnitEvent
+    """
+
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+
+    active = UNIT_MESSAGES.get(entry.get('MESSAGE_ID'))
+    unit = entry.get('UNIT')
+    if active is None or not unit:
+        return None
+
+    # A start job can end without the unit running
+    if active and entry.get('JOB_RESULT', 'done') != 'done':
+        active = False
+
+    microseconds = int(entry.get('__REALTIME_TIMESTAMP', 0))
+    time = datetime.fromtimestamp(microseconds / 1e6, tz=timezone.utc)
+    return UnitEvent(unit, active, time)
+
+
+class ServiceWatcher:
+    """
+    Follows the systemd journal of one server over a long lived
+    ssh channel and reports unit state changes as they arrive.
+
+    resync is called before following starts, after every
+    reconnect, so changes missed while disconnected are read with
+    a bulk state query. Reconnects back off up to MAX_RETRY_DELAY.
+    """
+    COMMAND = 'journalctl -f -n 0 -o json _PID=1'
+    RETRY_DELAY = 5
+    MAX_RETRY_DELAY = 300
+
+    def __init__(
+        self, name: str, connect: Callable[[], SshClient],
+        resync: Callable[[], None], on_event: Callable[[UnitEvent], None]
+    ) -> None:
+        """
+        :param name: Name used in logs
+        :type name: str
+        :param connect: Callable returning a connected ssh client
+        :type connect: Callable[[], SshClient]
+        :param resync: Callable reading the state of every unit
+        :type resync: Callable[[], None]
+        :param on_event: Callable saving one unit state change
+        :type on_event: Callable[[UnitEvent], None]
+        """
+
+        self.name = name
+        self.connect = connect
+        self.resync = resync
+        self.on_event = on_event
+
+        self.__stop = threading.Event()
+        self.__stream: CommandStream = None
+        self.__thread: threading.Thread = None
+
+    def follow(self):
+        """
+        Follow the journal until the channel closes
+        """
+
+        client = self.connect()
+        self.__stream = client.stream(self.COMMAND, sudo=True)
+        self.resync()
+
+        with self.__stream as stream:
+            for line in stream.lines():
+                if self.__stop.is_set():
+                    break
+                event = parse_journal_event(line)
+                if event is not None:
+                    self.on_event(event)
+
+    def run(self):
+        """
+        Follow the journal on the current thread,
+        reconnecting until stopped
+        """
+
+        delay = self.RETRY_DELAY
+        while not self.__stop.is_set():
+            try:
+                self.follow()
+                delay = self.RETRY_DELAY
+            except Exception as e:
+                if self.__stop.is_set():
+                    break
+                err_logger.exception(e)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+            finally:
+                self.__stream = None
+
+            if not self.__stop.is_set():
+                logger.info(f'Reconnecting service watcher {self.name}')
+                self.__stop.wait(delay)
+
+    def start(self):
+        self.__stop.clear()
+        self.__thread = threading.Thread(
+            target=self.run, name=f'watcher-{self.name}', daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = None):
+        self.__stop.set()
+        stream = self.__stream
+        if stream is not None:
+            stream.close()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
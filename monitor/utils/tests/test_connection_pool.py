@@ -0,0 +1,80 @@
+"""
+Connection pool module test
+"""
+
+
+from django.test import SimpleTestCase
+from utils.connection_pool import ConnectionPool
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.active = True
+        self.closed = False
+        self.keepalive = None
+
+    def is_active(self):
+        return self.active
+
+    def close(self):
+        self.closed = True
+        self.active = False
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.pool = ConnectionPool(
+            idle_timeout=60, max_connections=2, max_per_host=1,
+            keepalive=15)
+
+    def test_acquire_reuses_connection(self):
+        first = self.pool.acquire(1, FakeClient)
+        self.pool.release(first)
+        second = self.pool.acquire(1, FakeClient)
+        self.assertIs(first, second)
+        self.assertEqual(first.keepalive, 15)
+        self.assertEqual(self.pool.count(1), 1)
+
+    def test_connections_shared_at_host_cap(self):
+        first = self.pool.acquire(1, FakeClient)
+        second = self.pool.acquire(1, FakeClient)
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.count(1), 1)
+
+    def test_dead_connection_reconnects(self):
+        first = self.pool.acquire(1, FakeClient)
+        self.pool.release(first)
+        first.active = False
+        second = self.pool.acquire(1, FakeClient)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(self.pool.count(1), 1)
+
+    def test_least_recently_used_evicted(self):
+        first = self.pool.acquire(1, FakeClient)
+        self.pool.release(first)
+        second = self.pool.acquire(2, FakeClient)
+        self.pool.release(second)
+        self.pool.acquire(3, FakeClient)
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(self.pool.count(), 2)
+
+    def test_idle_connections_evicted(self):
+        pool = ConnectionPool(idle_timeout=-1)
+        client = pool.acquire(1, FakeClient)
+        pool.release(client)
+        pool.evict_idle()
+        self.assertTrue(client.closed)
+        self.assertEqual(pool.count(), 0)
+
+    def test_discard_closes_busy_on_release(self):
+        client = self.pool.acquire(1, FakeClient)
+        self.pool.discard(1)
+        self.assertFalse(client.closed)
+        self.assertEqual(self.pool.count(1), 0)
+        self.pool.release(client)
+        self.assertTrue(client.closed)
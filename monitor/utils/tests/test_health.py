@@ -0,0 +1,169 @@
+"""
+Health module test
+"""
+
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+from utils.health import CheckResult, CheckTarget, HealthChecker
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    running = 0
+    most_running = 0
+    methods = []
+    clients = []
+    lock = threading.Lock()
+
+    def do_HEAD(self):
+        Handler.methods.append('HEAD')
+        status = 405 if self.path == '/no-head' else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        Handler.methods.append('GET')
+        Handler.clients.append(self.client_address)
+        if self.path == '/large':
+            self.send_response(200)
+            self.send_header('Content-Length', str(1 << 30))
+            self.end_headers()
+            self.wfile.write(b'x' * 1024)
+            return
+
+        with self.lock:
+            Handler.running += 1
+            Handler.most_running = max(Handler.most_running, Handler.running)
+
+        if self.path == '/slow':
+            time.sleep(0.5)
+        else:
+            time.sleep(0.05)
+        status = 404 if self.path == '/missing' else 200
+
+        with self.lock:
+            Handler.running -= 1
+
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class HealthCheckerTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.base = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        Handler.most_running = 0
+        Handler.methods = []
+        Handler.clients = []
+        self.checker = HealthChecker(
+            max_workers=8, max_per_host=2, read_timeout=0.2)
+
+    def tearDown(self) -> None:
+        self.checker.close()
+
+    def test_check_all_keeps_order(self):
+        urls = [self.base + '/', CheckTarget(self.base + '/missing', 'get')]
+        computed = self.checker.check_all(urls)
+        self.assertEqual(
+            [result.url for result in computed],
+            [self.base + '/', self.base + '/missing'])
+        self.assertEqual([result.active for result in computed], [True, False])
+        self.assertEqual(computed[1].status_code, 404)
+
+    def test_read_timeout(self):
+        computed = self.checker.check(self.base + '/slow', 'get')
+        self.assertFalse(computed.active)
+        self.assertIsNone(computed.status_code)
+        self.assertIsNotNone(computed.error)
+
+    def test_connection_error(self):
+        computed = self.checker.check('http://127.0.0.1:1/')
+        self.assertFalse(computed.active)
+
+    def test_unexpected_error_fails_only_its_url(self):
+        probe = self.checker.probe
+
+        def failing_probe(url, method):
+            if url.endswith('/bad'):
+                raise ValueError('bad url')
+            return probe(url, method)
+
+        self.checker.probe = failing_probe
+        with self.assertLogs('basic.error', 'WARNING'):
+            computed = self.checker.check_all(
+                [self.base + '/bad', self.base + '/'])
+
+        self.assertEqual([result.active for result in computed], [False, True])
+        self.assertEqual(computed[0].error, 'bad url')
+
+    def test_per_host_limit(self):
+        self.checker.check_all([CheckTarget(self.base + '/', 'get')] * 8)
+        self.assertLessEqual(Handler.most_running, 2)
+
+    def test_busy_host_does_not_hold_workers(self):
+        checker = HealthChecker(max_workers=2, max_per_host=1)
+        started = {}
+
+        def check(url):
+            started.setdefault(url, time.monotonic())
+            time.sleep(0.1)
+            return CheckResult(url, True)
+
+        checker.check = check
+        start = time.monotonic()
+        urls = ['http://a/1', 'http://a/2', 'http://a/3', 'http://b/1']
+        computed = checker.check_all(urls)
+        checker.close()
+
+        self.assertEqual([result.url for result in computed], urls)
+        self.assertLess(started['http://b/1'] - start, 0.1)
+        self.assertGreaterEqual(
+            started['http://a/3'] - started['http://a/1'], 0.2)
+
+    def test_head_probe(self):
+        computed = self.checker.check(self.base + '/')
+        self.assertTrue(computed.active)
+        self.assertEqual(computed.method, 'HEAD')
+        self.assertIsNotNone(computed.ttfb)
+        self.assertEqual(Handler.methods, ['HEAD'])
+
+    def test_head_rejected_falls_back_to_get(self):
+        computed = self.checker.check(self.base + '/no-head')
+        self.assertTrue(computed.active)
+        self.assertEqual(computed.method, 'GET')
+        self.assertEqual(Handler.methods, ['HEAD', 'GET'])
+
+    def test_get_does_not_read_body(self):
+        computed = self.checker.check(self.base + '/large', 'get')
+        self.assertTrue(computed.active)
+        self.assertLess(computed.elapsed, 1)
+
+    def test_get_reuses_connection(self):
+        for _ in range(3):
+            self.assertTrue(self.checker.check(self.base + '/', 'get').active)
+        self.assertEqual(len(set(Handler.clients)), 1)
+
+    def test_expected_status(self):
+        target = CheckTarget(self.base + '/missing', 'get', (404,))
+        self.assertTrue(self.checker.check(target).active)
@@ -0,0 +1,47 @@
+"""
+Histogram module test
+"""
+
+
+from django.test import SimpleTestCase
+from utils.histogram import LatencyHistogram
+
+
+class LatencyHistogramTest(SimpleTestCase):
+    def test_bucket_bounds(self):
+        for value in (20, 100, 999, 60000):
+            bucket = LatencyHistogram.get_bucket(value)
+            self.assertLessEqual(
+                value, LatencyHistogram.get_upper_bound(bucket))
+            if bucket:
+                self.assertGreater(
+                    value, LatencyHistogram.get_upper_bound(bucket - 1))
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        computed = histogram.percentiles([50, 95, 99])
+        self.assertEqual(computed, {50: 54, 95: 108, 99: 108})
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+    def test_merge_equals_single_histogram(self):
+        first, second, both = (LatencyHistogram() for _ in range(3))
+        for value in (10, 20, 30):
+            first.add(value)
+            both.add(value)
+        for value in (400, 500):
+            second.add(value)
+            both.add(value)
+        merged = LatencyHistogram.merge_all([first, second])
+        self.assertEqual(merged.counts, both.counts)
+        self.assertEqual(merged.total(), 5)
+
+    def test_bytes_round_trip(self):
+        histogram = LatencyHistogram()
+        histogram.add(250, count=3)
+        data = histogram.to_bytes()
+        self.assertEqual(len(data), LatencyHistogram.BUCKETS * 4)
+        self.assertEqual(
+            LatencyHistogram.from_bytes(data).counts, histogram.counts)
+        self.assertEqual(LatencyHistogram.from_bytes(b'').total(), 0)
@@ -0,0 +1,84 @@
+"""
+Journal module test
+"""
+
+
+import json
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+from utils.journal import InvalidCursor, JournalQuery
+
+
+def journal_line(number, message='message'):
+    return json.dumps({
+        '__CURSOR': f's=abc;i={number}',
+        '__REALTIME_TIMESTAMP': str(1651406400000000 + number * 1000000),
+        'MESSAGE': message, 'PRIORITY': '6',
+        'SYSLOG_IDENTIFIER': 'nginx', '_PID': '42'})
+
+
+class JournalQueryTest(SimpleTestCase):
+
+    def test_last_entries_command(self):
+        command = JournalQuery('nginx', lines=10).get_command()
+
+        self.assertTrue(command.startswith('journalctl -u nginx -o json'))
+        self.assertIn('-n 11', command)
+        self.assertTrue(command.endswith('| head -n 11'))
+        self.assertNotIn('--reverse', command)
+
+    def test_cursor_commands(self):
+        before = JournalQuery('nginx', lines=10, before='s=abc;i=5')
+        after = JournalQuery('nginx', lines=10, after='s=abc;i=5')
+
+        self.assertIn("--reverse '--cursor=s=abc;i=5'", before.get_command())
+        self.assertTrue(before.get_command().endswith('| head -n 12'))
+        self.assertIn("'--after-cursor=s=abc;i=5'", after.get_command())
+        self.assertNotIn('-n 11 ', after.get_command())
+
+    def test_time_range_command(self):
+        since = datetime(2022, 5, 1, 12, tzinfo=timezone.utc)
+        command = JournalQuery('nginx', since=since).get_command()
+
+        self.assertIn("'--since=2022-05-01 12:00:00 UTC'", command)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            JournalQuery('nginx', before="x'; rm -rf /")
+
+    def test_lines_limit(self):
+        query = JournalQuery('nginx', lines=10 ** 6)
+
+        self.assertEqual(query.lines, JournalQuery.MAX_LINES)
+
+    def test_parse_last_entries(self):
+        query = JournalQuery('nginx', lines=2)
+        page = query.parse(journal_line(i) for i in range(3))
+
+        self.assertTrue(page.has_more)
+        self.assertEqual(
+            [entry.cursor for entry in page.entries],
+            ['s=abc;i=1', 's=abc;i=2'])
+        self.assertEqual(page.entries[0].pid, 42)
+        self.assertEqual(page.entries[0].priority, 6)
+
+    def test_parse_before_is_chronological(self):
+        query = JournalQuery('nginx', lines=2, before='s=abc;i=5')
+        lines = [journal_line(i) for i in (5, 4, 3)]
+        page = query.parse(lines)
+
+        self.assertFalse(page.has_more)
+        self.assertEqual(page.get_first_cursor(), 's=abc;i=3')
+        self.assertEqual(page.get_last_cursor(), 's=abc;i=4')
+
+    def test_parse_skips_bad_lines(self):
+        query = JournalQuery('nginx')
+        lines = ['not json', '{}', journal_line(1, message=[104, 105])]
+        page = query.parse(lines)
+
+        self.assertEqual(len(page.entries), 1)
+        self.assertEqual(page.entries[0].message, 'hi')
+        self.assertEqual(
+            page.to_dict()['entries'][0]['time'],
+            '2022-05-01T12:00:01+00:00')
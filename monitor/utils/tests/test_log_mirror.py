@@ -0,0 +1,139 @@
+"""
+Log mirror module test
+"""
+
+
+import tempfile
+
+from django.test import SimpleTestCase
+from utils.log_mirror import SegmentStore, sync_log
+from utils.logs import LogBytes
+
+
+class FakeLog:
+    """
+    Remote log kept in memory
+    """
+
+    def __init__(self, data=b'', inode=1) -> None:
+        self.data = data
+        self.inode = inode
+        self.reads = []
+
+    def read(self, offset, length) -> LogBytes:
+        self.reads.append(offset)
+        start = min(offset, len(self.data))
+        return LogBytes(
+            self.inode, len(self.data), start,
+            self.data[start:start + length])
+
+
+class SegmentStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.directory.name + '/log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        self.store.append(b'a\nb\n')
+        self.store.append(b'c\n')
+
+        self.assertEqual(
+            list(self.store.iter_lines()), [b'a\n', b'b\n', b'c\n'])
+        self.assertEqual(self.store.tail(2), ['b', 'c'])
+        self.assertEqual(len(self.store.get_segments()), 1)
+
+    def test_segments_are_rotated(self):
+        self.store.SEGMENT_SIZE = 1
+        self.store.MAX_SEGMENTS = 2
+        for line in (b'a\n', b'b\n', b'c\n'):
+            self.store.append(line)
+
+        self.assertEqual(len(self.store.get_segments()), 2)
+        self.assertEqual(self.store.tail(5), ['b', 'c'])
+
+    def test_read_tail(self):
+        self.store.SEGMENT_SIZE = 1
+        for line in (b'aa\n', b'bb\n', b'cc\n'):
+            self.store.append(line)
+
+        self.assertEqual(self.store.read_tail(6), b'bb\ncc\n')
+        self.assertEqual(self.store.read_tail(5), b'cc\n')
+        self.assertEqual(self.store.read_tail(100), b'aa\nbb\ncc\n')
+
+    def test_clear(self):
+        self.store.append(b'a\n')
+        self.store.clear()
+
+        self.assertTrue(self.store.is_empty())
+
+
+class SyncLogTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_appended_bytes_are_read(self):
+        log = FakeLog(b'a\nb\n')
+        first = sync_log(log.read, self.store)
+        log.data += b'c\npart'
+        second = sync_log(log.read, self.store, first.inode, first.offset)
+
+        self.assertEqual(second.offset, 6)
+        self.assertEqual(second.appended, 2)
+        self.assertEqual(log.reads, [0, 4])
+        self.assertEqual(self.store.tail(10), ['a', 'b', 'c'])
+
+    def test_rotation(self):
+        log = FakeLog(b'a\nb\n')
+        first = sync_log(log.read, self.store)
+        log.data, log.inode = b'new\n', 2
+        second = sync_log(log.read, self.store, first.inode, first.offset)
+
+        self.assertTrue(second.rotated)
+        self.assertEqual((second.inode, second.offset), (2, 4))
+        self.assertEqual(self.store.tail(10), ['a', 'b', 'new'])
+
+    def test_truncation(self):
+        log = FakeLog(b'a\nb\n')
+        first = sync_log(log.read, self.store)
+        log.data = b'c\n'
+        second = sync_log(log.read, self.store, first.inode, first.offset)
+
+        self.assertTrue(second.rotated)
+        self.assertEqual(second.offset, 2)
+
+    def test_large_append_is_read_in_parts(self):
+        log = FakeLog(b'line\n' * 10)
+        result = sync_log(log.read, self.store, max_bytes=12, max_reads=3)
+
+        self.assertEqual(result.offset, 30)
+        self.assertEqual(len(log.reads), 3)
+
+    def test_rotated_file_is_drained(self):
+        log = FakeLog(b'a\nb\n')
+        first = sync_log(log.read, self.store)
+        old = FakeLog(b'a\nb\nc\n')
+        log.data, log.inode = b'new\n', 2
+        second = sync_log(
+            log.read, self.store, first.inode, first.offset,
+            read_rotated={1: old.read}.get)
+
+        self.assertTrue(second.rotated)
+        self.assertEqual(old.reads, [4])
+        self.assertEqual(second.appended, 6)
+        self.assertEqual(self.store.tail(10), ['a', 'b', 'c', 'new'])
+
+    def test_on_data(self):
+        log = FakeLog(b'a\nb\n')
+        received = []
+        sync_log(log.read, self.store, on_data=received.append)
+
+        self.assertEqual(received, [b'a\nb\n'])
@@ -0,0 +1,130 @@
+"""
+Log store module test
+"""
+
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from django.test import SimpleTestCase
+from utils.log_store import (AccessLogStore, StringTable, np,
+                             parse_access_line, parse_access_time)
+
+
+LINES = [
+    '1.1.1.1 - - [01/May/2022:12:00:05 +0000] "GET /a?x=1 HTTP/1.1" 200 100',
+    '2.2.2.2 - - [01/May/2022:12:30:00 +0000] "GET /b HTTP/1.1" 404 10 '
+    '"-" "Mozilla/5.0 (X11)" 0.250',
+    '1.1.1.1 - - [01/May/2022:13:01:06 +0000] "POST /a HTTP/1.1" 200 300 '
+    '"-" "curl" 0.050',
+    'not an access log line',
+]
+
+
+class ParseAccessLineTest(SimpleTestCase):
+
+    def test_time_offset(self):
+        self.assertEqual(
+            parse_access_time('01/May/2022:14:00:00 +0200'),
+            parse_access_time('01/May/2022:12:00:00 +0000'))
+
+    def test_fields(self):
+        record = parse_access_line(LINES[1])
+
+        self.assertEqual(record.status, 404)
+        self.assertEqual(record.method, 'GET')
+        self.assertEqual(record.bytes, 10)
+        self.assertEqual(record.ip, '2.2.2.2')
+        self.assertEqual(record.response_time, 0.25)
+
+    def test_query_string_is_dropped(self):
+        record = parse_access_line(LINES[0])
+
+        self.assertEqual(record.path, '/a')
+        self.assertIsNone(record.response_time)
+
+    def test_other_format(self):
+        self.assertIsNone(parse_access_line(LINES[3]))
+
+
+class StringTableTest(SimpleTestCase):
+
+    def test_ids_are_kept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'paths.txt')
+            table = StringTable(path)
+            self.assertEqual(table.get_id('/a'), 0)
+            self.assertEqual(table.get_id('/b'), 1)
+            self.assertEqual(table.get_id('/a'), 0)
+            table.flush()
+
+            self.assertEqual(StringTable(path).values, ['/a', '/b'])
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class AccessLogStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = AccessLogStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append(self):
+        self.assertEqual(self.store.append(LINES), 3)
+        self.assertEqual(self.store.append(LINES[:1]), 1)
+
+        reopened = AccessLogStore(self.directory.name)
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.paths.values, ['/a', '/b'])
+
+    def test_writers_share_string_ids(self):
+        other = AccessLogStore(self.directory.name)
+        other.append(LINES[1:2])
+        self.store.append(LINES[:1])
+
+        reopened = AccessLogStore(self.directory.name)
+        self.assertEqual(reopened.paths.values, ['/b', '/a'])
+        self.assertEqual(
+            reopened.bytes_by_path(), [('/a', 100), ('/b', 10)])
+
+    def test_reader_sees_values_of_later_writes(self):
+        reader = AccessLogStore(self.directory.name)
+        self.store.append(LINES)
+
+        self.assertEqual(
+            reader.bytes_by_path(), [('/a', 400), ('/b', 10)])
+
+    def test_status_by_hour(self):
+        self.store.append(LINES)
+
+        self.assertEqual(self.store.status_by_hour(), {
+            '2022-05-01T12:00:00+00:00': {'200': 1, '404': 1},
+            '2022-05-01T13:00:00+00:00': {'200': 1},
+        })
+        self.assertEqual(
+            self.store.status_by_hour(since=datetime(2022, 5, 1, 13)),
+            {'2022-05-01T13:00:00+00:00': {'200': 1}})
+
+    def test_bytes_by_path(self):
+        self.store.append(LINES)
+
+        self.assertEqual(
+            self.store.bytes_by_path(), [('/a', 400), ('/b', 10)])
+        self.assertEqual(self.store.bytes_by_path(top=1), [('/a', 400)])
+
+    def test_response_time_percentiles(self):
+        self.store.append(LINES)
+        percentiles = self.store.response_time_percentiles([50])
+
+        self.assertAlmostEqual(percentiles[50], 0.15)
+
+    def test_clear(self):
+        self.store.append(LINES)
+        self.store.clear()
+
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.bytes_by_path(), [])
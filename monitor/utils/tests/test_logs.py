@@ -0,0 +1,403 @@
+"""
+Logs module test
+"""
+
+
+import gzip
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+from utils.logs import (AccessLogAggregation, LogChunk, LogSearch,
+                        LogTimeRange, RemoteLog, RotatedLog, parse_log_time)
+
+
+class RemoteLogTest(SimpleTestCase):
+
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        # Lines 0 to 99 are 8 bytes each, and a line still being written
+        file.write(b''.join(b'line %02d\n' % i for i in range(100)))
+        file.write(b'partial')
+        file.close()
+        self.path = file.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def read(self, **window) -> LogChunk:
+        remote_log = RemoteLog(self.path, **window)
+        output = subprocess.run(
+            ['sh', '-c', remote_log.get_script()], capture_output=True).stdout
+        return remote_log.parse(output)
+
+    def test_last_lines(self):
+        chunk = self.read(lines=3)
+
+        self.assertEqual(chunk.lines, ['line 98', 'line 99', 'partial'])
+        self.assertEqual(chunk.start, 784)
+        self.assertEqual(chunk.end, chunk.size)
+        self.assertEqual(chunk.inode, os.stat(self.path).st_ino)
+        self.assertTrue(chunk.has_before())
+
+    def test_last_lines_cut_by_window(self):
+        RemoteLog.WINDOW, window = 20, RemoteLog.WINDOW
+        try:
+            chunk = self.read(lines=50)
+        finally:
+            RemoteLog.WINDOW = window
+
+        self.assertEqual(chunk.lines, ['line 99', 'partial'])
+        self.assertEqual(chunk.start, 792)
+
+    def test_range_from_line_start(self):
+        chunk = self.read(offset=16, length=20)
+
+        self.assertEqual(chunk.lines, ['line 02', 'line 03'])
+        self.assertEqual((chunk.start, chunk.end), (16, 32))
+
+    def test_range_drops_cut_lines(self):
+        chunk = self.read(offset=20, length=20)
+
+        self.assertEqual(chunk.lines, ['line 03', 'line 04'])
+        self.assertEqual((chunk.start, chunk.end), (24, 40))
+
+    def test_range_keeps_partial_end_line_out(self):
+        chunk = self.read(offset=792, length=100)
+
+        self.assertEqual(chunk.lines, ['line 99'])
+        self.assertEqual(chunk.end, 800)
+        self.assertTrue(chunk.has_after())
+
+    def test_range_past_end(self):
+        chunk = self.read(offset=10000)
+
+        self.assertEqual(chunk.lines, [])
+        self.assertEqual(chunk.start, chunk.size)
+
+    def test_missing_file_fails(self):
+        remote_log = RemoteLog(self.path + '.missing', lines=3)
+        process = subprocess.run(
+            ['sh', '-c', remote_log.get_script()], capture_output=True)
+
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(process.stdout, b'')
+
+    def test_quoted_path(self):
+        remote_log = RemoteLog("/var/log/a b'; rm -rf /")
+
+        self.assertIn(
+            "f='/var/log/a b'\"'\"'; rm -rf /'", remote_log.get_script())
+
+    def test_window(self):
+        window = LogChunk('/log', 1, 20, 4, 10, ['<b>', 'ok']).to_window()
+
+        self.assertEqual(
+            (window['start_offset'], window['end_offset']), (4, 10))
+        self.assertEqual(window['lines'], ['<b>', 'ok'])
+        self.assertTrue(window['has_before'])
+        self.assertTrue(window['has_after'])
+
+
+def read_window(path, offset, length, reads=None) -> LogChunk:
+    if reads is not None:
+        reads.append(offset)
+    remote_log = RemoteLog(path, offset=offset, length=length)
+    output = subprocess.run(
+        ['sh', '-c', remote_log.get_script()], capture_output=True).stdout
+    return remote_log.parse(output)
+
+
+class ParseLogTimeTest(SimpleTestCase):
+
+    def test_formats(self):
+        lines = [
+            '1.2.3.4 - - [01/May/2022:12:00:00 +0200] "GET / HTTP/1.1" 200',
+            '2022/05/01 12:00:00 [error] 123#0: *1 open() failed',
+            '[Sun May 01 12:00:00.123456 2022] [core:error] [pid 1] x',
+            '[Sun May 01 12:00:00 2022] [error] [client 1.2.3.4] x',
+        ]
+
+        for line in lines:
+            self.assertEqual(parse_log_time(line), datetime(2022, 5, 1, 12))
+
+    def test_line_without_time(self):
+        self.assertIsNone(parse_log_time('    at main (app.js:1:1)'))
+
+
+class LogTimeRangeTest(SimpleTestCase):
+    START = datetime(2022, 5, 1)
+
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        # One access log line per minute for 10 days
+        for minute in range(10 * 24 * 60):
+            time = self.START + timedelta(minutes=minute)
+            file.write(
+                f'1.2.3.4 - - [{time:%d/%b/%Y:%H:%M:%S} +0000] '
+                f'"GET /{minute} HTTP/1.1" 200 10\n'.encode())
+            if minute % 100 == 0:
+                file.write(b'continued line\n')
+        file.close()
+        self.path = file.name
+        self.reads = []
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def get_range(self, since=None, until=None) -> LogTimeRange:
+        return LogTimeRange(
+            lambda offset, length: read_window(
+                self.path, offset, length, self.reads),
+            since=since, until=until)
+
+    def test_hour_range(self):
+        since = datetime(2022, 5, 3, 13)
+        chunk = self.get_range(since, since + timedelta(hours=1)).read()
+        times = [parse_log_time(line) for line in chunk.lines]
+
+        self.assertEqual(times[0], since)
+        self.assertEqual(times[-1], since + timedelta(minutes=59))
+        self.assertEqual(len(chunk.lines), 61)
+        self.assertIn('continued line', chunk.lines)
+        self.assertLess(len(self.reads), 50)
+
+    def test_range_in_parts(self):
+        since = datetime(2022, 5, 3, 14)
+        time_range = self.get_range(since, since + timedelta(hours=1))
+        first = time_range.read(length=1024)
+        second = time_range.read(first.end, 1024)
+
+        self.assertEqual(parse_log_time(first.lines[0]), since)
+        self.assertLessEqual(first.end - first.start, 1024)
+        self.assertEqual(
+            parse_log_time(second.lines[0]),
+            since + timedelta(minutes=len(first.lines)))
+
+    def test_range_past_end(self):
+        chunk = self.get_range(datetime(2023, 1, 1)).read()
+
+        self.assertEqual(chunk.lines, [])
+        self.assertEqual(chunk.start, chunk.size)
+
+
+class LogSearchTest(SimpleTestCase):
+
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        file.write(
+            b'GET /index 200\nGET /login 404\nPOST /login 500\n'
+            b'GET /a.b 200\nget /LOGIN 200\n')
+        file.close()
+        self.path = file.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def search(self, *args, **kwargs):
+        search = LogSearch(*args, **kwargs)
+        output = subprocess.run(
+            ['sh', '-c', search.get_file_command(self.path)],
+            capture_output=True, text=True)
+        self.assertEqual(output.returncode, 0)
+        return search.parse(output.stdout)
+
+    def test_fixed_string(self):
+        result = self.search('a.b')
+
+        self.assertEqual(len(result.matches), 1)
+        self.assertEqual(result.matches[0].line_number, 4)
+        self.assertEqual(result.matches[0].offset, 46)
+        self.assertFalse(result.truncated)
+
+    def test_regex_ignore_case(self):
+        result = self.search('^get /login', regex=True, ignore_case=True)
+
+        self.assertEqual(
+            [match.line_number for match in result.matches], [2, 5])
+
+    def test_context_and_limit(self):
+        result = self.search('POST', context=1, max_matches=1)
+
+        self.assertEqual(
+            [(match.line_number, match.match) for match in result.matches],
+            [(2, False), (3, True), (4, False)])
+        self.assertTrue(result.truncated)
+
+    def test_no_match(self):
+        result = self.search('DELETE')
+
+        self.assertEqual(result.matches, [])
+
+    def test_pattern_is_quoted(self):
+        result = self.search("'; echo injected; '")
+
+        self.assertEqual(result.matches, [])
+
+    def test_search_lines(self):
+        with open(self.path, 'rb') as file:
+            lines = file.readlines()
+        fixed = LogSearch('POST', context=1).search_lines(lines)
+        regex = LogSearch('^get /login', regex=True, ignore_case=True)
+
+        self.assertEqual(fixed, self.search('POST', context=1))
+        self.assertEqual(
+            regex.search_lines(lines), self.search(
+                '^get /login', regex=True, ignore_case=True))
+
+    def test_pipe_command(self):
+        command = LogSearch('login').get_pipe_command('journalctl -u nginx')
+
+        self.assertTrue(command.startswith('journalctl -u nginx | grep '))
+
+
+class AccessLogAggregationTest(SimpleTestCase):
+    LINES = (
+        b'1.1.1.1 - - [01/May/2022:12:00:05 +0000] "GET /a HTTP/1.1" 200 1\n'
+        b'2.2.2.2 - - [01/May/2022:12:01:05 +0000] "GET /b HTTP/1.1" 404 1 '
+        b'"-" "Mozilla/5.0 (X11)"\n'
+        b'1.1.1.1 - - [01/May/2022:12:01:06 +0000] "GET /a HTTP/1.1" 200 1\n'
+        b'not an access log line\n'
+        b'3.3.3.3 - - [01/May/2022:12:02:00 +0000] "GET /c HTTP/1.1" 500 1\n'
+    )
+
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(delete=False)
+        file.write(self.LINES)
+        file.close()
+        self.path = file.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def aggregate(self, start, stop, top=None):
+        aggregation = AccessLogAggregation(top)
+        output = subprocess.run(
+            ['sh', '-c', aggregation.get_script(self.path, start, stop)],
+            capture_output=True, text=True).stdout
+        return aggregation.parse(output)
+
+    def test_aggregates(self):
+        stats = self.aggregate(0, len(self.LINES), top=2)
+
+        self.assertEqual(stats.requests, 4)
+        self.assertEqual(stats.per_minute, {
+            '2022-05-01T12:00:00': 1, '2022-05-01T12:01:00': 2,
+            '2022-05-01T12:02:00': 1})
+        self.assertEqual(
+            stats.status_codes, {'200': 2, '404': 1, '500': 1})
+        self.assertEqual(stats.top_paths[0], ('/a', 2))
+        self.assertEqual(len(stats.top_paths), 2)
+        self.assertEqual(stats.top_ips[0], ('1.1.1.1', 2))
+
+    def test_byte_range(self):
+        stop = self.LINES.index(b'1.1.1.1', 1)
+        stats = self.aggregate(0, stop)
+
+        self.assertEqual(stats.requests, 2)
+        self.assertEqual(stats.status_codes, {'200': 1, '404': 1})
+
+    def test_empty_range(self):
+        stats = self.aggregate(0, 0)
+
+        self.assertEqual(stats.requests, 0)
+        self.assertEqual(stats.top_paths, [])
+
+
+def access_lines(hour, count=3) -> bytes:
+    return b''.join(
+        b'1.2.3.4 - - [01/May/2022:%02d:%02d:00 +0000] "GET /%d HTTP/1.1" '
+        b'200 1\n' % (hour, minute, hour) for minute in range(count))
+
+
+class RotatedLogTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'access.log')
+        now = time.time()
+        with open(self.path + '.2.gz', 'wb') as file:
+            file.write(gzip.compress(access_lines(10) + b'continued\n'))
+        os.utime(self.path + '.2.gz', (now - 7200, now - 7200))
+        with open(self.path + '.1', 'wb') as file:
+            file.write(access_lines(11))
+        os.utime(self.path + '.1', (now - 3600, now - 3600))
+        with open(self.path, 'wb') as file:
+            file.write(access_lines(12))
+        with open(self.path + '.bak', 'wb') as file:
+            file.write(access_lines(9))
+        self.rotated_log = RotatedLog(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_script(self, script) -> subprocess.CompletedProcess:
+        output = subprocess.run(['sh', '-c', script], capture_output=True)
+        self.assertEqual(output.returncode, 0)
+        return output
+
+    def get_files(self):
+        output = self.run_script(self.rotated_log.get_list_script())
+        return self.rotated_log.parse_files(output.stdout.decode())
+
+    def test_files_oldest_first(self):
+        files = self.get_files()
+
+        self.assertEqual(
+            [os.path.basename(log_file.path) for log_file in files],
+            ['access.log.2.gz', 'access.log.1', 'access.log'])
+        self.assertTrue(files[0].is_compressed())
+        self.assertEqual(files[-1].size, os.path.getsize(self.path))
+
+    def test_range_across_files(self):
+        files = self.get_files()[:-1]
+        since, until = datetime(2022, 5, 1, 10, 2), datetime(2022, 5, 1, 11, 1)
+        script = self.rotated_log.get_range_script(files, since, until)
+        lines = RotatedLog.parse_lines(self.run_script(script).stdout)
+
+        self.assertEqual(
+            [parse_log_time(line) for line in lines], [
+                since, None, datetime(2022, 5, 1, 11)])
+
+    def test_files_out_of_range_are_skipped(self):
+        files = self.get_files()
+        server_tz = timezone(timedelta(hours=-5))
+        modified = datetime.fromtimestamp(files[1].mtime, server_tz)\
+            .replace(tzinfo=None)
+
+        self.assertEqual(
+            self.rotated_log.get_range_files(
+                files, since=modified, server_tz=server_tz),
+            [files[1]])
+        self.assertEqual(
+            self.rotated_log.get_range_files(
+                files, until=modified, server_tz=server_tz),
+            files[:2])
+
+    def test_tail_of_compressed_file(self):
+        output = self.run_script(self.get_files()[0].get_tail_command(2))
+
+        self.assertEqual(
+            RotatedLog.parse_lines(output.stdout)[-1], 'continued')
+
+    def test_search_across_files(self):
+        search = LogSearch('GET /1', max_matches=4)
+        output = self.run_script(search.get_files_script(self.get_files()))
+        result = search.parse(output.stdout.decode())
+
+        # The limit keeps the newest matches, still in file order
+        self.assertEqual(
+            [os.path.basename(match.path) for match in result.matches], [
+                'access.log.1', 'access.log', 'access.log', 'access.log'])
+        self.assertEqual(
+            [match.line_number for match in result.matches], [3, 1, 2, 3])
+        self.assertTrue(result.truncated)
+
+    def test_other_files_are_ignored(self):
+        self.assertIsNone(self.rotated_log.get_rotation(self.path + '.bak'))
+        self.assertEqual(
+            self.rotated_log.get_rotation(self.path + '-20220501.gz'),
+            -20220501)
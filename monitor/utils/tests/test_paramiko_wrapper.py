@@ -0,0 +1,134 @@
+"""
+Paramiko wrapper module test
+"""
+
+
+import os
+import threading
+import time
+
+from django.test import SimpleTestCase
+from utils.paramiko_wrapper import (ChannelLimiter, CommandStream,
+                                    CommandTimeout, OutputLimitExceeded)
+
+
+class ChannelLimiterTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.limiter = ChannelLimiter(2)
+
+    def wait_for_waiting(self, count: int, timeout=1):
+        deadline = time.monotonic() + timeout
+        while self.limiter.waiting() < count:
+            if time.monotonic() > deadline:
+                self.fail(f'{count} threads are not waiting')
+            time.sleep(0.01)
+
+    def test_acquire_under_limit(self):
+        self.assertTrue(self.limiter.acquire())
+        self.assertTrue(self.limiter.acquire())
+        self.assertEqual(self.limiter.in_use(), 2)
+
+    def test_acquire_timeout_over_limit(self):
+        self.limiter.acquire()
+        self.limiter.acquire()
+        self.assertFalse(self.limiter.acquire(timeout=0.01))
+        self.assertEqual(self.limiter.waiting(), 0)
+
+    def test_release_hands_slot_in_order(self):
+        self.limiter.acquire()
+        self.limiter.acquire()
+        order = []
+
+        def wait(name):
+            self.limiter.acquire()
+            order.append(name)
+
+        threads = []
+        for name in ('first', 'second'):
+            thread = threading.Thread(
+                target=wait, args=(name,), daemon=True)
+            thread.start()
+            threads.append(thread)
+            self.wait_for_waiting(len(threads))
+
+        self.limiter.release()
+        threads[0].join(1)
+        self.limiter.release()
+        threads[1].join(1)
+        self.assertEqual(order, ['first', 'second'])
+        self.assertEqual(self.limiter.in_use(), 2)
+
+
+class FakeChannel:
+    def __init__(self, stdout=(), stderr=(), status=0) -> None:
+        self.stdout = list(stdout)
+        self.stderr = list(stderr)
+        self.status = status
+        self.closed = False
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b'1')
+        self.fd = read_fd
+
+    def fileno(self):
+        return self.fd
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv(self, size):
+        return self.stdout.pop(0)
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        return True
+
+    def recv_exit_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = True
+
+
+class CommandStreamTest(SimpleTestCase):
+    def test_stream_reads_both_outputs(self):
+        closed = []
+        channel = FakeChannel(
+            stdout=[b'one\ntw', b'o\n'], stderr=[b'warn'], status=3)
+        stream = CommandStream(channel, on_close=lambda: closed.append(1))
+        chunks = list(stream)
+        self.assertIn(('stderr', b'warn'), chunks)
+        self.assertEqual(stream.status, 3)
+        self.assertTrue(channel.closed)
+        self.assertEqual(closed, [1])
+
+    def test_lines(self):
+        channel = FakeChannel(stdout=[b'one\ntw', b'o\nthree'])
+        stream = CommandStream(channel)
+        self.assertEqual(list(stream.lines()), ['one', 'two', 'three'])
+
+    def test_output_limit(self):
+        channel = FakeChannel(stdout=[b'12345', b'67890'])
+        stream = CommandStream(channel, max_bytes=7)
+        with self.assertRaises(OutputLimitExceeded):
+            list(stream)
+        self.assertTrue(channel.closed)
+
+    def test_output_truncate(self):
+        channel = FakeChannel(stdout=[b'12345', b'67890'])
+        stream = CommandStream(channel, max_bytes=7, truncate=True)
+        data = b''.join(chunk for _, chunk in stream)
+        self.assertEqual(data, b'1234567')
+        self.assertTrue(stream.truncated)
+        self.assertIsNone(stream.status)
+
+    def test_timeout(self):
+        channel = FakeChannel(stdout=[b'1'])
+        channel.exit_status_ready = lambda: False
+        stream = CommandStream(channel, timeout=-1)
+        with self.assertRaises(CommandTimeout):
+            list(stream)
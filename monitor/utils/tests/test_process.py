@@ -4,8 +4,12 @@ Process module test
 
 
 import json
+from datetime import timedelta
+from unittest import mock
+
 from django.test import SimpleTestCase
-from utils.process import ServerProcess, NoServerClient
+from utils.process import (NoServerClient, ServerProcess, UnitState,
+                           parse_systemctl_show)
 from utils.paramiko_wrapper import Dir
 from utils.general import cryptor
 
@@ -101,3 +105,61 @@ class ServerProcessTest(SimpleTestCase):
 
         computed = self.process.parse_website_data(data)
         self.assertDictEqual(expected, computed)
+
+    def test_get_units_state(self):
+        output = (
+            'Id=nginx.service\nLoadState=loaded\nActiveState=active\n'
+            'SubState=running\nMainPID=812\n\n'
+            'Id=missing.service\nLoadState=not-found\n'
+            'ActiveState=inactive\nSubState=dead\nMainPID=0\n')
+        client = mock.Mock()
+        client.execute.return_value = output
+        self.process.client = client
+
+        computed = self.process.get_units_state(['nginx', 'missing'])
+        command = client.execute.call_args[0][0]
+        self.assertEqual(client.execute.call_count, 1)
+        self.assertTrue(command.endswith('-- nginx missing'))
+        self.assertEqual(
+            computed['nginx'],
+            UnitState('nginx.service', 'loaded', 'active', 'running', 812))
+        self.assertFalse(computed['missing'].is_active)
+        self.process.client = None
+
+    def test_get_active_state_missing_unit(self):
+        client = mock.Mock()
+        client.execute.return_value = ''
+        self.process.client = client
+
+        self.assertFalse(self.process.get_active_state('missing'))
+        self.process.client = None
+
+    def test_get_timezone(self):
+        client = mock.Mock()
+        self.process.client = client
+
+        client.execute.return_value = '-0330\n'
+        self.assertEqual(
+            self.process.get_timezone().utcoffset(None),
+            -timedelta(hours=3, minutes=30))
+        client.execute.return_value = 'date: invalid\n'
+        with self.assertRaises(ValueError):
+            self.process.get_timezone()
+        self.process.client = None
+
+    def test_parse_systemctl_show(self):
+        computed = parse_systemctl_show('\nA=1\nB=x=y\n\n\nA=2\n')
+        self.assertEqual(computed, [{'A': '1', 'B': 'x=y'}, {'A': '2'}])
+
+    def test_files_exist_quotes_paths(self):
+        client = mock.Mock()
+        client.execute_batch.return_value = [
+            mock.Mock(status=0), mock.Mock(status=1)]
+        self.process.client = client
+
+        computed = self.process.files_exist(['/a b', "/c'; rm -rf /"])
+        commands = client.execute_batch.call_args[0][0]
+        self.assertEqual(
+            commands, ["test -e '/a b'", "test -e '/c'\"'\"'; rm -rf /'"])
+        self.assertEqual(computed, {'/a b': True, "/c'; rm -rf /": False})
+        self.process.client = None
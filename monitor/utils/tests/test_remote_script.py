@@ -0,0 +1,105 @@
+"""
+Remote script module test
+"""
+
+
+import os
+import subprocess
+import tempfile
+
+from django.test import SimpleTestCase
+from utils.remote_script import CommandResult, FileDump, RemoteBatch
+
+
+class RemoteBatchTest(SimpleTestCase):
+    def run_batch(self, batch: RemoteBatch) -> str:
+        result = subprocess.run(
+            ['sh', '-c', batch.get_script()],
+            capture_output=True, text=True)
+        return result.stdout
+
+    def test_parse_script_output(self):
+        batch = RemoteBatch([
+            'echo one; echo two',
+            'printf "no newline"; echo oops >&2; exit 3',
+            'echo last',
+        ])
+        computed = batch.parse(self.run_batch(batch))
+        expected = [
+            CommandResult('one\ntwo\n', '', 0),
+            CommandResult('no newline', 'oops\n', 3),
+            CommandResult('last\n', '', 0),
+        ]
+        self.assertEqual(computed, expected)
+
+    def test_parse_missing_section(self):
+        batch = RemoteBatch(['echo one', 'echo two'])
+        output = self.run_batch(batch)
+        output = output[:output.index(batch.get_section(1, 'err'))]
+        computed = batch.parse(output)
+        self.assertEqual(computed[0], CommandResult('one\n', '', 0))
+        self.assertIsNone(computed[1].status)
+
+    def test_get_command_quotes_script(self):
+        batch = RemoteBatch(["echo 'quoted'"])
+        result = subprocess.run(
+            batch.get_command(), shell=True, capture_output=True, text=True)
+        computed = batch.parse(result.stdout)
+        self.assertEqual(computed, [CommandResult('quoted\n', '', 0)])
+
+
+class FileDumpTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        with open(os.path.join(self.path, 'one.conf'), 'w') as file:
+            file.write('server {\n}\n')
+        with open(os.path.join(self.path, 'two words.conf'), 'w') as file:
+            file.write('no newline')
+        os.mkdir(os.path.join(self.path, 'sub'))
+        os.symlink(
+            os.path.join(self.path, 'one.conf'),
+            os.path.join(self.path, 'link.conf'))
+        self.dump = FileDump()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def run_command(self, command: str) -> list:
+        output = subprocess.run(
+            command, shell=True, capture_output=True, text=True).stdout
+        return output.splitlines()
+
+    def test_directory_command(self):
+        command = self.dump.get_directory_command(self.path)
+        files = list(self.dump.parse_lines(self.run_command(command)))
+        computed = {item.name: item.content for item in files}
+        expected = {
+            'link.conf': 'server {\n}\n',
+            'one.conf': 'server {\n}\n',
+            'two words.conf': 'no newline',
+        }
+        self.assertEqual(computed, expected)
+        link = [item for item in files if item.name == 'link.conf'][0]
+        self.assertEqual(
+            link.inode, os.stat(os.path.join(self.path, 'one.conf')).st_ino)
+
+    def test_files_command_stat_only(self):
+        paths = [os.path.join(self.path, 'one.conf'), '/does/not/exist']
+        command = self.dump.get_files_command(paths, content=False)
+        files = list(self.dump.parse_lines(
+            self.run_command(command), content=False))
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0].path, paths[0])
+        self.assertEqual(files[0].size, 11)
+        self.assertIsNone(files[0].content)
+
+    def test_files_command_expand(self):
+        paths = [os.path.join(self.path, 'tw? words.conf')]
+        command = self.dump.get_files_command(paths, expand=True)
+        files = list(self.dump.parse_lines(self.run_command(command)))
+        self.assertEqual([item.name for item in files], ['two words.conf'])
+
+        command = self.dump.get_files_command(paths)
+        self.assertEqual(list(self.dump.parse_lines(
+            self.run_command(command))), [])
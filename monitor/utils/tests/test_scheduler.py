@@ -0,0 +1,61 @@
+"""
+Scheduler module test
+"""
+
+
+import threading
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+from utils.scheduler import AdaptiveSchedule, Scheduler
+
+
+class AdaptiveScheduleTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.schedule = AdaptiveSchedule(
+            base_interval=600, min_interval=60, max_interval=3600,
+            jitter=0)
+        self.now = datetime(2022, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    def test_get_interval(self):
+        get_interval = self.schedule.get_interval
+        self.assertEqual(get_interval(None, True, 0), 600)
+        self.assertEqual(get_interval(600, False, 5), 60)
+        self.assertEqual(get_interval(600, True, 1), 600)
+        self.assertEqual(get_interval(600, True, 3), 900)
+        self.assertEqual(get_interval(3000, True, 9), 3600)
+        self.assertEqual(get_interval(600, False, 0, override=120), 120)
+
+    def test_next_check_keeps_phase(self):
+        first = self.schedule.get_next_check('url:1', self.now, 600)
+        self.assertGreater(first, self.now)
+        self.assertLessEqual((first - self.now).total_seconds(), 600)
+
+        second = self.schedule.get_next_check('url:1', first, 600)
+        self.assertAlmostEqual((second - first).total_seconds(), 600)
+
+    def test_next_checks_are_spread(self):
+        slots = [
+            self.schedule.get_next_check(f'url:{key}', self.now, 600)
+            for key in range(200)]
+        minutes = {int((slot - self.now).total_seconds() // 60)
+                   for slot in slots}
+        self.assertEqual(minutes, set(range(10)))
+
+
+class SchedulerTest(SimpleTestCase):
+    def test_errors_do_not_stop_loop(self):
+        ticks = []
+        done = threading.Event()
+
+        def tick():
+            ticks.append(1)
+            if len(ticks) == 3:
+                done.set()
+            raise ValueError
+
+        scheduler = Scheduler(tick, tick_seconds=0.01)
+        scheduler.start()
+        self.assertTrue(done.wait(1))
+        scheduler.stop(1)
+        self.assertFalse(scheduler.is_running())
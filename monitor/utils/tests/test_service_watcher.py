@@ -0,0 +1,104 @@
+"""
+Service watcher module test
+"""
+
+
+import json
+import threading
+
+from django.test import SimpleTestCase
+from utils.service_watcher import (ServiceWatcher, get_unit_name,
+                                   parse_journal_event)
+
+
+def journal_line(message_id, unit='nginx.service', **fields):
+    return json.dumps({
+        'MESSAGE_ID': message_id, 'UNIT': unit,
+        '__REALTIME_TIMESTAMP': '1651406400000000', **fields})
+
+
+STARTED = '39f53479d3a045ac8e11786248231fbf'
+FAILED = 'be02cf6855d2428ba40df7e9d022f03d'
+
+
+class FakeStream:
+    def __init__(self, lines) -> None:
+        self.output = lines
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.closed = True
+
+    def lines(self):
+        yield from self.output
+
+
+class FakeClient:
+    def __init__(self, lines) -> None:
+        self.stream_lines = lines
+        self.commands = []
+
+    def stream(self, command, sudo=False):
+        self.commands.append(command)
+        return FakeStream(self.stream_lines)
+
+
+class ParseJournalEventTest(SimpleTestCase):
+    def test_state_changes(self):
+        computed = parse_journal_event(journal_line(STARTED))
+        self.assertEqual(computed.unit, 'nginx.service')
+        self.assertTrue(computed.active)
+        self.assertEqual(computed.time.year, 2022)
+        self.assertFalse(parse_journal_event(journal_line(FAILED)).active)
+
+    def test_failed_start_job(self):
+        line = journal_line(STARTED, JOB_RESULT='failed')
+        self.assertFalse(parse_journal_event(line).active)
+
+    def test_other_entries_ignored(self):
+        self.assertIsNone(parse_journal_event(journal_line('abc')))
+        self.assertIsNone(parse_journal_event(journal_line(STARTED, '')))
+        self.assertIsNone(parse_journal_event('Password: '))
+
+    def test_get_unit_name(self):
+        self.assertEqual(get_unit_name('nginx'), 'nginx.service')
+        self.assertEqual(get_unit_name('backup.timer'), 'backup.timer')
+
+
+class ServiceWatcherTest(SimpleTestCase):
+    def test_follow_resyncs_and_reports_events(self):
+        calls = []
+        client = FakeClient([
+            journal_line(STARTED), 'noise', journal_line(FAILED, 'db')])
+        watcher = ServiceWatcher(
+            'main', lambda: client, lambda: calls.append('resync'),
+            lambda event: calls.append((event.unit, event.active)))
+
+        watcher.follow()
+        self.assertEqual(client.commands, [ServiceWatcher.COMMAND])
+        self.assertEqual(
+            calls, ['resync', ('nginx.service', True), ('db', False)])
+
+    def test_run_reconnects_after_errors(self):
+        connects = []
+        done = threading.Event()
+
+        def connect():
+            connects.append(1)
+            if len(connects) == 3:
+                done.set()
+            raise ConnectionError
+
+        watcher = ServiceWatcher('main', connect, lambda: None, print)
+        watcher.RETRY_DELAY = 0.001
+        watcher.MAX_RETRY_DELAY = 0.001
+        watcher.start()
+        self.assertTrue(done.wait(1))
+        watcher.stop(1)
+        self.assertFalse(watcher.is_running())
@@ -0,0 +1,127 @@
+"""
+Timeline module test
+"""
+
+
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+from utils.journal import JournalEntry, JournalPage
+from utils.log_mirror import SegmentStore
+from utils.logs import LogBytes
+from utils.timeline import (InvalidTimelineCursor, JournalSource,
+                            MirrorLogSource, RemoteLogSource, decode_cursor,
+                            encode_cursor, merge_timeline)
+
+
+START = datetime(2022, 5, 1, 12)
+
+
+def access_line(minute) -> bytes:
+    time = START + timedelta(minutes=minute)
+    return (
+        f'1.2.3.4 - - [{time:%d/%b/%Y:%H:%M:%S} +0000] '
+        f'"GET /{minute} HTTP/1.1" 200 1\n').encode()
+
+
+def error_line(minute) -> bytes:
+    time = START + timedelta(minutes=minute)
+    return f'{time:%Y/%m/%d %H:%M:%S} [error] {minute}\n'.encode()
+
+
+def get_remote_source(name, data, reads=None) -> RemoteLogSource:
+    def read(offset, length):
+        if reads is not None:
+            reads.append(offset)
+        return LogBytes(1, len(data), offset, data[offset:offset + length])
+    return RemoteLogSource(name, read)
+
+
+def get_journal_source(name, minutes) -> JournalSource:
+    entries = [
+        JournalEntry(
+            str(minute), (START + timedelta(minutes=minute)).replace(
+                tzinfo=timezone.utc), f'journal {minute}')
+        for minute in minutes]
+
+    def read_page(since=None, after=None):
+        start = 0
+        if after is not None:
+            start = [entry.cursor for entry in entries].index(after) + 1
+        return JournalPage(entries[start:start + 2], start + 2 < len(entries))
+    return JournalSource(name, read_page)
+
+
+class CursorTest(SimpleTestCase):
+
+    def test_round_trip(self):
+        cursor = {'/var/log/a': '10', 'nginx': None}
+
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
+
+    def test_invalid(self):
+        for text in ('not a cursor', encode_cursor([1])):
+            with self.assertRaises(InvalidTimelineCursor):
+                decode_cursor(text)
+
+
+class MergeTimelineTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SegmentStore(self.directory.name)
+        self.store.append(error_line(1) + b'  continued\n' + error_line(4))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_sources(self, reads=None):
+        access = b''.join(access_line(minute) for minute in (0, 2, 5))
+        return [
+            get_remote_source('access', access, reads),
+            MirrorLogSource('error', self.store),
+            get_journal_source('nginx', (3, 4, 6)),
+        ]
+
+    def test_time_order(self):
+        page = merge_timeline(self.get_sources())
+
+        self.assertEqual(
+            [line.source for line in page.lines], [
+                'access', 'error', 'error', 'access', 'nginx', 'error',
+                'nginx', 'access', 'nginx'])
+        self.assertEqual(page.lines[2].line, '  continued')
+        self.assertFalse(page.has_more)
+
+    def test_pages(self):
+        first = merge_timeline(self.get_sources(), lines=4)
+        second = merge_timeline(
+            self.get_sources(), decode_cursor(first.to_dict()['cursor']),
+            lines=10)
+
+        self.assertTrue(first.has_more)
+        self.assertEqual(
+            first.lines + second.lines, merge_timeline(
+                self.get_sources()).lines)
+
+    def test_continues_from_log_end(self):
+        reads = []
+        page = merge_timeline(self.get_sources())
+        merge_timeline(self.get_sources(reads), page.cursor)
+
+        self.assertEqual(reads, [len(access_line(0)) * 3])
+
+    def test_until(self):
+        page = merge_timeline(
+            self.get_sources(), until=START + timedelta(minutes=3))
+
+        self.assertEqual(len(page.lines), 4)
+        self.assertFalse(page.has_more)
+
+    def test_mirror_since(self):
+        source = MirrorLogSource(
+            'error', self.store, since=START + timedelta(minutes=2))
+
+        self.assertEqual(
+            [entry.position for entry in source.iter_entries()], ['2'])
@@ -5,6 +5,7 @@ Webservers module test
 import json
 
 from django.test import SimpleTestCase
+from utils.remote_script import RemoteFile
 from utils.webservers import (Apache, BaseWebserver, Nginx,
                               WebserverDoesNotExist, create_web_server)
 
@@ -372,6 +373,79 @@ class NginxTest(SimpleTestCase):
         self.assertEqual(computed, expected)
 
 
+class NginxParserTest(SimpleTestCase):
+    CONF = """
+    server {
+        listen 80;
+        server_name example.com www.example.com;
+        root /var/www/example;
+        access_log /var/log/nginx/example.log;
+        error_log /var/log/nginx/example.error.log;
+        include snippets/*.conf;
+        location /static {
+            access_log off;
+        }
+    }
+
+    server {
+        listen 443 ssl;
+        server_name "api.example.com";
+        set $logs /var/log/nginx;
+        access_log ${logs}/api.log main;
+    }
+    """
+
+    SNIPPET = """
+    # Cache logs
+    access_log /var/log/nginx/cache.log;
+    """
+
+    def setUp(self) -> None:
+        self.webserver = Nginx(ip_address='127.0.0.1')
+
+    def test_get_site_details_server_blocks(self):
+        computed = self.webserver.get_site_details(self.CONF)
+        self.assertEqual(
+            computed['urls'],
+            ['example.com', 'www.example.com', 'api.example.com'])
+        self.assertEqual(
+            computed['access_log'], '/var/log/nginx/example.log')
+        self.assertEqual(
+            computed['error_log'], '/var/log/nginx/example.error.log')
+        self.assertEqual(json.loads(computed['other_logs']), [
+            {'name': 'access_log', 'location': '/var/log/nginx/api.log'},
+        ])
+
+        first, second = computed['vhosts']
+        self.assertEqual(first['listen'], ['80'])
+        self.assertEqual(first['root'], '/var/www/example')
+        self.assertEqual(second['listen'], ['443'])
+        self.assertEqual(second['error_logs'], [])
+
+    def test_iter_site_details_includes(self):
+        requested = []
+
+        def fetch_includes(patterns):
+            requested.append(patterns)
+            return {
+                '/etc/nginx/snippets/*.conf': [RemoteFile(
+                    '/etc/nginx/snippets/cache.conf', 1, 1, 1,
+                    self.SNIPPET)],
+            }
+
+        files = [
+            RemoteFile('/etc/nginx/sites-enabled/one', 1, 2, 3, self.CONF),
+            RemoteFile('/etc/nginx/sites-enabled/two', 1, 3, 3, self.CONF),
+        ]
+        computed = list(
+            self.webserver.iter_site_details(files, fetch_includes))
+        self.assertEqual(requested, [['/etc/nginx/snippets/*.conf']])
+        self.assertEqual(len(computed), 2)
+        self.assertIn(
+            {'name': 'access_log', 'location': '/var/log/nginx/cache.log'},
+            json.loads(computed[0]['other_logs']))
+
+
 class ApacheTest(SimpleTestCase):
     def setUp(self) -> None:
         self.init = {
@@ -485,3 +559,50 @@ class ApacheTest(SimpleTestCase):
         )
 
         self.assertEqual(computed, expected)
+
+    def test_iter_site_details(self):
+        """
+        Test iter_site_details skips ssl configurations
+        """
+
+        with open('utils/tests/apache_test.txt', 'r') as file:
+            text = file.read()
+
+        files = [
+            RemoteFile('/etc/apache2/sites-enabled/site.conf', 10, 2, 3, text),
+            RemoteFile(
+                '/etc/apache2/sites-enabled/site-le-ssl.conf', 10, 3, 3, text),
+        ]
+        computed = list(self.webserver.iter_site_details(files))
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(computed[0]['file_name'], files[0].path)
+        self.assertEqual(computed[0]['conf_mtime'], 10)
+        self.assertEqual(computed[0]['conf_inode'], 2)
+        self.assertEqual(
+            computed[0]['error_log'], '/var/log/apache2/site.error.log')
+
+    def test_get_site_details_virtual_hosts(self):
+        """
+        Test apache virtual hosts with defined variables
+        """
+
+        conf = """
+        Define site example
+        <VirtualHost *:80>
+            ServerName ${site}.com
+            ServerAlias www.${site}.com
+            DocumentRoot "/var/www/${site}"
+            ErrorLog ${APACHE_LOG_DIR}/${site}.error.log
+            CustomLog ${APACHE_LOG_DIR}/${site}.log \\
+                combined
+        </VirtualHost>
+        """
+
+        computed = self.webserver.get_site_details(conf)
+        self.assertEqual(computed['urls'], ['example.com', 'www.example.com'])
+        self.assertEqual(
+            computed['access_log'], '/var/log/apache2/example.log')
+        self.assertEqual(
+            computed['error_log'], '/var/log/apache2/example.error.log')
+        self.assertEqual(computed['vhosts'][0]['listen'], ['*:80'])
+        self.assertEqual(computed['vhosts'][0]['root'], '/var/www/example')
@@ -0,0 +1,294 @@
+"""
+Module for merging several logs into one time ordered
+timeline, read page by page. Every time of the timeline
+is an aware UTC datetime.
+"""
+
+
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime, timezone, tzinfo
+from typing import Callable, Dict, Iterator, List, NamedTuple
+
+from .journal import JournalPage
+from .log_mirror import SegmentStore
+from .logs import LogBytes, RemoteLog, parse_log_time
+
+
+class InvalidTimelineCursor(Exception):
+    """
+    Timeline cursor could not be decoded
+    """
+
+
+class TimelineEntry(NamedTuple):
+    """
+    One line of a source, position is where the source is read
+    from to get this line again and next_position is where the
+    line after it starts
+    """
+    time: datetime
+    position: str
+    next_position: str
+    line: str
+
+
+class TimelineLine(NamedTuple):
+    """
+    One line of the merged timeline
+    """
+    time: datetime
+    source: str
+    line: str
+
+    def to_dict(self) -> dict:
+        data = self._asdict()
+        data['time'] = self.time.isoformat() if self.time else None
+        return data
+
+
+class TimelinePage(NamedTuple):
+    """
+    Lines of the timeline in time order, cursor holds the
+    position of every source to read the next page from
+    """
+    lines: List[TimelineLine]
+    cursor: Dict[str, str]
+    has_more: bool
+
+    def to_dict(self) -> dict:
+        return {
+            'lines': [line.to_dict() for line in self.lines],
+            'cursor': encode_cursor(self.cursor),
+            'has_more': self.has_more,
+        }
+
+
+def to_utc(time: datetime) -> datetime:
+    """
+    Get time as an aware UTC datetime, naive
+    times are taken as UTC
+    """
+
+    if time is None:
+        return None
+    if time.tzinfo is None:
+        return time.replace(tzinfo=timezone.utc)
+    return time.astimezone(timezone.utc)
+
+
+def encode_cursor(cursor: Dict[str, str]) -> str:
+    text = json.dumps(cursor, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def decode_cursor(text: str) -> Dict[str, str]:
+    """
+    Decode a cursor of TimelinePage.to_dict
+
+    :raises InvalidTimelineCursor: When the text is not a cursor
+    :rtype: Dict[str, str]
+    """
+
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(text.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidTimelineCursor
+    if not isinstance(cursor, dict) or not all(
+            isinstance(value, (str, type(None)))
+            for value in cursor.values()):
+        raise InvalidTimelineCursor
+    return cursor
+
+
+class LogSource:
+    """
+    Base of the timeline sources, entries are read lazily
+    from a position and lines without a time get the time
+    of the line before them. Log lines are written in the
+    server local time, which is server_tz.
+    """
+
+    def __init__(
+        self, name: str, since: datetime = None,
+        server_tz: tzinfo = timezone.utc
+    ) -> None:
+        self.name = name
+        self.since = to_utc(since)
+        self.server_tz = server_tz
+
+    def get_time(self, line: str) -> datetime:
+        """
+        Get the UTC time of a log line, None
+        for lines without a time
+        """
+
+        time = parse_log_time(line)
+        if time is None:
+            return None
+        return to_utc(time.replace(tzinfo=self.server_tz))
+
+    def iter_entries(self, position: str = None) -> Iterator[TimelineEntry]:
+        """
+        Iterate over the entries from position, from since
+        when position is None
+        """
+
+        raise NotImplementedError
+
+
+class RemoteLogSource(LogSource):
+    """
+    Log file read in windows of LENGTH bytes, positions are
+    byte offsets. locate gives the offset of since.
+    """
+    LENGTH = 64 * 1024
+
+    def __init__(
+        self, name: str, read: Callable[[int, int], LogBytes],
+        locate: Callable[[], int] = None, since: datetime = None,
+        server_tz: tzinfo = timezone.utc
+    ) -> None:
+        super().__init__(name, since, server_tz)
+        self.read = read
+        self.locate = locate
+
+    def iter_entries(self, position: str = None) -> Iterator[TimelineEntry]:
+        if position is not None:
+            offset = int(position)
+        else:
+            offset = self.locate() if self.locate else 0
+
+        time = self.since
+        while True:
+            part = self.read(offset, self.LENGTH)
+            # Only whole lines, the rest is read again
+            data = part.data[:part.data.rfind(b'\n') + 1]
+            for raw_line in data.splitlines(keepends=True):
+                line = raw_line.rstrip(b'\n').decode(errors='replace')
+                time = self.get_time(line) or time
+                next_offset = offset + len(raw_line)
+                yield TimelineEntry(
+                    time, str(offset), str(next_offset), line)
+                offset = next_offset
+            if len(part.data) < self.LENGTH or not data:
+                break
+
+
+class MirrorLogSource(LogSource):
+    """
+    Local mirror of a log, positions are line numbers
+    """
+
+    def __init__(
+        self, name: str, store: SegmentStore, since: datetime = None,
+        server_tz: tzinfo = timezone.utc
+    ) -> None:
+        super().__init__(name, since, server_tz)
+        self.store = store
+
+    def iter_entries(self, position: str = None) -> Iterator[TimelineEntry]:
+        start = int(position) if position is not None else None
+        time = self.since
+        for index, raw_line in enumerate(self.store.iter_lines()):
+            if start is not None and index < start:
+                continue
+            line = raw_line.rstrip(b'\n').decode(errors='replace')
+            time = self.get_time(line) or time
+            if start is None:
+                if self.since and (time is None or time < self.since):
+                    continue
+                start = index
+            yield TimelineEntry(time, str(index), str(index + 1), line)
+
+
+class JournalSource(LogSource):
+    """
+    Journal of a service read page by page, positions are the
+    cursor of the entry before, None for the first entry from
+    since
+    """
+
+    def __init__(
+        self, name: str, read_page: Callable[..., JournalPage],
+        since: datetime = None
+    ) -> None:
+        super().__init__(name, since)
+        self.read_page = read_page
+
+    def iter_entries(self, position: str = None) -> Iterator[TimelineEntry]:
+        while True:
+            if position is None:
+                page = self.read_page(since=self.since)
+            else:
+                page = self.read_page(after=position)
+
+            for entry in page.entries:
+                yield TimelineEntry(
+                    to_utc(entry.time), position, entry.cursor,
+                    entry.message)
+                position = entry.cursor
+            if not page.has_more or not page.entries:
+                break
+
+
+def merge_timeline(
+    sources: List[LogSource], cursor: Dict[str, str] = None,
+    lines: int = None, until: datetime = None
+) -> TimelinePage:
+    """
+    Merge the entries of sources in time order with a heap
+    holding the next entry of each source, so only one entry
+    per source is kept while a page is read. Lines at the same
+    time keep the order of sources.
+
+    :param sources: Sources to merge, names must be unique
+    :type sources: List[LogSource]
+    :param cursor: Positions of the sources from the last
+    page, defaults to None
+    :type cursor: Dict[str, str], optional
+    :param lines: Lines of the page, defaults to RemoteLog.LINES
+    :type lines: int, optional
+    :param until: Only lines before this time, naive times are
+    taken as UTC, defaults to None
+    :type until: datetime, optional
+    :rtype: TimelinePage
+    """
+
+    until = to_utc(until)
+    cursor = cursor or {}
+    lines = min(lines or RemoteLog.LINES, RemoteLog.MAX_LINES)
+    positions = {source.name: cursor.get(source.name) for source in sources}
+
+    heap = []
+    iterators = []
+
+    def push(index: int):
+        entry = next(iterators[index], None)
+        if entry is None:
+            return
+        if until is not None and entry.time is not None \
+                and entry.time >= until:
+            return
+        # Lines before the first time go first
+        key = entry.time or datetime.min.replace(tzinfo=timezone.utc)
+        heapq.heappush(heap, (key, index, entry))
+
+    for index, source in enumerate(sources):
+        iterators.append(source.iter_entries(positions[source.name]))
+        push(index)
+
+    page = []
+    while heap and len(page) < lines:
+        _, index, entry = heapq.heappop(heap)
+        source = sources[index]
+        page.append(TimelineLine(entry.time, source.name, entry.line))
+        positions[source.name] = entry.next_position
+        push(index)
+
+    # Sources with a line left are read again from that line
+    for _, index, entry in heap:
+        positions[sources[index].name] = entry.position
+    return TimelinePage(page, positions, bool(heap))
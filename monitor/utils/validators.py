@@ -12,6 +12,17 @@ def validate_special_char(value):
             params={'value': value},
         )
 
+
+def validate_status_codes(value):
+    for code in value.split(','):
+        code = code.strip()
+        if code and not (code.isdigit() and 100 <= int(code) <= 599):
+            raise ValidationError(
+                _('Must be comma separated http status codes'),
+                params={'value': value},
+            )
+
+
 def validate_phone(phone=''):
     pattern =r'^\+(?:[0-9] ?){6,14}[0-9]$'
     s=re.match(pattern,phone)
@@ -3,9 +3,13 @@ Module for web servers
 """
 
 
+import hashlib
 import json
+import posixpath
 import re
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from utils.remote_script import RemoteFile
 
 
 class WebserverDoesNotExist(Exception):
@@ -14,10 +18,287 @@ class WebserverDoesNotExist(Exception):
     """
 
 
+def get_conf_fingerprint(
+    checksum: str, includes: Dict[str, List[RemoteFile]] = None
+) -> str:
+    """
+    Fingerprint of a configuration file with the files its include
+    patterns matched, included files count by their stat details.
+    Without includes it is the file checksum.
+
+    :param checksum: Checksum of the configuration file
+    :type checksum: str
+    :param includes: Files matched by each include pattern
+    :type includes: Dict[str, List[RemoteFile]], optional
+    :rtype: str
+    """
+
+    if not includes:
+        return checksum
+
+    digest = hashlib.sha1((checksum or '').encode())
+    for pattern in sorted(includes):
+        digest.update(f"\n{pattern}".encode())
+        for included in sorted(includes[pattern]):
+            digest.update(
+                f"\t{included.path}:{included.mtime}:{included.inode}:"
+                f"{included.size}".encode())
+    return digest.hexdigest()
+
+
+class Directive:
+    """
+    Configuration directive, block directives
+    (server, VirtualHost, location ...) have children
+    """
+
+    def __init__(
+        self, name: str, args: List[str] = None,
+        children: List['Directive'] = None
+    ) -> None:
+        self.name = name
+        self.args = args or []
+        self.children = children
+
+    def is_block(self) -> bool:
+        return self.children is not None
+
+    def get_key(self) -> str:
+        return self.name.lower()
+
+    def walk(self, skip: Set[str] = None) -> Iterator['Directive']:
+        """
+        Directives inside this block in document order, blocks
+        named in skip are not entered
+        """
+
+        for child in self.children or []:
+            yield child
+            if child.is_block() and child.get_key() not in (skip or ()):
+                yield from child.walk(skip)
+
+    def __repr__(self) -> str:
+        return f"Directive({self.name!r}, {self.args!r})"
+
+
+class ConfParser:
+    """
+    Single pass configuration parser building a tree of
+    directives. Variables are substituted and include directives
+    are replaced by the directives of the included files when
+    their content is available, the other include patterns are
+    kept in missing so they can be fetched together.
+    """
+    INCLUDE_NAMES = ()
+    VARIABLE = None
+    MAX_DEPTH = 10
+
+    def __init__(
+        self, conf_root: str = '/',
+        includes: Dict[str, List[RemoteFile]] = None,
+        variables: Dict[str, str] = None
+    ) -> None:
+        self.conf_root = conf_root
+        self.includes = includes or {}
+        self.variables = dict(variables or {})
+        self.missing: Set[str] = set()
+        self.resolved: Set[str] = set()
+        self.__depth = 0
+
+    def build(self, text: str) -> List[Directive]:
+        raise NotImplementedError
+
+    def parse(self, text: str) -> Directive:
+        """
+        Parse configuration text
+
+        :return: Root block holding all directives
+        :rtype: Directive
+        """
+
+        return Directive('', children=self.build(text))
+
+    def substitute(self, value: str) -> str:
+        if self.VARIABLE is None or '$' not in value:
+            return value
+
+        def replace(match: re.Match) -> str:
+            return self.variables.get(match.group(1), match.group(0))
+
+        return self.VARIABLE.sub(replace, value)
+
+    def unquote(self, value: str) -> str:
+        if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        return self.substitute(value)
+
+    def is_include(self, name: str) -> bool:
+        return name.lower() in self.INCLUDE_NAMES
+
+    def define(self, directive: Directive):
+        """
+        Record variables defined by a directive
+        """
+
+    def get_include_pattern(self, path: str) -> str:
+        return posixpath.normpath(posixpath.join(self.conf_root, path))
+
+    def add_directive(
+        self, block: List[Directive], directive: Directive
+    ):
+        """
+        Add a parsed directive to block, included files
+        are spliced in place of include directives
+        """
+
+        self.define(directive)
+        if not (self.is_include(directive.name) and directive.args):
+            block.append(directive)
+            return
+
+        pattern = self.get_include_pattern(directive.args[0])
+        if pattern not in self.includes:
+            self.missing.add(pattern)
+            block.append(directive)
+            return
+
+        self.resolved.add(pattern)
+        if self.__depth >= self.MAX_DEPTH:
+            return
+
+        self.__depth += 1
+        for included in self.includes[pattern]:
+            if included.content:
+                block.extend(self.build(included.content))
+        self.__depth -= 1
+
+
+class NginxConfParser(ConfParser):
+    """
+    Parser for nginx configurations, statements end
+    with ; and blocks are wrapped in braces
+    """
+    INCLUDE_NAMES = ('include',)
+    VARIABLE = re.compile(r'\$\{?(\w+)\}?')
+    TOKEN = re.compile(r"""
+        (?P<space>\s+)
+        | (?P<comment>\#[^\n]*)
+        | (?P<word>(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'
+            |\$\{[^}\s]*\}|\\.|[^\s{};"'\\])+)
+        | (?P<special>[{};])
+        | (?P<other>.)
+    """, re.VERBOSE | re.DOTALL)
+
+    def define(self, directive: Directive):
+        if directive.get_key() == 'set' and len(directive.args) > 1:
+            self.variables[directive.args[0].lstrip('$')] = \
+                directive.args[1]
+
+    def tokenize(self, text: str) -> Iterator[Tuple[str, str]]:
+        for match in self.TOKEN.finditer(text):
+            kind = match.lastgroup
+            if kind in ('word', 'special'):
+                yield kind, match.group()
+
+    def build(self, text: str) -> List[Directive]:
+        root: List[Directive] = []
+        stack = [root]
+        words: List[str] = []
+
+        for kind, value in self.tokenize(text):
+            if kind == 'word':
+                words.append(value)
+            elif value == ';':
+                if words:
+                    self.add_directive(stack[-1], self.make(words))
+                words = []
+            elif value == '{':
+                block = self.make(words or [''])
+                block.children = []
+                stack[-1].append(block)
+                stack.append(block.children)
+                words = []
+            else:
+                if words:
+                    self.add_directive(stack[-1], self.make(words))
+                    words = []
+                if len(stack) > 1:
+                    stack.pop()
+
+        if words:
+            self.add_directive(stack[-1], self.make(words))
+
+        return root
+
+    def make(self, words: List[str]) -> Directive:
+        return Directive(
+            words[0], [self.unquote(word) for word in words[1:]])
+
+
+class ApacheConfParser(ConfParser):
+    """
+    Parser for apache configurations, one directive per line
+    (lines ending with \\ continue) and sections are
+    wrapped in <Name args> and </Name>
+    """
+    INCLUDE_NAMES = ('include', 'includeoptional')
+    VARIABLE = re.compile(r'\$\{(\w+)\}')
+    WORD = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|\S+')
+    LINE = re.compile(r'(?:[^\n]*\\\n)*[^\n]*')
+
+    def define(self, directive: Directive):
+        if directive.get_key() == 'define' and directive.args:
+            value = directive.args[1] if len(directive.args) > 1 else ''
+            self.variables[directive.args[0]] = value
+
+    def split(self, line: str) -> List[str]:
+        return [
+            self.unquote(word) for word in self.WORD.findall(line)]
+
+    def build(self, text: str) -> List[Directive]:
+        root: List[Directive] = []
+        stack = [root]
+
+        for match in self.LINE.finditer(text):
+            line = match.group().replace('\\\n', ' ').strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if line.startswith('</'):
+                if len(stack) > 1:
+                    stack.pop()
+            elif line.startswith('<') and line.endswith('>'):
+                words = self.split(line[1:-1])
+                block = Directive(words[0] if words else '', words[1:], [])
+                stack[-1].append(block)
+                stack.append(block.children)
+            else:
+                words = self.split(line)
+                self.add_directive(
+                    stack[-1], Directive(words[0], words[1:]))
+
+        return root
+
+
 class BaseWebserver:
     """
     Base web server abstract class
     """
+    # Parser used for site details, text is searched
+    # with regular expressions when it is None
+    conf_parser = None
+
+    # Directive names read from parsed configurations
+    vhost_block = None
+    name_directives = ()
+    listen_directives = ()
+    root_directives = ()
+    access_directives = ()
+    error_directives = ()
+
+    # Levels of nested include directives fetched
+    INCLUDE_DEPTH = 3
+
     def __init__(
         self, version: str = None,
         enabled_path: str = None,
@@ -28,7 +309,8 @@ class BaseWebserver:
         error_path: str = '/error.log',
         error_name: str = None,
         conf_server_name: str = None,
-        ip_address: str = None
+        ip_address: str = None,
+        conf_root: str = '/'
     ) -> None:
         """
         Creating new web server
@@ -61,6 +343,9 @@ class BaseWebserver:
         :param ip_address: ip address for cloud service hosting
         web server, defaults to None
         :type ip_address: str, optional
+        :param conf_root: directory relative include paths
+        start from, defaults to '/'
+        :type conf_root: str, optional
         """
         self.__version = version
         self.__enabled_path = enabled_path
@@ -72,6 +357,7 @@ class BaseWebserver:
         self.__conf_server_name = conf_server_name
         self.__ip_address = ip_address
         self.__available_path = available_path
+        self.__conf_root = conf_root
 
     def get_version(self) -> str:
         """
@@ -115,6 +401,9 @@ class BaseWebserver:
     def get_available_path(self) -> str:
         return self.__available_path
 
+    def get_conf_root(self) -> str:
+        return self.__conf_root
+
     def get_file_available_path(self, name: str) -> str:
         return self.get_available_path() + f'/{name}.conf'
 
@@ -236,15 +525,251 @@ class BaseWebserver:
 
         return logs
 
-    def get_site_details(self, conf: str) -> Dict[str, str]:
-        links = self.get_conf_urls(conf)
-        all_logs = self.get_all_logs(conf)
-        data = {
-            'urls': links,
+    def get_conf_variables(self) -> Dict[str, str]:
+        """
+        Variables known before a configuration is parsed
+        """
+
+        return {}
+
+    def parse_conf(
+        self, conf: str, includes: Dict[str, List[RemoteFile]] = None
+    ) -> Tuple[Directive, Set[str], Set[str]]:
+        """
+        Parse configuration text
+
+        :param includes: Files for include patterns, defaults to None
+        :type includes: Dict[str, List[RemoteFile]], optional
+        :return: Root directive, include patterns not in includes
+        and include patterns that were spliced in
+        :rtype: Tuple[Directive, Set[str], Set[str]]
+        """
+
+        parser: ConfParser = self.conf_parser(
+            self.get_conf_root(), includes, self.get_conf_variables())
+        return parser.parse(conf), parser.missing, parser.resolved
+
+    def get_log_location(self, directive: Directive) -> str:
+        """
+        Get the file a log directive writes to, None is returned
+        for disabled, piped and syslog logs
+        """
+
+        if not directive.args:
+            return None
+        location = directive.args[0]
+        if location == 'off' or location.startswith(('|', 'syslog:')):
+            return None
+        return location
+
+    def get_vhost_listen(self, block: Directive) -> List[str]:
+        directives = [
+            directive for directive in block.walk({self.vhost_block})
+            if directive.get_key() in self.listen_directives]
+        return [
+            directive.args[0] for directive in directives if directive.args]
+
+    def get_vhost_details(self, block: Directive) -> Dict[str, list]:
+        """
+        Get names, listen addresses, root and logs
+        of one virtual host block
+        """
+
+        details = {
+            'names': [],
+            'listen': self.get_vhost_listen(block),
+            'root': '',
+            'access_logs': [],
+            'error_logs': [],
+            'logs': [],
+        }
+
+        # Roots set on the block itself win over nested blocks
+        for directive in block.children:
+            if directive.get_key() in self.root_directives \
+                    and directive.args:
+                details['root'] = directive.args[0]
+                break
+
+        for directive in block.walk({self.vhost_block}):
+            key = directive.get_key()
+            if key in self.name_directives:
+                details['names'] += [name for name in directive.args if name]
+            elif key in self.root_directives and not details['root']:
+                details['root'] = directive.args[0] if directive.args else ''
+            elif key in self.access_directives + self.error_directives:
+                location = self.get_log_location(directive)
+                if location is None:
+                    continue
+                details['logs'].append((directive.name, location))
+                if key in self.access_directives:
+                    details['access_logs'].append(location)
+                else:
+                    details['error_logs'].append(location)
+
+        return details
+
+    def get_conf_vhosts(self, root: Directive) -> List[Dict[str, list]]:
+        """
+        Get every virtual host of a parsed configuration, logs
+        set outside virtual hosts are used by hosts without them.
+        The configuration is one host when it has no host blocks.
+        """
+
+        defaults = self.get_vhost_details(root)
+        blocks = [
+            directive for directive in root.walk({self.vhost_block})
+            if directive.is_block()
+            if directive.get_key() == self.vhost_block]
+
+        if not blocks:
+            has_details = defaults['names'] or defaults['logs']
+            return [defaults] if has_details else []
+
+        vhosts = []
+        for block in blocks:
+            vhost = self.get_vhost_details(block)
+            for key in ('access_logs', 'error_logs'):
+                if not vhost[key]:
+                    vhost[key] = list(defaults[key])
+            vhost['logs'] = defaults['logs'] + vhost['logs']
+            vhosts.append(vhost)
+        return vhosts
+
+    def get_conf_details(self, root: Directive) -> Dict[str, str]:
+        """
+        Get site details from a parsed configuration
+        """
+
+        vhosts = self.get_conf_vhosts(root)
+        default_link = self.get_host_ip_address()
+
+        urls = []
+        for vhost in vhosts:
+            for name in vhost['names']:
+                link = name if name != '_' else default_link
+                if link not in urls:
+                    urls.append(link)
+
+        access_log = next(
+            (log for vhost in vhosts for log in vhost['access_logs']),
+            self.get_full_access_log())
+        error_log = next(
+            (log for vhost in vhosts for log in vhost['error_logs']),
+            self.get_full_error_log())
+
+        other_logs = []
+        seen = {access_log, error_log}
+        for vhost in vhosts:
+            for name, location in vhost.pop('logs'):
+                if location not in seen:
+                    seen.add(location)
+                    other_logs.append({'name': name, 'location': location})
+
+        return {
+            'urls': urls,
+            'access_log': access_log,
+            'error_log': error_log,
+            'other_logs': json.dumps(other_logs),
+            'vhosts': vhosts,
         }
-        data.update(all_logs)
 
-        return data
+    def get_site_details(
+        self, conf: str, includes: Dict[str, List[RemoteFile]] = None
+    ) -> Dict[str, str]:
+        if self.conf_parser is None:
+            links = self.get_conf_urls(conf)
+            all_logs = self.get_all_logs(conf)
+            data = {
+                'urls': links,
+            }
+            data.update(all_logs)
+
+            return data
+
+        root, *_ = self.parse_conf(conf, includes)
+        return self.get_conf_details(root)
+
+    def parse_conf_files(
+        self, files: List[RemoteFile],
+        fetch_includes: Callable[[List[str]], Dict[str, List[RemoteFile]]]
+    ) -> Dict[str, Tuple[Directive, Dict[str, List[RemoteFile]]]]:
+        """
+        Parse configuration files, the include patterns missing
+        in all files are fetched together for each nesting level
+
+        :param fetch_includes: Callable getting the files
+        matching each include pattern
+        :return: Parsed root directive and the files of the include
+        patterns it used for each file path
+        :rtype: Dict[str, Tuple[Directive, Dict[str, List[RemoteFile]]]]
+        """
+
+        includes: Dict[str, List[RemoteFile]] = {}
+        parsed: Dict[str, Tuple[Directive, Dict[str, List[RemoteFile]]]] = {}
+        pending = files
+
+        for level in range(self.INCLUDE_DEPTH + 1):
+            missing = set()
+            waiting = []
+            for conf_file in pending:
+                root, file_missing, resolved = self.parse_conf(
+                    conf_file.content, includes)
+                parsed[conf_file.path] = root, {
+                    pattern: includes[pattern] for pattern in resolved}
+                if file_missing:
+                    missing |= file_missing
+                    waiting.append(conf_file)
+
+            if not missing or level == self.INCLUDE_DEPTH:
+                break
+
+            includes.update(fetch_includes(sorted(missing)))
+            pending = waiting
+
+        return parsed
+
+    def iter_site_details(
+        self, files: Iterable[RemoteFile],
+        fetch_includes: Callable[
+            [List[str]], Dict[str, List[RemoteFile]]] = None
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Get site details for configuration files as they are
+        streamed from the server, ignored file names are skipped.
+        With fetch_includes all files are read first so their
+        include directives are resolved together.
+
+        :param files: Configuration files with content
+        :type files: Iterable[RemoteFile]
+        :param fetch_includes: Callable getting the files matching
+        include patterns, defaults to None
+        :rtype: Iterator[Dict[str, str]]
+        """
+
+        files = (
+            conf_file for conf_file in files
+            if self.clean_conf_filenames([conf_file.name]))
+
+        parsed = {}
+        if self.conf_parser is not None and fetch_includes is not None:
+            files = list(files)
+            parsed = self.parse_conf_files(files, fetch_includes)
+
+        for conf_file in files:
+            includes = {}
+            if conf_file.path in parsed:
+                root, includes = parsed[conf_file.path]
+                details = self.get_conf_details(root)
+            else:
+                details = self.get_site_details(conf_file.content)
+            details['file_name'] = conf_file.path
+            details['conf_mtime'] = conf_file.mtime
+            details['conf_inode'] = conf_file.inode
+            details['conf_hash'] = get_conf_fingerprint(
+                conf_file.checksum, includes)
+            details['conf_includes'] = json.dumps(sorted(includes))
+            yield details
 
     def new_conf_access_error_log_paths(self, name: str) -> Tuple[str, str]:
         error_log = self.get_log_path() + f"/{name}.error.log"
@@ -253,8 +778,17 @@ class BaseWebserver:
 
 
 class Nginx(BaseWebserver):
+    conf_parser = NginxConfParser
+    vhost_block = 'server'
+    name_directives = ('server_name',)
+    listen_directives = ('listen',)
+    root_directives = ('root',)
+    access_directives = ('access_log',)
+    error_directives = ('error_log',)
+
     def __init__(self, version: str = None, ip_address: str = None) -> None:
         init_data = {
+            'conf_root': '/etc/nginx',
             'enabled_path': '/etc/nginx/sites-enabled',
             'available_path': '/etc/nginx/sites-available',
             'log': '/var/log/nginx',
@@ -335,8 +869,16 @@ class Nginx(BaseWebserver):
 
 
 class Apache(BaseWebserver):
+    conf_parser = ApacheConfParser
+    vhost_block = 'virtualhost'
+    name_directives = ('servername', 'serveralias')
+    root_directives = ('documentroot',)
+    access_directives = ('accesslog', 'customlog', 'transferlog')
+    error_directives = ('errorlog',)
+
     def __init__(self, version: str = '2', ip_address: str = None) -> None:
         init_data = {
+            'conf_root': '/etc/apache2',
             'enabled_path': '/etc/apache2/sites-enabled',
             'available_path': '/etc/apache2/sites-available',
             'log': '/var/log/apache2',
@@ -348,9 +890,13 @@ class Apache(BaseWebserver):
         }
         super().__init__(**init_data)
 
-    def get_site_details(self, conf: str) -> Dict[str, str]:
-        conf = conf.replace('${APACHE_LOG_DIR}', self.get_log_path())
-        return super().get_site_details(conf)
+    def get_conf_variables(self) -> Dict[str, str]:
+        return {'APACHE_LOG_DIR': self.get_log_path()}
+
+    def get_vhost_listen(self, block: Directive) -> List[str]:
+        if block.get_key() == self.vhost_block:
+            return list(block.args)
+        return []
 
     def get_restart_command(self) -> str:
         return "systemctl restart apache2"